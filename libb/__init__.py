@@ -1,3 +1,16 @@
 from libb.factorization import *
 from libb.dtype import *
-from libb.utils import *
\ No newline at end of file
+from libb.utils import *
+from libb.matrix import Matrix, Vector
+from libb.sparse import CSRMatrix, CSCMatrix, FillStats, MinimumDegreeOrdering, SparseLUFactorization, SparseLUSolve
+from libb.backend import SetBackend, GetBackend
+from libb.solve import LUSolve, Det, Inverse, Lstsq, RefineSolve, RefineInfo, TridiagonalSolve, StructuredSolve, LUCacheInfo, SetLUCacheSize, ClearLUCache, lu_solve, det, inverse, lstsq, refine_solve, tridiagonal_solve, structured_solve
+from libb.update import QRInsertRow, QRDeleteRow, QRInsertColumn, QRDeleteColumn
+from libb.batch import BatchFactorize
+from libb.parallel import ParallelFactorize
+from libb.bench import RunBenchmarks, CompareBenchmarks
+from libb.instrument import Profile, Profiler, PhaseStats, profile
+from libb.eig import HessenbergReduction, EigVals, Eig, eigvals, eig
+from libb.exception import NotConvergedError
+from libb.tiled import TiledLUFactorization
+from libb.tsqr import TSQR, TSQRFactor, ApplyTSQR
\ No newline at end of file
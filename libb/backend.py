@@ -0,0 +1,443 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from libb.exception import SigularMatrixError
+from libb.matrix import Matrix
+
+# numpy is optional, the pure python implements are used without it
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+BACKENDS = ('python', 'numpy')
+
+# columns of a panel factored before each trailing update, the update is one product of this rank
+BLOCK = 128
+# narrowest column tile given to a worker thread, a smaller one costs more to schedule than to update
+MIN_TILE = 64
+# thread pools by worker count, kept for the next factorization
+_pools = {}
+
+# backend used by factorizations when no backend is given
+_backend = 'python'
+
+
+def SetBackend(backend):
+    """Set Backend
+
+    Select the backend used globally by factorizations.
+
+    Args:
+        backend: 'python' (pure python, supports any eType) or 'numpy'.
+    """
+
+    global _backend
+    if backend not in BACKENDS:
+        raise ValueError('Unknown backend %r, expect one of %s' % (backend, ', '.join(BACKENDS)))
+    if backend == 'numpy' and numpy is None:
+        raise ImportError('numpy backend requires numpy to be installed')
+    _backend = backend
+
+
+def GetBackend():
+    """Get the backend used globally by factorizations."""
+    return _backend
+
+
+def UseNumpy(backend, eType):
+    # the numpy backend only computes in float, exact types keep the python path
+    backend = _backend if backend is None else backend
+    if backend not in BACKENDS:
+        raise ValueError('Unknown backend %r, expect one of %s' % (backend, ', '.join(BACKENDS)))
+    if backend != 'numpy' or eType != float:
+        return False
+    if numpy is None:
+        raise ImportError('numpy backend requires numpy to be installed')
+    return True
+
+
+def RoundArray(M, digits=32):
+    # same as RoundMatrix, but on a ndarray and returns a Matrix sharing its buffer
+    if digits is None:
+        M = numpy.array(M, order='C')
+    else:
+        M = numpy.ascontiguousarray(numpy.round(M, digits))
+        M[numpy.abs(M) < 10 ** (-digits)] = 0.
+    return Matrix.from_buffer(M, M.shape[0], M.shape[1])
+
+
+def NumpyLUFactorization(A, digits=12, workers=None):
+    LU = numpy.array(A, dtype=float)
+    size = LU.shape[0]
+    P = _BlockedLU(LU, workers)
+    L = numpy.tril(LU, -1)
+    L[numpy.diag_indices(size)] = 1.
+    return RoundArray(numpy.eye(size)[P], digits), RoundArray(L, digits), RoundArray(numpy.triu(LU), digits)
+
+
+def NumpyPackedLUFactorization(A, digits=None, overwrite=False, typecode='d', workers=None):
+    # factor in A's own buffer when overwrite is set, in single precision for typecode 'f'
+    LU = numpy.asarray(A, dtype=typecode) if overwrite else numpy.array(A, dtype=typecode)
+    size = LU.shape[0]
+    P = _BlockedLU(LU, workers)
+    if digits is not None:
+        numpy.round(LU, digits, out=LU)
+        LU[numpy.abs(LU) < 10 ** (-digits)] = 0.
+    if overwrite and isinstance(A, Matrix):
+        return A, P.tolist()
+    return Matrix.from_buffer(numpy.ascontiguousarray(LU), size, size, typecode), P.tolist()
+
+
+def _BlockedLU(LU, workers):
+    # right-looking blocked LU in place, returns the pivot vector: factor a panel of
+    # BLOCK columns, swap its pivot rows on the other columns, then solve the block
+    # row of U and update the trailing matrix by one product per column tile
+    size = LU.shape[0]
+    P = numpy.arange(size)
+    pool = _Pool(workers)
+
+    # U12 = L11^-1 * A12, A22 = A22 - L21 * U12 on columns c0 ~ c1
+    def update(c0, c1):
+        NumpyUnitLowerSolve(LU[k0:k1, k0:k1], LU[k0:k1, c0:c1])
+        LU[k1:, c0:c1] -= LU[k1:, k0:k1] @ LU[k0:k1, c0:c1]
+
+    for k0 in range(0, size, BLOCK):
+        k1 = min(k0 + BLOCK, size)
+        pivots = NumpyFactorPanel(LU[k0:, k0:k1])
+        # the same interchanges on the rows of P and the columns left and right of the panel
+        order = numpy.arange(k0, size)
+        for c, p in enumerate(pivots):
+            order[[c, p]] = order[[p, c]]
+        moved = numpy.nonzero(order != numpy.arange(k0, size))[0]
+        if len(moved):
+            LU[k0 + moved, :k0] = LU[order[moved], :k0]
+            LU[k0 + moved, k1:] = LU[order[moved], k1:]
+            P[k0 + moved] = P[order[moved]]
+        if k1 < size:
+            _ForTiles(pool, workers, update, k1, size)
+    return P
+
+
+def NumpyFactorPanel(panel):
+    # LU with partial pivoting of a tall panel in place, returns the pivot row of each column
+    rows, cols = panel.shape
+    if cols > 16:
+        # factor the left half, update the right half by a product and factor it, most flops
+        # are in the products instead of rank-1 updates, the pivots of each half swap the other
+        h = cols // 2
+        pivots = NumpyFactorPanel(panel[:, :h])
+        for c, p in enumerate(pivots):
+            if p != c:
+                panel[[c, p], h:] = panel[[p, c], h:]
+        NumpyUnitLowerSolve(panel, panel[:h, h:])
+        panel[h:, h:] -= panel[h:, :h] @ panel[:h, h:]
+        lower = NumpyFactorPanel(panel[h:, h:])
+        for c, p in enumerate(lower):
+            if p != c:
+                panel[[h + c, h + p], :h] = panel[[h + p, h + c], :h]
+        return pivots + [h + p for p in lower]
+    pivots = []
+    for c in range(min(rows, cols)):
+        p = c + int(numpy.argmax(numpy.abs(panel[c:, c])))
+        if abs(panel[p, c]) < 1e-12:
+            raise SigularMatrixError("LU Factorization cannot apply on a sigular matrix.")
+        panel[[c, p]] = panel[[p, c]]
+        pivots.append(p)
+        panel[c + 1:, c] /= panel[c, c]
+        panel[c + 1:, c + 1:] -= numpy.outer(panel[c + 1:, c], panel[c, c + 1:])
+    return pivots
+
+
+def NumpyUnitLowerSolve(L, U):
+    # U = L11^-1 * U in place, L11 is the unit lower triangle on top of L
+    h = len(U) // 2
+    if h > 8:
+        # solve the top half, eliminate it from the bottom half by a product, solve that
+        NumpyUnitLowerSolve(L, U[:h])
+        U[h:] -= L[h:len(U), :h] @ U[:h]
+        NumpyUnitLowerSolve(L[h:, h:], U[h:])
+        return
+    for r in range(1, len(U)):
+        U[r] -= L[r, :r] @ U[:r]
+
+
+def NumpyLUSubstitute(LU, X):
+    # solve L * Y = X, then U * X = Y, in place on the buffer of X
+    LU = numpy.asarray(LU)
+    Y = numpy.asarray(X)
+    size = LU.shape[0]
+    for i in range(1, size):
+        Y[i] -= LU[i, :i] @ Y[:i]
+    for i in reversed(range(size)):
+        Y[i] -= LU[i, i + 1:] @ Y[i + 1:]
+        Y[i] /= LU[i, i]
+
+
+def NumpyClassicalSchmidtDecomposition(A, digits=12, reorthogonalize=False, block=None):
+    # Q is filled column by column, work on column-contiguous (Fortran order) copies
+    U = numpy.array(A, dtype=float, order='F')
+    rows, cols = U.shape
+    Q = numpy.zeros((rows, cols), order='F')
+    R = numpy.zeros((cols, cols))
+    passes = 2 if reorthogonalize else 1
+    block = block if block and block > 1 else 1
+    for b in range(0, cols, block):
+        b_end = min(b + block, cols)
+        # project the whole block against q0 ~ qb-1 (and once more for CGS2)
+        for _ in range(passes):
+            S = Q[:, :b].T @ U[:, b:b_end]
+            R[:b, b:b_end] += S
+            U[:, b:b_end] -= Q[:, :b] @ S
+        for i in range(b, b_end):
+            # rki = qk* * ui, ui = ui - sum(rki * qk)    (b <= k < i)
+            for _ in range(passes):
+                r = Q[:, b:i].T @ U[:, i]
+                R[b:i, i] += r
+                U[:, i] -= Q[:, b:i] @ r
+            v_ii = numpy.sqrt(U[:, i] @ U[:, i])
+            R[i, i] = v_ii
+            # Have dependent columns
+            if v_ii < 1e-12:
+                raise SigularMatrixError("Schmidt Decomposition cannot apply on a sigular matrix.")
+            Q[:, i] = U[:, i] / v_ii
+    return RoundArray(Q, digits), RoundArray(R, digits)
+
+
+def NumpyModifiedSchmidtDecomposition(A, digits=12):
+    U = numpy.array(A, dtype=float)
+    rows, cols = U.shape
+    Q = numpy.zeros((rows, cols))
+    R = numpy.zeros((cols, cols))
+    for i in range(cols):
+        v_ii = numpy.sqrt(U[:, i] @ U[:, i])
+        # Have dependent columns
+        if v_ii < 1e-12:
+            raise SigularMatrixError("Schmidt Decomposition cannot apply on a sigular matrix.")
+        R[i, i] = v_ii
+        Q[:, i] = U[:, i] / v_ii
+        # uk = uk - qi * qi* * uk    (i < k < size)
+        R[i, i + 1:] = Q[:, i] @ U[:, i + 1:]
+        U[:, i + 1:] -= numpy.outer(Q[:, i], R[i, i + 1:])
+    return RoundArray(Q, digits), RoundArray(R, digits)
+
+
+def NumpyHouseholderReduction(A, digits=12, compact=False, workers=None):
+    # blocked as the python path with block=BLOCK: the reflectors of a panel are applied
+    # to the panel only, then to the trailing columns at once as I - V * T * V*
+    R = numpy.array(A, dtype=float)
+    rows, cols = R.shape
+    steps = cols if rows > cols else cols - 1
+    reflectors, blocks = [], []
+    pool = _Pool(workers)
+    for k0 in range(0, steps, BLOCK):
+        k1 = min(k0 + BLOCK, steps)
+        V = numpy.zeros((rows - k0, k1 - k0))
+        # reflect the panel in a contiguous copy, its columns are strided in R
+        panel = R[k0:, k0:k1].copy()
+        for i in range(k0, k1):
+            # u = x - ||x||e1 normalized to u[0] = 1, tau = 2 / u(u*)
+            x = panel[i - k0:, i - k0]
+            sigma = x[1:] @ x[1:]
+            u = V[i - k0:, i - k0]
+            u[0] = 1.
+            if sigma == 0.:
+                tau = 2. if x[0] < 0. else 0.
+            else:
+                x_norm = numpy.sqrt(x[0] * x[0] + sigma)
+                u0 = -sigma / (x[0] + x_norm) if x[0] > 0. else x[0] - x_norm
+                tau = 2. * u0 * u0 / (sigma + u0 * u0)
+                u[1:] = x[1:] / u0
+            reflectors.append((i, u, tau))
+            # R[i:, i:k1] = (I - tau * u(u*)) * R[i:, i:k1], column i is ||x||e1 without its roundoff
+            P = panel[i - k0:, i - k0:]
+            P -= numpy.outer(u, tau * (u @ P))
+            P[1:, 0] = 0.
+        R[k0:, k0:k1] = panel
+        T = _TriangularFactor(V, [tau for i, u, tau in reflectors[k0:k1]])
+        blocks.append((k0, V, T))
+        # R = (I - V T V*)* * R on the trailing columns
+        if k1 < cols:
+            _ForTiles(pool, workers, _BlockReflect(R, k0, V, T.T), k1, cols)
+
+    if compact:
+        Q = [(i, u.tolist(), float(tau)) for i, u, tau in reflectors]
+        return Q, RoundArray(R[:cols], digits)
+    # Q = P1P2...Pn-1 * I[:, :cols], accumulate backward so each block only touches Q[k0:, k0:]
+    Q = numpy.eye(rows, cols)
+    for k0, V, T in reversed(blocks):
+        _ForTiles(pool, workers, _BlockReflect(Q, k0, V, T), k0, cols)
+    return RoundArray(Q, digits), RoundArray(R[:cols], digits)
+
+
+def _TriangularFactor(V, taus):
+    # T upper triangular with P1P2...Pk = I - V T V*, column j is -tau_j * T * V* * v_j
+    k = len(taus)
+    T = numpy.zeros((k, k))
+    for j in range(k):
+        T[j, j] = taus[j]
+        if j:
+            T[:j, j] = -taus[j] * (T[:j, :j] @ (V[:, :j].T @ V[:, j]))
+    return T
+
+
+def _BlockReflect(M, k0, V, T):
+    # update(c0, c1) sets M[k0:, c0:c1] = (I - V T V*) * M[k0:, c0:c1], T* gives the transpose
+    def update(c0, c1):
+        C = M[k0:, c0:c1]
+        C -= V @ (T @ (V.T @ C))
+    return update
+
+
+def NumpyPivotedHouseholderReduction(A, digits=12, tol=None, steps=None, compact=False):
+    R = numpy.array(A, dtype=float)
+    rows, cols = R.shape
+    steps = min(rows, cols) if steps is None else steps
+    P = numpy.arange(cols)
+    # squared norms of the remaining columns, and their values when last computed
+    norms = numpy.einsum('ij,ij->j', R, R)
+    computed = norms.copy()
+    tol = max(rows, cols) * 2. ** -52 if tol is None else tol
+    threshold = tol * tol * (norms.max() if cols else 0.)
+    reflectors = []
+    rank = steps
+    for i in range(steps):
+        # select the column with the largest remaining norm, stop if it is negligible
+        p = i + int(numpy.argmax(norms[i:]))
+        if norms[p] <= threshold or norms[p] == 0.:
+            rank = i
+            break
+        R[:, [i, p]] = R[:, [p, i]]
+        P[[i, p]] = P[[p, i]]
+        norms[[i, p]] = norms[[p, i]]
+        computed[[i, p]] = computed[[p, i]]
+        if i < rows - 1:
+            x = R[i:, i]
+            sigma = x[1:] @ x[1:]
+            u = numpy.zeros(rows - i)
+            u[0] = 1.
+            if sigma == 0.:
+                tau = 2. if x[0] < 0. else 0.
+            else:
+                x_norm = numpy.sqrt(x[0] * x[0] + sigma)
+                u0 = -sigma / (x[0] + x_norm) if x[0] > 0. else x[0] - x_norm
+                tau = 2. * u0 * u0 / (sigma + u0 * u0)
+                u[1:] = x[1:] / u0
+            reflectors.append((i, u, tau))
+            R[i:, i:] -= numpy.outer(u, tau * (u @ R[i:, i:]))
+        # downdate, recompute the norms which lost half of their digits
+        norms[i + 1:] -= R[i, i + 1:] ** 2
+        lost = i + 1 + numpy.nonzero(norms[i + 1:] <= 2. ** -26 * computed[i + 1:])[0]
+        norms[lost] = computed[lost] = numpy.einsum('ij,ij->j', R[i + 1:, lost], R[i + 1:, lost])
+
+    R = numpy.triu(R[:rank])
+    if compact:
+        Q = [(i, u.tolist(), float(tau)) for i, u, tau in reflectors]
+        return Q, RoundArray(R, digits), P.tolist(), rank
+    Q = numpy.eye(rows, rank)
+    for i, u, tau in reversed(reflectors):
+        Q[i:, i:] -= numpy.outer(u, tau * (u @ Q[i:, i:]))
+    return RoundArray(Q, digits), RoundArray(R, digits), P.tolist(), rank
+
+
+def NumpyGivensReduction(A, digits=12, compact=False):
+    R = numpy.array(A, dtype=float)
+    rows, cols = R.shape
+    rotations = []
+    for i in range(min(cols, rows - 1)):
+        for j in range(i + 1, rows):
+            if R[j, i] == 0.:
+                continue
+            # rotate row i and row j only
+            cs_root_square = numpy.hypot(R[i, i], R[j, i])
+            c, s = R[i, i] / cs_root_square, R[j, i] / cs_root_square
+            _RotateRows(R[i, i:], R[j, i:], c, s)
+            R[j, i] = 0.
+            rotations.append((i, j, float(c), float(s)))
+    if compact:
+        return rotations, RoundArray(R[:cols], digits)
+    # Q = P1*P2*...Pn* * I[:, :cols], apply Pn* first
+    Q = numpy.eye(rows, cols)
+    for i, j, c, s in reversed(rotations):
+        _RotateRows(Q[i], Q[j], c, -s)
+    return RoundArray(Q, digits), RoundArray(R[:cols], digits)
+
+
+def _Pool(workers):
+    # the persistent thread pool of the tile updates, None to update in the calling thread,
+    # numpy releases the GIL while it multiplies a tile
+    if not workers or workers < 2:
+        return None
+    pool = _pools.get(workers)
+    if pool is None:
+        pool = _pools[workers] = ThreadPoolExecutor(max_workers=workers)
+    return pool
+
+
+def _ForTiles(pool, workers, update, start, end):
+    # update(c0, c1) every column tile of start ~ end, one tile per worker of at least MIN_TILE columns
+    if pool is None or end - start < 2 * MIN_TILE:
+        update(start, end)
+        return
+    count = min(workers, (end - start) // MIN_TILE)
+    step = -(-(end - start) // count)
+    for future in [pool.submit(update, c, min(c + step, end)) for c in range(start, end, step)]:
+        future.result()
+
+
+def _RotateRows(row_i, row_j, c, s):
+    # row_i <- c * row_i + s * row_j, row_j <- c * row_j - s * row_i
+    t = c * row_i + s * row_j
+    row_j *= c
+    row_j -= s * row_i
+    row_i[:] = t
+
+
+def NumpyHessenbergReduction(A):
+    H = numpy.array(A, dtype=float)
+    size = H.shape[0]
+    Q = numpy.eye(size)
+    for i in range(size - 2):
+        # u = x - ||x||e1 normalized to u[0] = 1, tau = 2 / u(u*)
+        x = H[i + 1:, i]
+        sigma = x[1:] @ x[1:]
+        if sigma == 0.:
+            continue
+        u = numpy.ones(size - i - 1)
+        x_norm = numpy.sqrt(x[0] * x[0] + sigma)
+        u0 = -sigma / (x[0] + x_norm) if x[0] > 0. else x[0] - x_norm
+        tau = 2. * u0 * u0 / (sigma + u0 * u0)
+        u[1:] = x[1:] / u0
+        # H = P * H * P, Q = Q * P with P = I - tau * u(u*) on rows/columns i + 1 ~ size
+        H[i + 1:, i:] -= numpy.outer(u, tau * (u @ H[i + 1:, i:]))
+        H[:, i + 1:] -= numpy.outer(H[:, i + 1:] @ u, tau * u)
+        Q[:, i + 1:] -= numpy.outer(Q[:, i + 1:] @ u, tau * u)
+        H[i + 2:, i] = 0.
+    return H, Q
+
+
+def NumpyRotateRows(M, i, j, c, s, start, end):
+    # rows i, j <- G * rows i, j on columns start ~ end, G = | c* s* | with complex c, s, i < j
+    #                                                      | -s c  |
+    rows = M[i:j + 1:j - i, start:end]
+    rows[...] = numpy.array(((c.conjugate(), s.conjugate()), (-s, c))) @ rows
+
+
+def NumpyRotateColumns(M, i, j, c, s, start, end):
+    # columns i, j <- columns i, j * G* on rows start ~ end
+    columns = M[start:end, i:j + 1:j - i]
+    columns[...] = columns @ numpy.array(((c, -s.conjugate()), (s, c.conjugate())))
+
+
+def NumpySchurVectors(T, Zh):
+    # eigenvectors of the upper triangular T solved all at once row by row from the bottom,
+    # Y[:, k] solves (T - tkk * I) * y = 0 with ykk = 1, then V = Z * Y with Z = (Zh)*
+    size = T.shape[0]
+    diag = T.diagonal().copy()
+    small = 2. ** -52 * max(numpy.abs(T).max(), 1e-300)
+    Y = numpy.eye(size, dtype=complex)
+    for i in reversed(range(size - 1)):
+        d = diag[i] - diag[i + 1:]
+        d[numpy.abs(d) < small] = small
+        Y[i, i + 1:] = -(T[i, i + 1:] @ Y[i + 1:, i + 1:]) / d
+    return Zh.conj().T @ Y
+
@@ -0,0 +1,186 @@
+from libb.exception import SigularMatrixError, NotSquareMatrixError
+from libb.factorization import METHODS, LUFactorization
+from libb.backend import numpy
+
+
+def BatchFactorize(method, As, eType=float, digits=12):
+    """Batch Factorize
+
+    Apply one factorization on a stack of same-shape square matrices at once.
+    With numpy and float elements the whole stack is factored together in
+    shared buffers, each step is a vector operation over all matrices.
+
+    Args:
+        method: One of 'lu', 'cs', 'ms', 'h', 'g'.
+        As:     A 3-D array or a sequence of square matrices with the same shape.
+        eType:  Optional, the dtype of elements in matrix.
+        digits: Optional, the digits of precision in float calculation, None to skip rounding.
+
+    Returns:
+        The stacked factors (P, L, U or Q, R) followed by a mask in which True marks
+        a singular matrix. Factors of singular matrices are filled with nan (or None
+        without numpy).
+    """
+
+    if method not in METHODS:
+        raise ValueError('Unknown method %r, expect one of %s' % (method, '|'.join(METHODS)))
+
+    # factor matrix one by one if we can not vectorize
+    if numpy is None or eType != float:
+        return _LoopFactorize(METHODS[method], As, eType, digits)
+
+    A = numpy.array(As, dtype=float)
+    if A.ndim != 3 or A.shape[1] != A.shape[2]:
+        raise NotSquareMatrixError('Except a stack of square matrices not shape %s' % (A.shape,))
+    factors, singular = _BATCH_KERNELS[method](A)
+    # failed matrices have meaningless factors
+    for M in factors:
+        M[singular] = numpy.nan
+        if digits is not None:
+            _RoundStack(M, digits)
+    return factors + (singular,)
+
+
+def _LoopFactorize(factorize, As, eType, digits):
+    results, singular = [], []
+    for A in As:
+        try:
+            results.append(factorize(A, eType=eType, digits=digits))
+            singular.append(False)
+        except (SigularMatrixError, ZeroDivisionError):
+            results.append(None)
+            singular.append(True)
+    count = 3 if factorize is LUFactorization else 2
+    factors = tuple([None if r is None else r[k] for r in results] for k in range(count))
+    return factors + (singular,)
+
+
+def _RoundStack(M, digits):
+    # same as RoundMatrix, but in place on the whole stack
+    numpy.round(M, digits, out=M)
+    M[numpy.abs(M) < 10 ** (-digits)] = 0.
+
+
+def _BatchLU(A):
+    batch, size, _ = A.shape
+    index = numpy.arange(batch)
+    U = A
+    L = numpy.zeros_like(A)
+    P = numpy.tile(numpy.arange(size), (batch, 1))
+    singular = numpy.zeros(batch, dtype=bool)
+    for i in range(size):
+        # select max_abs element of each matrix as pivot and exchange its row with the i-th row
+        max_idx = i + numpy.argmax(numpy.abs(U[:, i:, i]), axis=1)
+        for M in (U, L, P):
+            row = M[index, i].copy()
+            M[index, i] = M[index, max_idx]
+            M[index, max_idx] = row
+        pivot = U[:, i, i]
+        failed = numpy.abs(pivot) < 1e-12
+        singular |= failed
+        pivot = numpy.where(failed, 1., pivot)
+        # eliminate row i + 1 ~ size of every matrix, save multipliers in L
+        m = U[:, i + 1:, i] / pivot[:, None]
+        L[:, i + 1:, i] = m
+        U[:, i + 1:, i + 1:] -= m[:, :, None] * U[:, i, None, i + 1:]
+        U[:, i + 1:, i] = 0.
+    L[:, numpy.arange(size), numpy.arange(size)] = 1.
+    Pm = numpy.zeros_like(A)
+    Pm[index[:, None], numpy.arange(size), P] = 1.
+    return (Pm, L, U), singular
+
+
+def _BatchClassicalSchmidt(A):
+    batch, size, _ = A.shape
+    Q = numpy.zeros_like(A)
+    R = numpy.zeros_like(A)
+    singular = numpy.zeros(batch, dtype=bool)
+    for i in range(size):
+        # rki = qk* * xi, ui = xi - sum(rki * qk)    (0 <= k < i)
+        R[:, :i, i] = numpy.einsum('bjk,bj->bk', Q[:, :, :i], A[:, :, i])
+        u = A[:, :, i] - numpy.einsum('bjk,bk->bj', Q[:, :, :i], R[:, :i, i])
+        v_ii = numpy.sqrt(numpy.einsum('bj,bj->b', u, u))
+        R[:, i, i] = v_ii
+        failed = v_ii < 1e-12
+        singular |= failed
+        Q[:, :, i] = u / numpy.where(failed, 1., v_ii)[:, None]
+    return (Q, R), singular
+
+
+def _BatchModifiedSchmidt(A):
+    batch, size, _ = A.shape
+    U = A
+    Q = numpy.zeros_like(A)
+    R = numpy.zeros_like(A)
+    singular = numpy.zeros(batch, dtype=bool)
+    for i in range(size):
+        v_ii = numpy.sqrt(numpy.einsum('bj,bj->b', U[:, :, i], U[:, :, i]))
+        R[:, i, i] = v_ii
+        failed = v_ii < 1e-12
+        singular |= failed
+        Q[:, :, i] = U[:, :, i] / numpy.where(failed, 1., v_ii)[:, None]
+        # uk = uk - qi * qi* * uk    (i < k < size)
+        R[:, i, i + 1:] = numpy.einsum('bj,bjk->bk', Q[:, :, i], U[:, :, i + 1:])
+        U[:, :, i + 1:] -= Q[:, :, i, None] * R[:, i, None, i + 1:]
+    return (Q, R), singular
+
+
+def _BatchHouseholder(A):
+    batch, size, _ = A.shape
+    R = A
+    Q = numpy.tile(numpy.eye(size), (batch, 1, 1))
+    U = numpy.zeros((size - 1, batch, size))
+    tau = numpy.zeros((size - 1, batch))
+    for i in range(size - 1):
+        # u = x - ||x||e1 normalized to u[0] = 1, tau = 2 / u(u*)
+        x0 = R[:, i, i]
+        sigma = numpy.einsum('bj,bj->b', R[:, i + 1:, i], R[:, i + 1:, i])
+        x_norm = numpy.sqrt(x0 * x0 + sigma)
+        positive = x0 > 0.
+        u0 = numpy.where(positive, -sigma / numpy.where(positive, x0 + x_norm, 1.), x0 - x_norm)
+        parallel = sigma == 0.
+        u0 = numpy.where(parallel, 1., u0)
+        t = numpy.where(parallel, numpy.where(x0 < 0., 2., 0.), 2. * u0 * u0 / (sigma + u0 * u0))
+        u = U[i, :, i:]
+        u[:, 0] = 1.
+        u[:, 1:] = numpy.where(parallel[:, None], 0., R[:, i + 1:, i] / u0[:, None])
+        tau[i] = t
+        # R[i:, i:] = (I - tau * u(u*)) * R[i:, i:]
+        w = t[:, None] * numpy.einsum('bj,bjk->bk', u, R[:, i:, i:])
+        R[:, i:, i:] -= u[:, :, None] * w[:, None, :]
+    # Q = P1P2...Pn-1, accumulate backward
+    for i in reversed(range(size - 1)):
+        u = U[i, :, i:]
+        w = tau[i][:, None] * numpy.einsum('bj,bjk->bk', u, Q[:, i:, i:])
+        Q[:, i:, i:] -= u[:, :, None] * w[:, None, :]
+    return (Q, R), numpy.zeros(batch, dtype=bool)
+
+
+def _BatchGivens(A):
+    batch, size, _ = A.shape
+    R = A
+    Q = numpy.tile(numpy.eye(size), (batch, 1, 1))
+    for i in range(size - 1):
+        for j in range(i + 1, size):
+            # rotate row i and row j of every matrix, zero entries get c = 1, s = 0
+            a, b = R[:, i, i], R[:, j, i]
+            zero = b == 0.
+            cs_root_square = numpy.where(zero, 1., numpy.hypot(a, b))
+            c = numpy.where(zero, 1., a / cs_root_square)[:, None]
+            s = numpy.where(zero, 0., b / cs_root_square)[:, None]
+            for M, start in ((R, i), (Q, 0)):
+                row_i = M[:, i, start:].copy()
+                M[:, i, start:] = c * row_i + s * M[:, j, start:]
+                M[:, j, start:] = c * M[:, j, start:] - s * row_i
+            R[:, j, i] = 0.
+    # Q = Q.transpose (Q is PnPn-1...P2P1)
+    return (Q.transpose(0, 2, 1).copy(), R), numpy.zeros(batch, dtype=bool)
+
+
+_BATCH_KERNELS = {
+    'lu': _BatchLU,
+    'cs': _BatchClassicalSchmidt,
+    'ms': _BatchModifiedSchmidt,
+    'h': _BatchHouseholder,
+    'g': _BatchGivens,
+}
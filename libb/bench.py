@@ -0,0 +1,246 @@
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tracemalloc
+
+from libb.exception import SigularMatrixError
+from libb.factorization import METHODS
+from libb.dtype import Fraction, Rational
+from libb import backend as _backend
+
+SIZES = (8, 16, 32, 64, 128, 256, 512, 1024)
+ETYPES = {'float': float, 'frac': Fraction, 'rat': Rational}
+CLASSES = ('random', 'illcond', 'sparse', 'integer')
+
+# exact elements grow with every elimination step, larger sizes run for hours
+# (Fraction on ill-conditioned input already does at 16)
+EXACT_MAX_SIZES = {'frac': 8, 'rat': 32}
+
+
+def MakeMatrix(kind, size, seed=0):
+    """Make Matrix
+
+    Generate a reproducible test matrix of the given class.
+
+    Args:
+        kind: 'random' (uniform in [-1, 1]), 'illcond' (random with columns graded
+              from 1 to 1e-8, condition number about 1e8), 'sparse' (about 5%
+              nonzeros and a nonzero diagonal) or 'integer' (integers in [-9, 9]).
+        size: The number of rows and columns.
+        seed: Optional, the seed of the random generator.
+
+    Returns:
+        The matrix as a list of lists.
+    """
+
+    rand = random.Random('%s-%d-%d' % (kind, size, seed))
+    if kind == 'random':
+        return [[rand.uniform(-1., 1.) for j in range(size)] for i in range(size)]
+    if kind == 'illcond':
+        scales = [10. ** (-8. * j / max(size - 1, 1)) for j in range(size)]
+        return [[rand.uniform(-1., 1.) * scales[j] for j in range(size)] for i in range(size)]
+    if kind == 'sparse':
+        return [[rand.uniform(1., 2.) if i == j else (rand.uniform(-1., 1.) if rand.random() < 0.05 else 0.)
+                 for j in range(size)] for i in range(size)]
+    if kind == 'integer':
+        return [[rand.randint(-9, 9) for j in range(size)] for i in range(size)]
+    raise ValueError('Unknown matrix class %r, expect one of %s' % (kind, '|'.join(CLASSES)))
+
+
+def Accuracy(method, A, factors):
+    """Accuracy
+
+    Measure the backward error of factors in float, ||PA - LU|| / ||A|| for LU and
+    ||A - QR|| / ||A||, ||Q*Q - I|| for QR, all in Frobenius norm.
+
+    Args:
+        method:  One of 'lu', 'cs', 'ms', 'h', 'g'.
+        A:       The factored matrix.
+        factors: The factors returned by the method.
+
+    Returns:
+        A dict of the measured errors.
+    """
+
+    A = _Float(A)
+    a_norm = _Norm(A) or 1.
+    if method == 'lu':
+        P, L, U = (_Float(M) for M in factors)
+        return {'lu': _Norm(_Sub(_MatMul(P, A), _MatMul(L, U))) / a_norm}
+    Q, R = (_Float(M) for M in factors)
+    Qt = [list(col) for col in zip(*Q)]
+    I = [[1. if i == j else 0. for j in range(len(Qt))] for i in range(len(Qt))]
+    return {'qr': _Norm(_Sub(A, _MatMul(Q, R))) / a_norm, 'orthogonality': _Norm(_Sub(_MatMul(Qt, Q), I))}
+
+
+def Benchmark(method, A, eType=float, repeat=3, backend=None):
+    """Benchmark
+
+    Time one factorization of A and trace its memory. The factors are not rounded,
+    the accuracy is the one of the arithmetic.
+
+    Args:
+        method:  One of 'lu', 'cs', 'ms', 'h', 'g'.
+        A:       A matrix instance.
+        eType:   Optional, the dtype of elements in matrix.
+        repeat:  Optional, the number of timed runs, the best and the mean are kept.
+        backend: Optional, 'python' or 'numpy', see SetBackend.
+
+    Returns:
+        A dict with the time, memory and accuracy of the run, or the error raised.
+    """
+
+    factorize = METHODS[method]
+    times = []
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            factors = factorize(A=A, eType=eType, digits=None, backend=backend)
+            times.append(time.perf_counter() - start)
+        # trace one more run, tracemalloc slows it down too much to time
+        tracemalloc.start()
+        try:
+            before = tracemalloc.take_snapshot()
+            factors = factorize(A=A, eType=eType, digits=None, backend=backend)
+            after = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    except (SigularMatrixError, ArithmeticError) as e:
+        # singular input, or exact elements which outgrow a float
+        return {'error': '%s: %s' % (type(e).__name__, e)}
+    # blocks and bytes allocated by the run and still held, mostly the factors
+    stats = after.compare_to(before, 'filename')
+    return {
+        'time': {'best': min(times), 'mean': sum(times) / len(times), 'repeat': repeat},
+        'memory': {'peak': peak, 'blocks': sum(s.count_diff for s in stats), 'bytes': sum(s.size_diff for s in stats)},
+        'accuracy': Accuracy(method, A, factors),
+    }
+
+
+def RunBenchmarks(methods=None, sizes=SIZES, etypes=None, classes=CLASSES, repeat=3, seed=0, backend=None,
+                  exact_max_size=None, log=None):
+    """Run Benchmarks
+
+    Benchmark every combination of method, element type, matrix class and size.
+
+    Args:
+        methods:        Optional, the methods to run, default to all of METHODS.
+        sizes:          Optional, the matrix sizes.
+        etypes:         Optional, the names of element types ('float', 'frac', 'rat'), default to all.
+        classes:        Optional, the matrix classes, see MakeMatrix.
+        repeat:         Optional, the number of timed runs of each case.
+        seed:           Optional, the seed of the generated matrices.
+        backend:        Optional, 'python' or 'numpy', see SetBackend.
+        exact_max_size: Optional, the largest size run with exact element types,
+                        default to EXACT_MAX_SIZES.
+        log:            Optional, a file to report each finished case on.
+
+    Returns:
+        A dict of the environment ('meta') and a list of records ('results').
+    """
+
+    methods = list(METHODS) if methods is None else methods
+    etypes = list(ETYPES) if etypes is None else etypes
+    backend = _backend.GetBackend() if backend is None else backend
+    results = []
+    for kind in classes:
+        for size in sizes:
+            A = MakeMatrix(kind, size, seed)
+            for name in etypes:
+                if ETYPES[name] != float and size > (EXACT_MAX_SIZES[name] if exact_max_size is None else exact_max_size):
+                    continue
+                for method in methods:
+                    record = {'method': method, 'etype': name, 'class': kind, 'size': size, 'backend': backend}
+                    record.update(Benchmark(method, A, ETYPES[name], repeat, backend))
+                    results.append(record)
+                    if log is not None:
+                        log.write('%-3s %-6s %-8s %5d  %s\n' % (method, name, kind, size,
+                                  '%.6fs' % record['time']['best'] if 'time' in record else record['error']))
+    meta = {'python': platform.python_version(), 'platform': platform.platform(), 'backend': backend,
+            'seed': seed, 'repeat': repeat, 'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+    return {'meta': meta, 'results': results}
+
+
+def CompareBenchmarks(old, new, threshold=1.1):
+    """Compare Benchmarks
+
+    Match the records of two runs and find the cases that got slower.
+
+    Args:
+        old:       The result of an earlier RunBenchmarks.
+        new:       The result of a later RunBenchmarks.
+        threshold: Optional, the ratio of best times taken as a regression.
+
+    Returns:
+        A list of (method, etype, class, size, ratio) sorted by ratio, slowest first.
+    """
+
+    def key(record):
+        return (record['method'], record['etype'], record['class'], record['size'], record['backend'])
+
+    baseline = {key(r): r for r in old['results'] if 'time' in r}
+    regressions = []
+    for record in new['results']:
+        base = baseline.get(key(record))
+        if base is None or 'time' not in record:
+            continue
+        ratio = record['time']['best'] / max(base['time']['best'], 1e-12)
+        if ratio > threshold:
+            regressions.append(key(record)[:4] + (ratio,))
+    return sorted(regressions, key=lambda r: -r[-1])
+
+
+def _Float(M):
+    return [[float(e) for e in row] for row in M]
+
+
+def _MatMul(A, B):
+    # use numpy when it is installed, the python product is O(n^3) too
+    if _backend.numpy is not None:
+        return (_backend.numpy.array(A) @ _backend.numpy.array(B)).tolist()
+    Bt = [list(col) for col in zip(*B)]
+    return [[sum(a * b for a, b in zip(row, col)) for col in Bt] for row in A]
+
+
+def _Sub(A, B):
+    return [[a - b for a, b in zip(ra, rb)] for ra, rb in zip(A, B)]
+
+
+def _Norm(A):
+    return sum(e * e for row in A for e in row) ** 0.5
+
+
+def getArguments(args):
+    parser = argparse.ArgumentParser(prog='libb bench', description="Benchmark the factorizations.")
+    parser.add_argument("-m", "--methods", dest='methods', default=','.join(METHODS), help="methods to run (default all)", metavar="lu,cs,ms,h,g")
+    parser.add_argument("-s", "--sizes", dest='sizes', default=','.join(map(str, SIZES)), help="matrix sizes (default 8 ~ 1024)")
+    parser.add_argument("-t", "--types", dest='etypes', default=','.join(ETYPES), help="element types (default all)", metavar="float,frac,rat")
+    parser.add_argument("-c", "--classes", dest='classes', default=','.join(CLASSES), help="matrix classes (default all)", metavar=','.join(CLASSES))
+    parser.add_argument("-r", "--repeat", dest='repeat', type=int, default=3, help="timed runs of each case (default 3)")
+    parser.add_argument("-b", "--backend", dest='backend', default=None, help="backend (default the global one)", metavar="python|numpy")
+    parser.add_argument("--seed", dest='seed', type=int, default=0, help="seed of the generated matrices (default 0)")
+    parser.add_argument("--exact-max-size", dest='exact_max_size', type=int, default=None, help="largest size run with exact types (default frac 8, rat 32)")
+    parser.add_argument("-o", "--output", dest='output', default=None, help="write the JSON report to a file instead of stdout")
+    parser.add_argument("--compare", dest='compare', default=None, help="an earlier JSON report to find regressions against")
+    return parser.parse_args(args)
+
+def main(args=sys.argv[2:]):
+    args = getArguments(args)
+    report = RunBenchmarks(methods=args.methods.split(','), sizes=[int(s) for s in args.sizes.split(',')],
+                           etypes=args.etypes.split(','), classes=args.classes.split(','), repeat=args.repeat,
+                           seed=args.seed, backend=args.backend, exact_max_size=args.exact_max_size, log=sys.stderr)
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=1)
+        print()
+    else:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=1)
+    if args.compare is not None:
+        with open(args.compare) as f:
+            old = json.load(f)
+        for method, etype, kind, size, ratio in CompareBenchmarks(old, report):
+            sys.stderr.write('[REGRESSION] %s %s %s %d: %.2fx slower\n' % (method, etype, kind, size, ratio))
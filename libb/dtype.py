@@ -1,3 +1,5 @@
+from math import gcd
+
 # Fraction with operators overload (add, sub, mul, div)
 class Fraction():
     # construction
@@ -9,7 +11,7 @@ class Fraction():
             self.symbol = symbol
 
         # parse float to fraction
-        if type(numerator) == float:
+        if isinstance(numerator, float):
             p = 10 ** precision
             n = int(abs(numerator) * p)
             d = int(abs(denominator) * p)
@@ -166,3 +168,237 @@ class Fraction():
     def __pos__(self):
         return Fraction(self.numerator, self.denominator)
 
+
+
+
+# reduce a Rational only when its denominator grows over this many bits
+_REDUCE_BITS = 64
+# relative precision kept for an inexact Rational (built from a float)
+_INEXACT_BITS = 96
+
+
+# Rational with operators overload, a faster exact type than Fraction
+class Rational():
+    # numerator carries the sign, denominator is always positive, a Rational
+    # built from a float (e.g. a square root) is inexact and keeps _INEXACT_BITS
+    __slots__ = ('numerator', 'denominator', 'exact')
+
+    # construction
+    def __init__(self, numerator, denominator:int=1, precision:int=12):
+        exact = True
+        # parse float to rational with given digits of precision
+        if isinstance(numerator, float):
+            p = 10 ** precision
+            n, d, exact = round(numerator * p), p * denominator, False
+        # parse int to rational
+        elif isinstance(numerator, int):
+            n, d = int(numerator), denominator
+        # copy from other exact types
+        elif isinstance(numerator, Rational):
+            n, d, exact = numerator.numerator, numerator.denominator * denominator, numerator.exact
+        elif isinstance(numerator, Fraction):
+            n, d = numerator.numerator, numerator.denominator * denominator
+            n = n if numerator.symbol else -n
+        # unsupport type
+        else:
+            raise NotImplementedError
+        if d == 0:
+            raise ZeroDivisionError
+        if d < 0:
+            n, d = -n, -d
+        g = gcd(n, d)
+        self.numerator = n // g
+        self.denominator = d // g
+        self.exact = exact
+
+    # build result without parsing, reduce only large ones (d > 0 is required)
+    @staticmethod
+    def _make(n, d, exact):
+        r = Rational.__new__(Rational)
+        if d.bit_length() > _REDUCE_BITS:
+            g = gcd(n, d)
+            if g != 1:
+                n, d = n // g, d // g
+            # inexact value, round to _INEXACT_BITS of relative precision
+            if not exact and d.bit_length() > _INEXACT_BITS:
+                shift = _INEXACT_BITS - n.bit_length() + d.bit_length()
+                if shift > 0:
+                    n, d = (n << shift) // d, 1 << shift
+                else:
+                    n, d = n // d, 1
+        r.numerator = n
+        r.denominator = d
+        r.exact = exact
+        return r
+
+    # reduce in place to the lowest terms
+    def normalize(self):
+        g = gcd(self.numerator, self.denominator)
+        if g != 1:
+            self.numerator //= g
+            self.denominator //= g
+        return self
+
+    def __float__(self):
+        return self.numerator / self.denominator
+
+    def __bool__(self):
+        return self.numerator != 0
+
+    def __hash__(self):
+        self.normalize()
+        if self.denominator == 1:
+            return hash(self.numerator)
+        return hash((self.numerator, self.denominator))
+
+    # overload print()
+    def __str__(self):
+        self.normalize()
+        if not self.exact:
+            return str(float(self))
+        if self.denominator == 1:
+            return "%d" % self.numerator
+        return "%d/%d" % (self.numerator, self.denominator)
+
+    def __repr__(self):
+        return "Rational(%s)" % self
+
+    # overload abs()
+    def __abs__(self):
+        return Rational._make(abs(self.numerator), self.denominator, self.exact)
+
+    # Binary Operators
+    # overload op "+"
+    def __add__(self, other):
+        if type(other) == Rational:
+            exact = self.exact and other.exact
+            if self.denominator == other.denominator:
+                return Rational._make(self.numerator + other.numerator, self.denominator, exact)
+            return Rational._make(self.numerator * other.denominator + other.numerator * self.denominator, self.denominator * other.denominator, exact)
+        elif type(other) == int:
+            return Rational._make(self.numerator + other * self.denominator, self.denominator, self.exact)
+        return NotImplemented
+
+    __radd__ = __add__
+
+    # overload op "-"
+    def __sub__(self, other):
+        if type(other) == Rational:
+            exact = self.exact and other.exact
+            if self.denominator == other.denominator:
+                return Rational._make(self.numerator - other.numerator, self.denominator, exact)
+            return Rational._make(self.numerator * other.denominator - other.numerator * self.denominator, self.denominator * other.denominator, exact)
+        elif type(other) == int:
+            return Rational._make(self.numerator - other * self.denominator, self.denominator, self.exact)
+        return NotImplemented
+
+    def __rsub__(self, other):
+        if type(other) == int:
+            return Rational._make(other * self.denominator - self.numerator, self.denominator, self.exact)
+        return NotImplemented
+
+    # overload op "*"
+    def __mul__(self, other):
+        if type(other) == Rational:
+            return Rational._make(self.numerator * other.numerator, self.denominator * other.denominator, self.exact and other.exact)
+        elif type(other) == int:
+            return Rational._make(self.numerator * other, self.denominator, self.exact)
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    # overload op "/"
+    def __truediv__(self, other):
+        if type(other) == Rational:
+            n, d, exact = self.numerator * other.denominator, self.denominator * other.numerator, self.exact and other.exact
+        elif type(other) == int:
+            n, d, exact = self.numerator, self.denominator * other, self.exact
+        else:
+            return NotImplemented
+        if d == 0:
+            raise ZeroDivisionError
+        if d < 0:
+            n, d = -n, -d
+        return Rational._make(n, d, exact)
+
+    def __rtruediv__(self, other):
+        if type(other) == int:
+            return Rational(other) / self
+        return NotImplemented
+
+    # overload op "//"
+    def __floordiv__(self, other):
+        q = self / other
+        return q if q is NotImplemented else Rational._make(q.numerator // q.denominator, 1, q.exact)
+
+    # overload op "%"
+    def __mod__(self, other):
+        q = self // other
+        return q if q is NotImplemented else self - q * other
+
+    # overload op "**"
+    def __pow__(self, other):
+        # exact for integer exponent, approximated through float otherwise
+        if type(other) == int:
+            if other >= 0:
+                return Rational._make(self.numerator ** other, self.denominator ** other, self.exact)
+            return Rational(1) / Rational._make(self.numerator ** -other, self.denominator ** -other, self.exact)
+        return Rational(float(self) ** other)
+
+    # Comparison Operators, compare by cross multiplication
+    # overload op "<"
+    def __lt__(self, other):
+        if type(other) == Rational:
+            return self.numerator * other.denominator < other.numerator * self.denominator
+        elif type(other) == int:
+            return self.numerator < other * self.denominator
+        return NotImplemented
+
+    # overload op ">"
+    def __gt__(self, other):
+        if type(other) == Rational:
+            return self.numerator * other.denominator > other.numerator * self.denominator
+        elif type(other) == int:
+            return self.numerator > other * self.denominator
+        return NotImplemented
+
+    # overload op "<="
+    def __le__(self, other):
+        if type(other) == Rational:
+            return self.numerator * other.denominator <= other.numerator * self.denominator
+        elif type(other) == int:
+            return self.numerator <= other * self.denominator
+        return NotImplemented
+
+    # overload op ">="
+    def __ge__(self, other):
+        if type(other) == Rational:
+            return self.numerator * other.denominator >= other.numerator * self.denominator
+        elif type(other) == int:
+            return self.numerator >= other * self.denominator
+        return NotImplemented
+
+    # overload op "=="
+    def __eq__(self, other):
+        if type(other) == Rational:
+            return self.numerator * other.denominator == other.numerator * self.denominator
+        elif type(other) == int:
+            return self.numerator == other * self.denominator
+        return NotImplemented
+
+    # overload op "!="
+    def __ne__(self, other):
+        if type(other) == Rational:
+            return self.numerator * other.denominator != other.numerator * self.denominator
+        elif type(other) == int:
+            return self.numerator != other * self.denominator
+        return NotImplemented
+
+    # Unary Operators
+    # overload op "-"
+    def __neg__(self):
+        return Rational._make(-self.numerator, self.denominator, self.exact)
+
+    # overload op "+"
+    def __pos__(self):
+        return self
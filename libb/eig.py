@@ -0,0 +1,342 @@
+import math
+import cmath
+
+from libb.exception import NotSquareMatrixError, NotConvergedError
+from libb.factorization import _HouseholderVector
+from libb.matrix import Matrix
+from libb.utils import RoundMatrix
+from libb import backend as _backend
+from libb import instrument as _instrument
+
+# unit roundoff of float, a subdiagonal element below it relative to its neighbours is zero
+_EPS = 2. ** -52
+
+
+def HessenbergReduction(A, digits=12, backend=None):
+    """Hessenberg Reduction
+
+    Reduce A to upper Hessenberg form by n - 2 Householder reflectors, each one
+    applied from both sides. H is tridiagonal when A is symmetric. Elements of
+    exact types are converted to float.
+
+    Args:
+        A:       A square matrix instance.
+        digits:  Optional, the digits to round H and Q to, None keeps them as computed.
+        backend: Optional, 'python' or 'numpy', see SetBackend.
+
+    Returns:
+        Two Matrix: H, Q with A = Q * H * Q*.
+    """
+
+    _CheckSquare(A)
+    if _backend.UseNumpy(backend, float):
+        H, Q = _backend.NumpyHessenbergReduction(A)
+        return _backend.RoundArray(H, digits), _backend.RoundArray(Q, digits)
+    H, Q = _Hessenberg(A)
+    return RoundMatrix(H, digits), RoundMatrix(Q, digits)
+
+
+def EigVals(A, digits=12, symmetric=None, maxiter=None, backend=None):
+    """Eigenvalues
+
+    Compute the eigenvalues of A. A is reduced to Hessenberg form, then implicitly
+    shifted QR steps of O(n) Givens rotations chase a bulge down the subdiagonal
+    and converged eigenvalues are deflated from the bottom. A symmetric A becomes
+    tridiagonal and takes real steps with the Wilkinson shift, O(n) each. Any
+    other A takes complex steps with the Wilkinson shift of the trailing 2 x 2
+    block, O(n^2) each. Elements of exact types are converted to float.
+
+    Args:
+        A:         A square matrix instance.
+        digits:    Optional, the digits to round the eigenvalues to, None keeps them as computed.
+        symmetric: Optional, whether A is symmetric, default to check A == A*.
+        maxiter:   Optional, the maximum number of QR steps, default to 30n.
+        backend:   Optional, 'python' or 'numpy', see SetBackend.
+
+    Returns:
+        A list of the eigenvalues, float ascending for a symmetric A, else in the
+        order of the Schur form, complex unless the imaginary part rounds to 0.
+    """
+
+    return _Eig(A, digits, symmetric, maxiter, backend, False)[0]
+
+
+def Eig(A, digits=12, symmetric=None, maxiter=None, backend=None):
+    """Eigen Decomposition
+
+    Compute the eigenvalues and eigenvectors of A, see EigVals. The rotations of
+    the QR steps are accumulated into the Q of the Hessenberg reduction, which
+    holds the eigenvectors of a symmetric A. For any other A it holds the Schur
+    vectors Z of A = Z * T * Z*, the eigenvectors of the triangular T are found
+    by back substitution and multiplied by Z, O(n^3) in total.
+
+    Args:
+        A:         A square matrix instance.
+        digits:    Optional, the digits to round the results to, None keeps them as computed.
+        symmetric: Optional, whether A is symmetric, default to check A == A*.
+        maxiter:   Optional, the maximum number of QR steps, default to 30n.
+        backend:   Optional, 'python' or 'numpy', see SetBackend.
+
+    Returns:
+        A list of the eigenvalues and a Matrix whose k-th column is the unit
+        eigenvector of the k-th eigenvalue, complex when any element is.
+    """
+
+    return _Eig(A, digits, symmetric, maxiter, backend, True)
+
+
+def _Eig(A, digits, symmetric, maxiter, backend, vectors):
+    size = _CheckSquare(A)
+    if symmetric is None:
+        symmetric = all(A[i][j] == A[j][i] for i in range(size) for j in range(i))
+    maxiter = 30 * size if maxiter is None else maxiter
+    numpy = _backend.numpy if _backend.UseNumpy(backend, float) else None
+    prof = _instrument.Active()
+    if prof:
+        t = prof.start()
+
+    # A = Q * H * Q*
+    if numpy is not None:
+        H, Q = _backend.NumpyHessenbergReduction(A)
+    else:
+        H, Q = _Hessenberg(A)
+    if prof:
+        t = prof.lap('eig.hessenberg', t, 10 * size ** 3 // 3)
+
+    if symmetric:
+        # the rotations act on the rows of Q*, they become the eigenvectors
+        d = [float(H[k, k]) for k in range(size)]
+        e = [float(H[k + 1, k]) for k in range(size - 1)]
+        rotate = None
+        if vectors and numpy is not None:
+            Qt = numpy.ascontiguousarray(Q.T)
+            rotate = lambda k, c, s: _backend._RotateRows(Qt[k], Qt[k + 1], c, s)
+        elif vectors:
+            Qt = Q.T.copy()
+            rotate = lambda k, c, s: Qt.rotate_rows(k, k + 1, c, s)
+        steps = _TridiagonalQR(d, e, rotate, maxiter)
+        if prof:
+            t = prof.lap('eig.qr', t)
+            prof.metric('eig.qr_steps', steps)
+        order = sorted(range(size), key=d.__getitem__)
+        values = [_Round(d[k], digits) for k in order]
+        if not vectors:
+            return values, None
+        if numpy is not None:
+            V = _backend.RoundArray(Qt[order].T, digits)
+        else:
+            V = RoundMatrix(Matrix.from_rows([[Qt[k, i] for k in order] for i in range(size)]), digits)
+        if prof:
+            prof.lap('eig.vectors', t)
+        return values, V
+
+    # complex Schur form A = Z * T * Z*, T is H and Z is Q when the QR steps end,
+    # Z* is kept instead of Z so the rotations act on contiguous rows
+    if numpy is not None:
+        T, Zh = H.astype(complex), (Q.T.astype(complex) if vectors else None)
+        rows, columns = _backend.NumpyRotateRows, _backend.NumpyRotateColumns
+    else:
+        T = [[complex(e) for e in row] for row in H]
+        Zh = [[complex(e) for e in column] for column in Q.T] if vectors else None
+        rows, columns = _RotateRows, _RotateColumns
+    steps = _HessenbergQR(T, Zh, rows, columns, maxiter)
+    if prof:
+        t = prof.lap('eig.qr', t)
+        prof.metric('eig.qr_steps', steps)
+    values = [_Round(complex(T[k][k]), digits) for k in range(size)]
+    if not vectors:
+        return values, None
+
+    # V = Z * Y, Y[:, k] is the eigenvector of T for tkk
+    if numpy is not None:
+        V = _backend.NumpySchurVectors(T, Zh).T.tolist()
+    else:
+        V = _SchurVectors(T, Zh)
+    columns = [_Normalize(v, digits) for v in V]
+    eType = complex if any(type(e) == complex for v in columns for e in v) else float
+    V = Matrix.from_rows([[v[i] for v in columns] for i in range(size)], eType)
+    if prof:
+        prof.lap('eig.vectors', t)
+    return values, V
+
+
+def _CheckSquare(A):
+    size = len(A)
+    c_size = len(A[0]) if size else 0
+    if c_size != size:
+        raise NotSquareMatrixError('Except a square matrix with shape (%d,%d) not (%d, %d)' % (size, size, size, c_size))
+    return size
+
+
+def _Hessenberg(A):
+    size = len(A)
+    H = Matrix.from_rows([[float(e) for e in row] for row in A])
+    Q = Matrix.identity(size)
+    for i in range(size - 2):
+        u, tau = _HouseholderVector([H[k, i] for k in range(i + 1, size)], float)
+        if tau == 0.:
+            continue
+        # H = P * H * P, Q = Q * P with P = I - tau * u(u*) on rows/columns i + 1 ~ size
+        H.reflect_rows(i + 1, u, tau, i)
+        _ReflectColumns(H, i + 1, u, tau)
+        _ReflectColumns(Q, i + 1, u, tau)
+        for k in range(i + 2, size):
+            H[k, i] = 0.
+    return H, Q
+
+
+def _ReflectColumns(M, j, u, tau):
+    # M[:, j:] = M[:, j:] * (I - tau * u(u*)), M is contiguous so each row is one slice
+    data, n = M.data, len(u)
+    for i in range(M.rows):
+        a = M.index(i, j)
+        row = M._slice(a, n)
+        w = tau * sum(x * y for x, y in zip(row, u))
+        data[a:a + n] = M._pack([x - w * y for x, y in zip(row, u)])
+
+
+def _TridiagonalQR(d, e, rotate, maxiter):
+    # implicitly shifted QR on the symmetric tridiagonal T (diagonal d, subdiagonal e) in place,
+    # T = G * T * G* for each rotation G of rows k, k + 1, rotate(k, c, s) accumulates it
+    hi, steps = len(d) - 1, 0
+    while hi > 0:
+        # d[hi] converged, deflate it
+        if abs(e[hi - 1]) <= _EPS * (abs(d[hi - 1]) + abs(d[hi])):
+            e[hi - 1] = 0.
+            hi -= 1
+            continue
+        steps += 1
+        if steps > maxiter:
+            raise NotConvergedError('QR iteration did not converge in %d steps.' % maxiter)
+        # find the unreduced block lo ~ hi
+        lo = hi - 1
+        while lo > 0 and abs(e[lo - 1]) > _EPS * (abs(d[lo - 1]) + abs(d[lo])):
+            lo -= 1
+        # Wilkinson shift, the eigenvalue of the trailing 2 x 2 block closer to d[hi]
+        delta = (d[hi - 1] - d[hi]) / 2.
+        b = e[hi - 1]
+        mu = d[hi] - b * b / (delta + math.copysign(math.hypot(delta, b), delta))
+        # the first rotation makes a bulge at (lo, lo + 2), the next ones chase it down
+        x, z = d[lo] - mu, e[lo]
+        for k in range(lo, hi):
+            r = math.hypot(x, z)
+            c, s = (x / r, z / r) if r else (1., 0.)
+            if k > lo:
+                e[k - 1] = r
+            a, b, f = d[k], e[k], d[k + 1]
+            d[k] = c * c * a + 2. * c * s * b + s * s * f
+            d[k + 1] = s * s * a - 2. * c * s * b + c * c * f
+            e[k] = c * s * (f - a) + (c * c - s * s) * b
+            if k < hi - 1:
+                x, z = e[k], s * e[k + 1]
+                e[k + 1] *= c
+            if rotate is not None:
+                rotate(k, c, s)
+    return steps
+
+
+def _HessenbergQR(H, Zh, rows, columns, maxiter):
+    # implicitly shifted QR on the complex upper Hessenberg H in place, H = G * H * G* for each
+    # rotation G of rows k, k + 1, the whole H is kept up to date and Z* = G * Z* when Zh is given
+    size = len(H)
+    hi, steps, stalled = size - 1, 0, 0
+    while hi > 0:
+        # find the unreduced block lo ~ hi, deflate at a negligible subdiagonal element
+        lo = hi
+        while lo > 0 and abs(H[lo][lo - 1]) > _EPS * (abs(H[lo - 1][lo - 1]) + abs(H[lo][lo])):
+            lo -= 1
+        if lo > 0:
+            H[lo][lo - 1] = 0.
+        if lo == hi:
+            hi, stalled = hi - 1, 0
+            continue
+        steps += 1
+        stalled += 1
+        if steps > maxiter:
+            raise NotConvergedError('QR iteration did not converge in %d steps.' % maxiter)
+        if stalled % 10 == 0:
+            # exceptional shift, breaks the cycles the Wilkinson shift may fall into
+            mu = H[hi][hi] + 1.5 * abs(H[hi][hi - 1])
+        else:
+            # Wilkinson shift, the eigenvalue of the trailing 2 x 2 block closer to H[hi][hi]
+            a, b, c, d = H[hi - 1][hi - 1], H[hi - 1][hi], H[hi][hi - 1], H[hi][hi]
+            m, root = (a + d) / 2., cmath.sqrt((a - d) * (a - d) / 4. + b * c)
+            mu = m + root if abs(m + root - d) < abs(m - root - d) else m - root
+        # eigenvalues only need the block, the Schur vectors need the whole T
+        first, last = (0, size) if Zh is not None else (lo, hi + 1)
+        # the first rotation makes a bulge at (lo + 2, lo), the next ones chase it down
+        x, z = H[lo][lo] - mu, H[lo + 1][lo]
+        for k in range(lo, hi):
+            if k > lo:
+                x, z = H[k][k - 1], H[k + 1][k - 1]
+            r = math.hypot(abs(x), abs(z))
+            if r == 0.:
+                continue
+            c, s = complex(x / r), complex(z / r)
+            rows(H, k, k + 1, c, s, max(k - 1, lo), last)
+            if k > lo:
+                H[k + 1][k - 1] = 0.
+            columns(H, k, k + 1, c, s, first, min(k + 3, hi + 1))
+            if Zh is not None:
+                rows(Zh, k, k + 1, c, s, 0, size)
+    return steps
+
+
+def _RotateRows(M, i, j, c, s, start, end):
+    # rows i, j <- G * rows i, j on columns start ~ end, G = | c* s* | with complex c, s
+    #                                                      | -s c  |
+    row_i, row_j = M[i], M[j]
+    x, y = row_i[start:end], row_j[start:end]
+    cc, sc = c.conjugate(), s.conjugate()
+    row_i[start:end] = [cc * a + sc * b for a, b in zip(x, y)]
+    row_j[start:end] = [c * b - s * a for a, b in zip(x, y)]
+
+
+def _RotateColumns(M, i, j, c, s, start, end):
+    # columns i, j <- columns i, j * G* on rows start ~ end
+    cc, sc = c.conjugate(), s.conjugate()
+    for row in M[start:end]:
+        a, b = row[i], row[j]
+        row[i] = c * a + s * b
+        row[j] = cc * b - sc * a
+
+
+def _SchurVectors(T, Zh):
+    # eigenvectors of the upper triangular T solved row by row from the bottom, Y[i][k] for
+    # (T - tkk * I) * y = 0 with ykk = 1, a tiny tii - tkk is replaced to keep y finite
+    size = len(T)
+    small = _EPS * max(max(abs(e) for row in T for e in row), 1e-300)
+    Y = [[1. if i == k else 0j for k in range(size)] for i in range(size)]
+    for i in reversed(range(size - 1)):
+        t_i, Y_i = T[i], Y[i]
+        for k in range(i + 1, size):
+            w = sum(t_i[j] * Y[j][k] for j in range(i + 1, k + 1))
+            d = t_i[i] - T[k][k]
+            Y_i[k] = -w / (d if abs(d) >= small else small)
+    # V[k] = Z * Y[:, k] with Z = (Zh)*, only the first k + 1 elements of Y[:, k] are nonzero
+    Z = [[e.conjugate() for e in column] for column in zip(*Zh)]
+    return [[sum(z[j] * Y[j][k] for j in range(k + 1)) for z in Z] for k in range(size)]
+
+
+def _Normalize(v, digits):
+    # scale v to unit length with its largest element real positive, so a real eigenvector is real
+    top = max(v, key=abs)
+    scale = top.conjugate() / abs(top) / math.sqrt(sum(abs(e) ** 2 for e in v))
+    return [_Round(complex(e * scale), digits) for e in v]
+
+
+def _Round(e, digits):
+    # round real and imaginary parts, a complex with a zero imaginary part becomes float
+    if isinstance(e, complex):
+        if digits is not None:
+            e = complex(_Round(e.real, digits), _Round(e.imag, digits))
+        return e.real if e.imag == 0. else e
+    if digits is None:
+        return float(e)
+    e = round(float(e), digits)
+    return 0. if abs(e) < 10 ** (-digits) else e
+
+
+# snake_case aliases
+eigvals = EigVals
+eig = Eig
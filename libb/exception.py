@@ -2,4 +2,7 @@ class SigularMatrixError(Exception):
     pass
 
 class NotSquareMatrixError(Exception):
+    pass
+
+class NotConvergedError(Exception):
     pass
\ No newline at end of file
@@ -1,19 +1,33 @@
+from operator import mul
+
 from libb.exception import SigularMatrixError, NotSquareMatrixError
-from libb.utils import RoundMatrix
+from libb.utils import RoundMatrix, DetectStructure
+from libb.matrix import Matrix
+from libb import backend as _backend
+from libb import instrument as _instrument
 
 
-def LUFactorization(A, eType=float, digits=12):
+def LUFactorization(A, eType=float, digits=12, backend=None, fractionFree=False, structure=None, workers=None):
     """LU Factorization
 
     Use Gaussian Elimination to apply LU Factorization on given square matrix A.
 
     Args:
-        A:      A square matrix instance.
-        eType:  Optional, the dtype of elements in matrix.
-        digits: Optional, the digits of precision in float calculation.
+        A:       A square matrix instance.
+        eType:   Optional, the dtype of elements in matrix.
+        digits:  Optional, the digits of precision in float calculation.
+        backend: Optional, 'python' or 'numpy', see SetBackend.
+        fractionFree: Optional, eliminate an integer A with BareissFactorization and
+                 only divide once when forming L and U.
+        structure: Optional, 'auto' to run DetectStructure on A, or the Structure of A
+                 if it is known. Triangular matrices are split without elimination
+                 and banded ones go to BandedLUFactorization.
+        workers: Optional, the number of threads updating the trailing matrix by
+                 column tiles with the numpy backend, default to one. The python
+                 backend raises ValueError for more than one.
 
     Returns:
-        Three matrix: P, L, U which is the LU factorization of A.
+        Three Matrix: P, L, U which is the LU factorization of A.
     """
 
     # get size of A
@@ -23,64 +37,203 @@ def LUFactorization(A, eType=float, digits=12):
     if c_size != size:
         raise NotSquareMatrixError('Except a square matrix with shape (%d,%d) not (%d, %d)' % (size, size, size, c_size))
 
-    # make a identity matrix as L
-    L = [[eType(0) for j in range(size)] for i in range(size)]
-    # deepcopy A as U with element type
-    U = [[eType(A[i][j]) for j in range(size)] for i in range(size)]
+    # eliminate in integers, then L = L_b * diag(1/p_k), U = diag(1/p_k-1) * U_b
+    if fractionFree:
+        P, L, D, U = BareissFactorization(A)
+        pivots = [eType(1)] + [eType(U[i, i]) for i in range(size)]
+        P, L, U = P.copy(eType), L.copy(eType), U.copy(eType)
+        for i in range(size):
+            for j in range(size):
+                L[i, j] = L[i, j] / pivots[j + 1]
+                U[i, j] = U[i, j] / pivots[i]
+        if eType == float:
+            return RoundMatrix(P, digits), RoundMatrix(L, digits), RoundMatrix(U, digits)
+        return P, L, U
+
+    # fast paths of structured matrices, before any backend
+    if structure is not None:
+        if structure == 'auto':
+            structure = DetectStructure(A)
+        if structure.kind in ('diagonal', 'upper', 'lower'):
+            return _TriangularLU(A, size, structure.kind == 'lower', eType, digits)
+        if structure.kind in ('tridiagonal', 'banded'):
+            return BandedLUFactorization(A, structure.lower, structure.upper, eType, digits)
+
+    # run as vector operations on ndarray if numpy backend is selected
+    if _backend.UseNumpy(backend, eType):
+        return _backend.NumpyLUFactorization(A, digits, workers)
+    _SerialOnly(workers)
+
+    # eliminate in a packed LU, then split it into L and U
+    LU, P = PackedLUFactorization(A, eType, digits=None, backend='python')
+    return _UnpackLU(LU, P, size, eType, digits)
+
+
+def _SerialOnly(workers):
+    # the tile updates run on ndarray only, the python loops hold the GIL
+    if workers is not None and workers > 1:
+        raise ValueError('workers need the numpy backend and float elements, not %d workers' % workers)
+
+
+def _UnpackLU(LU, P, size, eType, digits):
+    # split a packed LU with pivot vector P into Matrix P, L, U
+    prof = _instrument.Active()
+    if prof:
+        t = prof.start()
+        prof.allocate(3 * size * size, 3)
+    lu = LU.data
+    L = Matrix.identity(size, eType)
+    U = Matrix.zeros(size, size, eType)
+    for i in range(size):
+        for j in range(size):
+            if j < i:
+                L[i, j] = lu[i * size + j]
+            else:
+                U[i, j] = lu[i * size + j]
+    # construct P
+    Pm = Matrix.zeros(size, size, eType)
+    for i in range(size):
+        Pm[i, P[i]] = eType(1)
+    P = Pm
+    if prof:
+        t = prof.lap('lu.split', t)
+
+    # Round matrix according to digits
+    if eType == float and digits is not None:
+        P, L, U = RoundMatrix(P, digits), RoundMatrix(L, digits), RoundMatrix(U, digits)
+        if prof:
+            prof.lap('round', t)
+    return P, L, U
+
+
+def PackedLUFactorization(A, eType=float, digits=None, overwrite=False, backend=None, typecode='d', workers=None):
+    """Packed LU Factorization
+
+    Apply LU Factorization in one matrix, LAPACK getrf style. The strictly lower
+    part holds the multipliers of L (its unit diagonal is implied), the upper part
+    holds U, and the row exchanges are returned as a pivot vector instead of P.
+
+    Args:
+        A:         A square matrix instance.
+        eType:     Optional, the dtype of elements in matrix.
+        digits:    Optional, the digits of precision in float calculation, None (default) to skip rounding.
+        overwrite: Optional, factor A itself instead of a copy if A is a contiguous Matrix
+                   which stores eType elements (an array for float, a list otherwise).
+        backend:   Optional, 'python' or 'numpy', see SetBackend.
+        typecode:  Optional, the storage of float elements, 'f' factors in single
+                   precision with half the memory.
+        workers:   Optional, the number of threads updating the trailing matrix by
+                   column tiles with the numpy backend, default to one. The python
+                   backend raises ValueError for more than one.
+
+    Returns:
+        LU, P: the packed factors and the pivot vector, row i of PA is row P[i] of A.
+    """
+
+    # get size of A
+    size = len(A)
+    c_size = len(A[0])
+    # check whether A is a square matrix or not
+    if c_size != size:
+        raise NotSquareMatrixError('Except a square matrix with shape (%d,%d) not (%d, %d)' % (size, size, size, c_size))
+
+    # run as vector operations on ndarray if numpy backend is selected
+    if _backend.UseNumpy(backend, eType):
+        return _backend.NumpyPackedLUFactorization(A, digits, overwrite and _Writable(A, eType, typecode), typecode, workers)
+    _SerialOnly(workers)
+
+    prof = _instrument.Active()
+    if prof:
+        t = prof.start()
+        a_max = _instrument.MaxAbs(A)
+    # work on A directly or on a deepcopy of A with element type, LU[i][j] is lu[o + i * size + j]
+    LU = A if overwrite and _Writable(A, eType, typecode) else Matrix.from_rows(A, eType, typecode)
+    lu, o = LU.data, LU.offset
+    zero = eType(0)
     # make a size array as P which contains each row's number
     P = [i for i in range(size)]
+    if prof:
+        prof.allocate(0 if LU is A else size * size, 0 if LU is A else 1)
+        t = prof.lap('lu.copy', t)
     # do Gaussian elimination with Type III operations
     for i in range(size):
         # select max_abs element as pivot and interexchange its row with the i-th row
         max_idx = i
         for j in range(i + 1, size):
-            if U[max_idx][i] == eType(0):
+            if lu[o + max_idx * size + i] == zero:
                 max_idx = j
-            elif abs(U[max_idx][i]) < abs(U[j][i]):
+            elif abs(lu[o + max_idx * size + i]) < abs(lu[o + j * size + i]):
                 max_idx = j
-        if U[max_idx][i] == eType(0) or abs(U[max_idx][i]) < eType(1e-12):
+        pivot = lu[o + max_idx * size + i]
+        if pivot == zero or abs(pivot) < eType(1e-12):
             raise SigularMatrixError("LU Factorization cannot apply on a sigular matrix.")
+        if prof:
+            t = prof.lap('lu.pivot', t)
 
-        # exchange row i and row j
-        U[i], U[max_idx] = U[max_idx], U[i]
-        L[i], L[max_idx] = L[max_idx], L[i]
+        # exchange row i and row j, the multipliers saved in them move together
+        LU.swap_rows(i, max_idx)
         P[i], P[max_idx] = P[max_idx], P[i]
         # do elimination to i + 1 ~ size row
         for j in range(i + 1, size):
-            # calculate multiplier
-            m = U[j][i] / U[i][i]
-            # save multiplier in L
-            L[j][i] = m
-            # set directly to 0
-            U[j][i] = eType(0)
+            # calculate multiplier and save it in place of the eliminated element
+            m = lu[o + j * size + i] / pivot
+            lu[o + j * size + i] = m
             # update other row
-            for k in  range(i + 1, size):
-                U[j][k] = U[j][k] - m * U[i][k]
-    # save 1 for diag in L
-    for i in range(size):
-        L[i][i] = eType(1)
-    # construct P
-    P = [[eType(1) if j == P[i] else eType(0) for j in range(size)] for i in range(size)]
+            LU.add_row(j, i, -m, i + 1)
+        if prof:
+            # one division and size - i - 1 multiply-adds per eliminated row
+            t = prof.lap('lu.elimination', t, (size - i - 1) * (2 * (size - i - 1) + 1))
+    if prof:
+        prof.metric('lu.pivot_growth', _instrument.PivotGrowth(a_max, LU))
+        t = prof.start()
 
     # Round matrix according to digits
-    if eType == float:
+    if eType == float and digits is not None:
+        RoundMatrix(LU, digits)
+        if prof:
+            prof.lap('round', t)
+    return LU, P
+
+
+def _TriangularLU(A, size, lower, eType, digits):
+    # an upper triangular A is U itself, a lower one is (A * D^-1) * D with D = diag(A)
+    U = Matrix.from_rows(A, eType)
+    zero = eType(0)
+    for i in range(size):
+        if U[i, i] == zero or abs(U[i, i]) < eType(1e-12):
+            raise SigularMatrixError("LU Factorization cannot apply on a sigular matrix.")
+    L = Matrix.identity(size, eType)
+    if lower:
+        L, U = U, Matrix.zeros(size, size, eType)
+        for i in range(size):
+            U[i, i] = L[i, i]
+        for j in range(size):
+            u_jj = U[j, j]
+            for i in range(j, size):
+                L[i, j] = L[i, j] / u_jj
+    P = Matrix.identity(size, eType)
+    if eType == float and digits is not None:
         return RoundMatrix(P, digits), RoundMatrix(L, digits), RoundMatrix(U, digits)
-    else:
-        return P, L, U
+    return P, L, U
 
 
-def ClassicalSchmidtDecomposition(A, eType=float, digits=12):
-    """Classical Schmidt Decomposition
+def BandedLUFactorization(A, lower, upper, eType=float, digits=12):
+    """Banded LU Factorization
 
-    Use Gram-Schmidt orthogonal to generate the decomposition of given square matrix A.
+    Apply LU Factorization with partial pivoting on a square matrix A whose nonzero
+    elements lie in its lower and upper bands. Pivots are only searched in the
+    lower band and row exchanges widen the upper band of U to lower + upper, so the
+    elimination takes O(n * lower * (lower + upper)) instead of O(n^3).
 
     Args:
         A:      A square matrix instance.
+        lower:  The lower bandwidth of A, A[i][j] = 0 for i - j > lower.
+        upper:  The upper bandwidth of A, A[i][j] = 0 for j - i > upper.
         eType:  Optional, the dtype of elements in matrix.
         digits: Optional, the digits of precision in float calculation.
 
     Returns:
-        Two matrix: Q, R which is the Classical Schmidt Decomposition of A.
+        Three Matrix: P, L, U which is the LU factorization of A.
     """
 
     # get size of A
@@ -90,58 +243,54 @@ def ClassicalSchmidtDecomposition(A, eType=float, digits=12):
     if c_size != size:
         raise NotSquareMatrixError('Except a square matrix with shape (%d,%d) not (%d, %d)' % (size, size, size, c_size))
 
-    # Define Q,R as zero matrix
-    Q = [[eType(0) for j in range(size)] for i in range(size)]
-    R = [[eType(0) for j in range(size)] for i in range(size)]
-    for i in range(size):
-        # copy x to u
-        u = [eType(A[j][i]) for j in range(size)]
+    LU, P = _BandedPackedLU(A, size, lower, upper, eType)
+    return _UnpackLU(LU, P, size, eType, digits)
 
-        # ui = ui - sum(qk * qk* * xi)    (0 <= k < i)
-        for k in range(0, i):
-            # rik = qk* * xi
-            r_ik = eType(0)
-            for j in range(size):
-                r_ik += Q[j][k] * eType(A[j][i])
-            R[k][i] = r_ik
-            # ui = ui - rik * qk
-            for j in range(size):
-                u[j] -= r_ik * Q[j][k]
-
-        # vii <- ||ui||
-        u_norm_2 = eType(0)
-        for j in range(size):
-            u_norm_2 += u[j] * u[j]
-        v_ii = u_norm_2 ** 0.5
-        R[i][i] = v_ii
 
-        # Have dependent columns
-        if v_ii == eType(0) or abs(v_ii) < eType(1e-12):
-            raise SigularMatrixError("Schmidt Decomposition cannot apply on a sigular matrix.")
-
-        # qi <- ui / ||ui||
-        for j in range(size):
-            Q[j][i] = u[j] / v_ii
+def _BandedPackedLU(A, size, lower, upper, eType):
+    # PackedLUFactorization restricted to the band, returns LU, P
+    LU = Matrix.from_rows(A, eType)
+    lu = LU.data
+    zero = eType(0)
+    P = [i for i in range(size)]
+    for i in range(size):
+        # select max_abs element in the lower band as pivot
+        last = min(i + lower + 1, size)
+        max_idx = i
+        for j in range(i + 1, last):
+            if lu[max_idx * size + i] == zero:
+                max_idx = j
+            elif abs(lu[max_idx * size + i]) < abs(lu[j * size + i]):
+                max_idx = j
+        pivot = lu[max_idx * size + i]
+        if pivot == zero or abs(pivot) < eType(1e-12):
+            raise SigularMatrixError("LU Factorization cannot apply on a sigular matrix.")
 
-    # Round matrix according to digits
-    if eType == float:
-        return RoundMatrix(Q, digits), RoundMatrix(R, digits)
-    else:
-        return Q, R
+        LU.swap_rows(i, max_idx)
+        P[i], P[max_idx] = P[max_idx], P[i]
+        # rows i ~ last end before column i + lower + upper + 1 after the exchanges
+        band = LU[:, :min(i + lower + upper + 1, size)]
+        for j in range(i + 1, last):
+            m = lu[j * size + i] / pivot
+            lu[j * size + i] = m
+            band.add_row(j, i, -m, i + 1)
+    return LU, P
 
 
-def ModifiedSchmidtDecomposition(A, eType=float, digits=12):
-    """Modified Schmidt Decomposition
+def CholeskyFactorization(A, eType=float, digits=12):
+    """Cholesky Factorization
 
-    Use Gram-Schmidt orthogonal to generate the decomposition of given square matrix A.
+    Apply Cholesky Factorization A = L * L* on a symmetric positive definite matrix
+    A. Only the lower triangle of A is read, it takes half the work of LU and needs
+    no pivoting.
 
     Args:
-        A:      A square matrix instance.
+        A:      A symmetric positive definite matrix instance.
         eType:  Optional, the dtype of elements in matrix.
-        digits: Optional, the digits of precision in float calculation.
+        digits: Optional, the digits of precision in float calculation, None to skip rounding.
 
     Returns:
-        Two matrix: Q, R which is the Modified Schmidt Decomposition of A.
+        Matrix L, lower triangular with a positive diagonal.
     """
 
     # get size of A
@@ -151,53 +300,44 @@ def ModifiedSchmidtDecomposition(A, eType=float, digits=12):
     if c_size != size:
         raise NotSquareMatrixError('Except a square matrix with shape (%d,%d) not (%d, %d)' % (size, size, size, c_size))
 
-    # Deep copy an eType transpose A instance
-    U = [[eType(A[j][i]) for j in range(size)] for i in range(size)]
-    # Define Q,R as zero matrix
-    Q = [[eType(0) for j in range(size)] for i in range(size)]
-    R = [[eType(0) for j in range(size)] for i in range(size)]
+    zero = eType(0)
+    rows = []
     for i in range(size):
-        # vii <- ||ui||
-        u_norm_2 = eType(0)
-        for j in range(size):
-            u_norm_2 += U[i][j] * U[i][j]
-        v_ii = u_norm_2 ** 0.5
-        R[i][i] = v_ii
+        a_i = A[i]
+        l_i = []
+        for j in range(i):
+            # lij = (aij - sum(lik * ljk)) / ljj    (k < j)
+            l_j = rows[j]
+            l_i.append((eType(a_i[j]) - sum(map(mul, l_i, l_j[:j]), zero)) / l_j[j])
+        # lii = sqrt(aii - sum(lik^2))    (k < i)
+        d = eType(a_i[i]) - sum(map(mul, l_i, l_i), zero)
+        if d <= zero or abs(d) < eType(1e-12):
+            raise SigularMatrixError("Cholesky Factorization cannot apply on a matrix which is not positive definite.")
+        l_i.append(d ** 0.5)
+        rows.append(l_i)
 
-        # qi <- ui / ||ui||
-        for j in range(size):
-            Q[j][i] = U[i][j] / v_ii
-
-        # uk = uk - qi * qi* * xk)    (0 <= i < k < size)
-        for k in range(i + 1, size):
-            # rki = qi* * xk
-            r_ki = eType(0)
-            for j in range(size):
-                r_ki += Q[j][i] * eType(A[j][k])
-            R[i][k] = r_ki
-            # uk = uk - rik * qi
-            for j in range(size):
-                U[k][j] -= r_ki * Q[j][i]
-
-    # Round matrix according to digits
-    if eType == float:
-        return RoundMatrix(Q, digits), RoundMatrix(R, digits)
-    else:
-        return Q, R
+    L = Matrix.zeros(size, size, eType)
+    for i in range(size):
+        L[i][:i + 1] = rows[i]
+    if eType == float and digits is not None:
+        RoundMatrix(L, digits)
+    return L
 
 
-def HouseholderReduction(A, eType=float, digits=12):
-    """Householder Reduction
+def LDLFactorization(A, eType=float, digits=12):
+    """LDL Factorization
 
-    Use reflex matrix to reduct given square matrix A to QR.
+    Apply A = L * D * L* on a symmetric matrix A, L is unit lower triangular and D
+    is diagonal. Same cost as CholeskyFactorization without square roots, so exact
+    types stay exact. A positive definite A has a positive D.
 
     Args:
-        A:      A square matrix instance.
+        A:      A symmetric matrix instance.
         eType:  Optional, the dtype of elements in matrix.
-        digits: Optional, the digits of precision in float calculation.
+        digits: Optional, the digits of precision in float calculation, None to skip rounding.
 
     Returns:
-        Two matrix: Q, R which is the decomposition of A.
+        Two Matrix: L, D.
     """
 
     # get size of A
@@ -207,91 +347,61 @@ def HouseholderReduction(A, eType=float, digits=12):
     if c_size != size:
         raise NotSquareMatrixError('Except a square matrix with shape (%d,%d) not (%d, %d)' % (size, size, size, c_size))
 
-    # Define Q as identity matrix
-    Q = [[eType(1) if i == j else eType(0) for j in range(size)] for i in range(size)]
-    # Define R as a deep copy of A
-    R = [[eType(A[i][j]) for j in range(size)] for i in range(size)]
-    for i in range(size - 1):
-        # length of u1
-        length = size - i
-        # define u1
-        u = [R[j][i] for j in range(i, size)]
-        # u1 <- x1 - ||ui||e1
-        x_norm_2 = eType(0)
-        for j in range(length):
-            x_norm_2 += u[j] * u[j]
-        x_norm = x_norm_2 ** 0.5
-        u[0] -= x_norm
-
-        # Pi = I - 2/ui(ui*) * (ui*)ui
-        # define P as identity matrix, P = I.
-        P = [[eType(0) if k != j else eType(1) for j in range(length)] for k in range(length)]
-        # c = 2/ui(ui*)
-        u_norm_2 = eType(0)
-        for j in range(length):
-            u_norm_2 += u[j] * u[j]
-        c = eType(2) / u_norm_2
-        # Pi = Pi - c * (ui*)ui
-        for j in range(length):
-            for k in range(length):
-                P[j][k] -= c * u[j] * u[k]
-        # TODO Parallel {R = Ri' * Ai} & {Q = Ri' * Q_i}
-        # R = Ri' * R
-        #  Update the right bottom of R
-        #  R = | R1  R2 |   Ri' = | 1  0  |  Ai = | R4 |
-        #      | 0   R4 |         | 0  Ri |
-        #
-        #  Ri' * R = | R1  R2   |
-        #            | 0   RiR4 |
-        #
-        A_i = [[R[k][j] for j in range(i, size)] for k in range(i, size)]
-        # Ri * R_i
-        for j in range(length):
-            for k in range(length):
-                r, c = j + i, k + i
-                R[r][c] = eType(0)
-                for l in range(length):
-                    R[r][c] += P[j][l] * A_i[l][k]
-
-        # Q = Ri' * Q_i
-        #  Update the left bottom & the right bottom of Q
-        #  Q = | Q1  Q2 |   Ri' = | 1  0  |  Qi = | Q3  Q4 |
-        #      | Q3  Q4 |         | 0  Ri |
-        #
-        #  Ri' * Q = | Q1   Q2   |
-        #            | RiQ3 RiQ4 |
-        #
-        Q_i = [[Q[k][j] for j in range(size)] for k in range(i, size)]
-        for j in range(length):
-            for k in range(size):
-                Q[j + i][k] = eType(0)
-                for l in range(length):
-                    Q[j + i][k] += P[j][l] * Q_i[l][k]
-
-    # Q = Q.transpose (Q is PnPn-1...P2P1)
-    for j in range(size):
-        for k in range(j + 1, size):
-            Q[k][j], Q[j][k] = Q[j][k], Q[k][j]
+    zero = eType(0)
+    rows = []
+    pivots = []
+    for i in range(size):
+        a_i = A[i]
+        l_i = []
+        # wi = li * D, row i of L scaled by the pivots
+        w_i = []
+        for j in range(i):
+            # wij = aij - sum(wik * ljk), lij = wij / dj    (k < j)
+            w = eType(a_i[j]) - sum(map(mul, w_i, rows[j]), zero)
+            w_i.append(w)
+            l_i.append(w / pivots[j])
+        # di = aii - sum(wik * lik)    (k < i)
+        d = eType(a_i[i]) - sum(map(mul, w_i, l_i), zero)
+        if d == zero or abs(d) < eType(1e-12):
+            raise SigularMatrixError("LDL Factorization cannot apply on a matrix with a zero pivot.")
+        rows.append(l_i)
+        pivots.append(d)
 
-    # Round matrix according to digits
-    if eType == float:
-        return RoundMatrix(Q, digits), RoundMatrix(R, digits)
-    else:
-        return Q, R
+    L = Matrix.identity(size, eType)
+    D = Matrix.zeros(size, size, eType)
+    for i in range(size):
+        L[i][:i] = rows[i]
+        D[i, i] = pivots[i]
+    if eType == float and digits is not None:
+        RoundMatrix(L, digits)
+        RoundMatrix(D, digits)
+    return L, D
 
 
-def GivensReduction(A, eType=float, digits=12):
-    """Givens Reduction
+def _Writable(A, eType, typecode='d'):
+    # whether A is a Matrix that can be factored in place with element type (and float storage)
+    if not isinstance(A, Matrix) or not A.is_contiguous():
+        return False
+    if isinstance(A.data, list):
+        return eType != float
+    if eType != float or (isinstance(A.data, memoryview) and A.data.readonly):
+        return False
+    return (A.data.typecode if hasattr(A.data, 'typecode') else A.data.format) == typecode
 
-    Use rotation matrix to reduct given square matrix A to QR.
+
+def BareissFactorization(A):
+    """Bareiss Factorization
+
+    Use fraction-free Gaussian Elimination (Bareiss' algorithm) to apply LU
+    Factorization on given square integer matrix A. Every intermediate is an
+    integer, each division by the previous pivot is exact.
 
     Args:
-        A:      A square matrix instance.
-        eType:  Optional, the dtype of elements in matrix.
-        digits: Optional, the digits of precision in float calculation.
+        A: A square matrix instance with integer elements.
 
     Returns:
-        Two matrix: Q, R which is the decomposition of A.
+        Four integer Matrix: P, L, D, U which satisfy PA = L * D^-1 * U, where D is
+        the diagonal matrix diag(p0, p0p1, ..., pn-2pn-1) of successive pivots.
     """
 
     # get size of A
@@ -301,49 +411,635 @@ def GivensReduction(A, eType=float, digits=12):
     if c_size != size:
         raise NotSquareMatrixError('Except a square matrix with shape (%d,%d) not (%d, %d)' % (size, size, size, c_size))
 
-    # Define Q as identity matrix
-    Q = [[eType(1) if i == j else eType(0) for j in range(size)] for i in range(size)]
-    # Define R as a deep copy of A
-    R = [[eType(A[i][j]) for j in range(size)] for i in range(size)]
-    for i in range(size - 1):
+    # deepcopy A as U with integer elements, U[i][j] is u[i * size + j]
+    U = Matrix.from_rows(A, _Integer)
+    u = U.data
+    L = Matrix.zeros(size, size, int)
+    P = [i for i in range(size)]
+    old_pivot = 1
+    for i in range(size):
+        # select max_abs element as pivot, same as LUFactorization
+        max_idx = i
         for j in range(i + 1, size):
-            # annihilate A_ji (i < j)
-            # define P_ij as identity matrix
-            P_ij = [[eType(1) if i == j else eType(0) for j in range(size)] for i in range(size)]
-            cs_root_square = (R[i][i] * R[i][i] + R[j][i] * R[j][i]) ** 0.5
-            c = R[i][i] / cs_root_square
-            s = R[j][i] / cs_root_square
-            # update P (i,i) = c (i,j) = s (j,i) = -s (j,j) = c
-            P_ij[i][i] = c
-            P_ij[i][j] = s
-            P_ij[j][i] = -s
-            P_ij[j][j] = c
-
-            # apply P_ij on A(R) to annihilate A_ji
-            # R_temp = P_ij * R
-            R_temp = [[eType(0) for j in range(size)] for i in range(size)]
-            for k in range(size):
-                for l in range(size):
-                    for m in range(size):
-                        R_temp[k][l] += P_ij[k][m] * R[m][l]
-            R = R_temp
-            # apply P_ij on Q to generate next Q
-            # Q_temp = P_ij * Q
-            Q_temp = [[eType(0) for j in range(size)] for i in range(size)]
-            for k in range(size):
-                for l in range(size):
-                    for m in range(size):
-                        Q_temp[k][l] += P_ij[k][m] * Q[m][l]
-            Q = Q_temp
-
-    # Q = Q.transpose (Q is PnPn-1...P2P1)
-    for j in range(size):
-        for k in range(j + 1, size):
-            Q[k][j], Q[j][k] = Q[j][k], Q[k][j]
+            if abs(u[max_idx * size + i]) < abs(u[j * size + i]):
+                max_idx = j
+        if u[max_idx * size + i] == 0:
+            raise SigularMatrixError("LU Factorization cannot apply on a sigular matrix.")
 
-    # Round matrix according to digits
-    if eType == float:
-        return RoundMatrix(Q, digits), RoundMatrix(R, digits)
+        # exchange row i and row j
+        U.swap_rows(i, max_idx)
+        L.swap_rows(i, max_idx)
+        P[i], P[max_idx] = P[max_idx], P[i]
+        ii = i * size
+        pivot = u[ii + i]
+        L[i, i] = pivot
+        for j in range(i + 1, size):
+            # save the unscaled multiplier in L
+            jj = j * size
+            m = u[jj + i]
+            L[j, i] = m
+            u[jj + i] = 0
+            # U_jk = (p * U_jk - m * U_ik) / old_p, the division is exact
+            for k in range(i + 1, size):
+                u[jj + k] = (pivot * u[jj + k] - m * u[ii + k]) // old_pivot
+        old_pivot = pivot
+
+    D = Matrix.zeros(size, size, int)
+    for i in range(size):
+        D[i, i] = (u[(i - 1) * (size + 1)] if i > 0 else 1) * u[i * (size + 1)]
+    # construct P
+    Pm = Matrix.zeros(size, size, int)
+    for i in range(size):
+        Pm[i, P[i]] = 1
+    return Pm, L, D, U
+
+
+def _Integer(x):
+    # accept integral values only, Bareiss relies on exact integer division
+    if isinstance(x, int):
+        return int(x)
+    if isinstance(x, float) and x.is_integer():
+        return int(x)
+    raise TypeError('Bareiss Factorization expects integer elements, not %r' % (x,))
+
+
+def _TallShape(A):
+    # QR factorizations accept square and tall (rows > cols) matrices
+    rows = len(A)
+    cols = len(A[0])
+    if rows < cols:
+        raise NotSquareMatrixError('Except a square or tall matrix with rows >= cols not shape (%d, %d)' % (rows, cols))
+    return rows, cols
+
+
+def _ThinIdentity(rows, cols, eType):
+    # the first cols columns of the rows x rows identity matrix
+    I = Matrix.zeros(rows, cols, eType)
+    for i in range(cols):
+        I[i, i] = eType(1)
+    return I
+
+
+def ClassicalSchmidtDecomposition(A, eType=float, digits=12, backend=None, reorthogonalize=False, block=None):
+    """Classical Schmidt Decomposition
+
+    Use Gram-Schmidt orthogonal to generate the decomposition of given matrix A.
+    A m x n (m > n) matrix gets the thin decomposition, Q is m x n and R is n x n.
+
+    Args:
+        A:       A square (or tall) matrix instance.
+        eType:   Optional, the dtype of elements in matrix.
+        digits:  Optional, the digits of precision in float calculation.
+        backend: Optional, 'python' or 'numpy', see SetBackend.
+        reorthogonalize: Optional, project every column twice (CGS2), Q is then
+                 orthogonal to working precision like HouseholderReduction.
+        block:   Optional, project columns against the previous Q in blocks of
+                 this size (block classical Gram-Schmidt).
+
+    Returns:
+        Two Matrix: Q, R which is the Classical Schmidt Decomposition of A.
+    """
+
+    # get shape of A, thin QR needs rows >= cols
+    rows, cols = _TallShape(A)
+
+    # run as vector operations on ndarray if numpy backend is selected
+    if _backend.UseNumpy(backend, eType):
+        return _backend.NumpyClassicalSchmidtDecomposition(A, digits, reorthogonalize, block)
+
+    Q, R = _GramSchmidt(A, rows, cols, eType, False, reorthogonalize, block)
+    return _RoundQR(Q, R, eType, digits)
+
+
+def ModifiedSchmidtDecomposition(A, eType=float, digits=12, backend=None):
+    """Modified Schmidt Decomposition
+
+    Use Gram-Schmidt orthogonal to generate the decomposition of given matrix A.
+    A m x n (m > n) matrix gets the thin decomposition, Q is m x n and R is n x n.
+
+    Args:
+        A:       A square (or tall) matrix instance.
+        eType:   Optional, the dtype of elements in matrix.
+        digits:  Optional, the digits of precision in float calculation.
+        backend: Optional, 'python' or 'numpy', see SetBackend.
+
+    Returns:
+        Two Matrix: Q, R which is the Modified Schmidt Decomposition of A.
+    """
+
+    # get shape of A, thin QR needs rows >= cols
+    rows, cols = _TallShape(A)
+
+    # run as vector operations on ndarray if numpy backend is selected
+    if _backend.UseNumpy(backend, eType):
+        return _backend.NumpyModifiedSchmidtDecomposition(A, digits)
+
+    Q, R = _GramSchmidt(A, rows, cols, eType, True, False, None)
+    return _RoundQR(Q, R, eType, digits)
+
+
+def _GramSchmidt(A, rows, cols, eType, modified, reorthogonalize, block):
+    prof = _instrument.Active()
+    if prof:
+        t = prof.start()
+        prof.allocate(rows * cols + cols * cols, 2)
+    # Gram-Schmidt on column-contiguous storage, U[i] is the i-th column of A
+    # converted to eType once, it is orthogonalized in place and becomes qi
+    U = [[eType(A[j][i]) for j in range(rows)] for i in range(cols)]
+    R = Matrix.zeros(cols, cols, eType)
+    zero = eType(0)
+    passes = 2 if reorthogonalize else 1
+    if prof:
+        t = prof.lap('schmidt.copy', t)
+
+    if modified:
+        for i in range(cols):
+            u = _Normalize(U, i, R, zero)
+            if prof:
+                t = prof.lap('schmidt.normalization', t, 3 * rows)
+            # uk = uk - qi * qi* * uk    (0 <= i < k < cols)
+            for k in range(i + 1, cols):
+                r_ik = sum(map(mul, u, U[k]), zero)
+                R[i, k] = r_ik
+                U[k] = [x - r_ik * y for x, y in zip(U[k], u)]
+            if prof:
+                t = prof.lap('schmidt.projection', t, 4 * rows * (cols - i - 1))
     else:
+        block = block if block and block > 1 else 1
+        for b in range(0, cols, block):
+            b_end = min(b + block, cols)
+            # project the whole block against q0 ~ qb-1 (and once more for CGS2)
+            for _ in range(passes):
+                _Project(U, R, range(0, b), range(b, b_end), zero)
+            if prof:
+                t = prof.lap('schmidt.projection', t, 4 * rows * b * (b_end - b) * passes)
+            # orthogonalize the columns inside the block
+            for i in range(b, b_end):
+                for _ in range(passes):
+                    _Project(U, R, range(b, i), range(i, i + 1), zero)
+                if prof:
+                    t = prof.lap('schmidt.projection', t, 4 * rows * (i - b) * passes)
+                _Normalize(U, i, R, zero)
+                if prof:
+                    t = prof.lap('schmidt.normalization', t, 3 * rows)
+
+    # Q[j][i] = qi[j]
+    Q = Matrix.zeros(rows, cols, eType)
+    Qt = Q.T
+    for i in range(cols):
+        Qt[i] = U[i]
+    if prof:
+        prof.allocate(rows * cols)
+        prof.lap('schmidt.q', t)
+        prof.metric('schmidt.orthogonality_loss', _instrument.OrthogonalityLoss(Q))
+    return Q, R
+
+
+def _RoundQR(Q, R, eType, digits):
+    # Round matrix according to digits, a compact Q (a list of records) is kept
+    if eType != float or digits is None:
         return Q, R
+    prof = _instrument.Active()
+    if prof:
+        t = prof.start()
+    if isinstance(Q, Matrix):
+        Q = RoundMatrix(Q, digits)
+    R = RoundMatrix(R, digits)
+    if prof:
+        prof.lap('round', t)
+    return Q, R
+
+
+def _Project(U, R, ks, cs, zero):
+    # ui = ui - sum(qk * qk* * ui) for i in cs, every rki is taken from the same ui
+    for i in cs:
+        u = U[i]
+        r = [sum(map(mul, U[k], u), zero) for k in ks]
+        for k, r_ki in zip(ks, r):
+            R[k, i] = R[k, i] + r_ki
+            u = [x - r_ki * y for x, y in zip(u, U[k])]
+        U[i] = u
+
+
+def _Normalize(U, i, R, zero):
+    # vii <- ||ui||, qi <- ui / ||ui||
+    v_ii = sum(map(mul, U[i], U[i]), zero) ** 0.5
+    R[i, i] = v_ii
+    # Have dependent columns
+    if v_ii == zero or abs(v_ii) < type(zero)(1e-12):
+        raise SigularMatrixError("Schmidt Decomposition cannot apply on a sigular matrix.")
+    U[i] = [x / v_ii for x in U[i]]
+    return U[i]
+
+
+def HouseholderReduction(A, eType=float, digits=12, compact=False, block=None, backend=None, workers=None):
+    """Householder Reduction
+
+    Use reflex matrix to reduct given matrix A to QR. Only the reflector
+    vectors u and their scale tau are kept, Pi = I - tau * u(u*) is never formed.
+    A m x n (m > n) matrix gets the thin decomposition, Q is m x n and R is n x n.
+
+    Args:
+        A:       A square (or tall) matrix instance.
+        eType:   Optional, the dtype of elements in matrix.
+        digits:  Optional, the digits of precision in float calculation, None to skip rounding.
+        compact: Optional, return the reflectors as (i, u, tau) records instead of Q.
+        block:   Optional, apply reflectors in blocks of this size (compact WY form).
+        backend: Optional, 'python' or 'numpy', see SetBackend.
+        workers: Optional, the number of threads applying each block of reflectors
+                 to R and Q by column tiles with the numpy backend, default to one.
+                 The python backend raises ValueError for more than one.
+
+    Returns:
+        Two Matrix: Q, R which is the decomposition of A. If compact is set, Q is
+        replaced by the list of reflectors, see ApplyHouseholderReflectors.
+    """
+
+    # get shape of A, thin QR needs rows >= cols
+    rows, cols = _TallShape(A)
+
+    # run as vector operations on ndarray if numpy backend is selected
+    if _backend.UseNumpy(backend, eType):
+        return _backend.NumpyHouseholderReduction(A, digits, compact, workers)
+    _SerialOnly(workers)
+
+    prof = _instrument.Active()
+    if prof:
+        t = prof.start()
+        prof.allocate(rows * cols)
+    # Define R as a deep copy of A, R[j][i] is r[j * cols + i]
+    R = Matrix.from_rows(A, eType)
+    r = R.data
+    zero = eType(0)
+    # the last reflector of a square matrix would only flip a sign
+    steps = cols if rows > cols else cols - 1
+    block = block if block and block > 1 else 1
+    reflectors = []
+    if prof:
+        t = prof.lap('householder.copy', t)
+    for b in range(0, steps, block):
+        b_end = min(b + block, steps)
+        for i in range(b, b_end):
+            # Pi = I - tau * u(u*), u1 <- x1 - ||ui||e1 scaled to u[0] = 1
+            u, tau = _HouseholderVector([r[j * cols + i] for j in range(i, rows)], eType)
+            reflectors.append((i, u, tau))
+            if prof:
+                t = prof.lap('householder.reflector', t, 3 * (rows - i))
+            # R = Pi' * R, only the panel columns are updated now
+            #  R = | R1  R2 |   Pi' = | 1  0  |
+            #      | 0   R4 |         | 0  Pi |
+            R.reflect_rows(i, u, tau, i, b_end if block > 1 else cols)
+            # column i is ||x||e1 now, clear the roundoff left below the diagonal
+            for j in range(i + 1, rows):
+                r[j * cols + i] = zero
+            if prof:
+                t = prof.lap('householder.update', t, 4 * (rows - i) * ((b_end if block > 1 else cols) - i))
+        # R = (I - V T V*)* * R, apply the whole block on the trailing columns
+        if block > 1 and b_end < cols:
+            V, T = _BlockReflector(reflectors[b:b_end], rows, eType)
+            _ApplyBlockReflector(R, b, V, T, b_end, True, eType)
+            if prof:
+                t = prof.lap('householder.update', t, 4 * (rows - b) * (b_end - b) * (cols - b_end))
+
+    if compact:
+        Q = reflectors
+    else:
+        # Q = P1P2...Pn-1 * I[:, :cols], accumulate backward so each step only touches Q[i:, i:]
+        Q = _ThinIdentity(rows, cols, eType)
+        for b in reversed(range(0, steps, block)):
+            if block > 1:
+                V, T = _BlockReflector(reflectors[b:b + block], rows, eType)
+                _ApplyBlockReflector(Q, b, V, T, b, False, eType)
+            else:
+                i, u, tau = reflectors[b]
+                Q.reflect_rows(i, u, tau, i, cols)
+        if prof:
+            prof.allocate(rows * cols)
+            t = prof.lap('householder.accumulate', t, sum(4 * (rows - i) * (cols - i) for i, u, tau in reflectors))
+            prof.metric('householder.orthogonality_loss', _instrument.OrthogonalityLoss(Q))
+    # R is the upper cols x cols part
+    if rows > cols:
+        R = R[:cols].copy()
+    return _RoundQR(Q, R, eType, digits)
+
+
+def PivotedHouseholderReduction(A, eType=float, digits=12, tol=None, maxrank=None, compact=False, backend=None):
+    """Pivoted Householder Reduction
+
+    Householder QR with column pivoting, A[:, P] = Q * R, which reveals the
+    numerical rank of A instead of failing on it. Step i swaps the column with
+    the largest remaining norm to i. The squared column norms are downdated by
+    R[i][j]^2 after each step and only recomputed when cancellation has eaten
+    half of their float digits (inexact square roots of exact types cancel too). The reduction stops once every remaining column
+    norm is below tol times the largest column norm of A, so a rank k matrix
+    costs O(mnk) instead of O(mn^2).
+
+    Args:
+        A:       A matrix instance of any shape.
+        eType:   Optional, the dtype of elements in matrix.
+        digits:  Optional, the digits of precision in float calculation, None to skip rounding.
+        tol:     Optional, the relative tolerance of the remaining column norms,
+                 default to max(m, n) * 2^-52 for float and 1e-12 otherwise (the
+                 square roots of the norms are not exact).
+        maxrank: Optional, stop after this many columns.
+        compact: Optional, return the reflectors as (i, u, tau) records instead of Q.
+        backend: Optional, 'python' or 'numpy', see SetBackend.
+
+    Returns:
+        Q, R, P, rank: Q is m x rank, R is rank x n upper trapezoidal, column j of
+        A[:, P] is column P[j] of A. If compact is set, Q is replaced by the list of
+        reflectors, see ApplyHouseholderReflectors.
+    """
+
+    rows = len(A)
+    cols = len(A[0]) if rows else 0
+    steps = min(rows, cols) if maxrank is None else min(rows, cols, maxrank)
+
+    # run as vector operations on ndarray if numpy backend is selected
+    if _backend.UseNumpy(backend, eType):
+        return _backend.NumpyPivotedHouseholderReduction(A, digits, tol, steps, compact)
+
+    R = Matrix.from_rows(A, eType)
+    Rt = R.T
+    zero = eType(0)
+    P = [j for j in range(cols)]
+    # squared norms of the remaining columns, and their values when last computed
+    norms = [sum(map(mul, Rt[j], Rt[j]), zero) for j in range(cols)]
+    computed = list(norms)
+    if tol is None:
+        tol = max(rows, cols) * 2. ** -52 if eType == float else 1e-12
+    # compared in float, a tiny tol does not convert to every exact type
+    threshold = tol * tol * float(max(norms, default=zero))
+    reflectors = []
+    rank = steps
+    for i in range(steps):
+        # select the column with the largest remaining norm, stop if it is negligible
+        p = max(range(i, cols), key=norms.__getitem__)
+        if norms[p] == zero or float(norms[p]) <= threshold:
+            rank = i
+            break
+        Rt.swap_rows(i, p)
+        P[i], P[p] = P[p], P[i]
+        norms[i], norms[p] = norms[p], norms[i]
+        computed[i], computed[p] = computed[p], computed[i]
+
+        # Pi = I - tau * u(u*) on R[i:, i:], the last row of a square matrix is kept
+        if i < rows - 1:
+            u, tau = _HouseholderVector(Rt[i][i:].tolist(), eType)
+            reflectors.append((i, u, tau))
+            R.reflect_rows(i, u, tau, i, cols)
+        # ||R[i + 1:, j]||^2 = ||R[i:, j]||^2 - R[i][j]^2
+        for j in range(i + 1, cols):
+            norms[j] = norms[j] - R[i, j] * R[i, j]
+            if float(norms[j]) <= 2. ** -26 * float(computed[j]):
+                column = Rt[j][i + 1:].tolist()
+                norms[j] = computed[j] = sum(map(mul, column, column), zero)
+
+    if compact:
+        Q = reflectors
+    else:
+        # Q = P1P2...Pk * I[:, :rank], accumulate backward
+        Q = _ThinIdentity(rows, rank, eType)
+        for i, u, tau in reversed(reflectors):
+            Q.reflect_rows(i, u, tau, i, rank)
+    R = R[:rank].copy()
+    for i in range(1, rank):
+        R[i][:i] = [zero] * i
+    Q, R = _RoundQR(Q, R, eType, digits)
+    return Q, R, P, rank
+
+
+def ApplyHouseholderReflectors(reflectors, x, transpose=False):
+    """Apply Householder Reflectors
+
+    Multiply a vector (or a matrix) by the Q stored as reflectors from HouseholderReduction.
+
+    Args:
+        reflectors: A list of (i, u, tau) records returned by HouseholderReduction.
+        x:          A vector or a matrix, it is updated in place.
+        transpose:  Optional, compute Q* * x instead of Q * x.
+
+    Returns:
+        The vector (or matrix) x.
+    """
+
+    # x is a matrix, reflect its rows
+    if isinstance(x, Matrix):
+        for i, u, tau in (reflectors if transpose else reversed(reflectors)):
+            x.reflect_rows(i, u, tau)
+        return x
+    if len(x) != 0 and hasattr(x[0], '__len__'):
+        for i, u, tau in (reflectors if transpose else reversed(reflectors)):
+            _ReflectRows(x, i, u, tau, 0, len(x[0]))
+        return x
+    # Q* = Pn-1...P2P1, apply P1 first. Q = P1P2...Pn-1, apply Pn-1 first
+    for i, u, tau in (reflectors if transpose else reversed(reflectors)):
+        w = x[i]
+        for l in range(1, len(u)):
+            w += u[l] * x[i + l]
+        w *= tau
+        x[i] -= w
+        for l in range(1, len(u)):
+            x[i + l] -= w * u[l]
+    return x
+
+
+def _HouseholderVector(x, eType):
+    # u = x - ||x||e1 normalized to u[0] = 1, tau = 2 / u(u*)
+    sigma = eType(0)
+    for l in range(1, len(x)):
+        sigma += x[l] * x[l]
+    if sigma == eType(0):
+        # x is parallel to e1, reflect it only when it points to -e1
+        return [eType(1)] + x[1:], (eType(2) if x[0] < eType(0) else eType(0))
+    x_norm = (x[0] * x[0] + sigma) ** 0.5
+    # avoid cancellation in x1 - ||x|| when x1 > 0
+    if x[0] > eType(0):
+        u0 = -sigma / (x[0] + x_norm)
+    else:
+        u0 = x[0] - x_norm
+    tau = eType(2) * u0 * u0 / (sigma + u0 * u0)
+    return [eType(1)] + [e / u0 for e in x[1:]], tau
+
+
+def _ReflectRows(M, i, u, tau, start, end):
+    # M[i:, start:end] = (I - tau * u(u*)) * M[i:, start:end]
+    if tau == type(tau)(0):
+        return
+    rows = [M[i + l] for l in range(len(u))]
+    for k in range(start, end):
+        w = rows[0][k]
+        for l in range(1, len(u)):
+            w += u[l] * rows[l][k]
+        w *= tau
+        rows[0][k] -= w
+        for l in range(1, len(u)):
+            rows[l][k] -= w * u[l]
+
+
+def _BlockReflector(reflectors, size, eType):
+    # P_b P_b+1 ... P_b+k-1 = I - V T V*, V is unit lower trapezoidal, T upper triangular
+    b = reflectors[0][0]
+    k = len(reflectors)
+    V = [[eType(0) for c in range(k)] for r in range(size - b)]
+    T = [[eType(0) for c in range(k)] for r in range(k)]
+    for c, (i, u, tau) in enumerate(reflectors):
+        for l in range(len(u)):
+            V[i - b + l][c] = u[l]
+        # T[:c, c] = -tau * T[:c, :c] * V[:, :c]* * u
+        w = [eType(0) for r in range(c)]
+        for r in range(c):
+            for l in range(len(u)):
+                w[r] += V[i - b + l][r] * u[l]
+        for r in range(c):
+            t = eType(0)
+            for m in range(r, c):
+                t += T[r][m] * w[m]
+            T[r][c] = -tau * t
+        T[c][c] = tau
+    return V, T
+
+
+def _ApplyBlockReflector(M, b, V, T, start, transpose, eType):
+    # M[b:, start:] = (I - V T V*) * M[b:, start:], or with T* when transpose is set
+    k = len(T)
+    cols = M.cols - start
+    data, cs = M.data, M.cstride
+    # W = V* * M[b:, start:]
+    W = [[eType(0) for c in range(cols)] for r in range(k)]
+    for l in range(len(V)):
+        base, v = M.index(b + l, start), V[l]
+        for r in range(k):
+            if v[r] == eType(0):
+                continue
+            w, vr = W[r], v[r]
+            for c in range(cols):
+                w[c] += vr * data[base + c * cs]
+    # W = T * W (or T* * W), T is upper triangular
+    TW = [[eType(0) for c in range(cols)] for r in range(k)]
+    for r in range(k):
+        for m in range(k):
+            t = T[m][r] if transpose else T[r][m]
+            if t == eType(0):
+                continue
+            tw, w = TW[r], W[m]
+            for c in range(cols):
+                tw[c] += t * w[c]
+    # M[b:, start:] -= V * W
+    for l in range(len(V)):
+        base, v = M.index(b + l, start), V[l]
+        for r in range(k):
+            if v[r] == eType(0):
+                continue
+            tw, vr = TW[r], v[r]
+            for c in range(cols):
+                data[base + c * cs] -= vr * tw[c]
+
+
+def GivensReduction(A, eType=float, digits=12, compact=False, backend=None):
+    """Givens Reduction
+
+    Use rotation matrix to reduct given matrix A to QR. Each rotation only
+    touches two rows, so the whole reduction is O(mn^2) for a m x n matrix.
+    A m x n (m > n) matrix gets the thin decomposition, Q is m x n and R is n x n.
+
+    Args:
+        A:       A square (or tall) matrix instance.
+        eType:   Optional, the dtype of elements in matrix.
+        digits:  Optional, the digits of precision in float calculation.
+        compact: Optional, return the rotations as (i, j, c, s) records instead of Q.
+        backend: Optional, 'python' or 'numpy', see SetBackend.
+
+    Returns:
+        Two Matrix: Q, R which is the decomposition of A. If compact is set, Q is
+        replaced by the list of rotations, see ApplyGivensRotations.
+    """
+
+    # get shape of A, thin QR needs rows >= cols
+    rows, cols = _TallShape(A)
+
+    # run as vector operations on ndarray if numpy backend is selected
+    if _backend.UseNumpy(backend, eType):
+        return _backend.NumpyGivensReduction(A, digits, compact)
+
+    prof = _instrument.Active()
+    if prof:
+        t = prof.start()
+        prof.allocate(rows * cols)
+    # Define R as a deep copy of A, R[j][i] is r[j * cols + i]
+    R = Matrix.from_rows(A, eType)
+    r = R.data
+    zero = eType(0)
+    rotations = []
+    if prof:
+        t = prof.lap('givens.copy', t)
+    for i in range(min(cols, rows - 1)):
+        count = len(rotations)
+        for j in range(i + 1, rows):
+            # annihilate A_ji (i < j), nothing to do if it is zero already
+            if r[j * cols + i] == zero:
+                continue
+            c, s = _GivensParameters(r[i * cols + i], r[j * cols + i])
+            # apply P_ij on rows i, j of R, columns before i are zero already
+            R.rotate_rows(i, j, c, s, i)
+            r[j * cols + i] = zero
+            rotations.append((i, j, c, s))
+        if prof:
+            t = prof.lap('givens.rotation', t, (len(rotations) - count) * (6 * (cols - i) + 6))
+
+    if compact:
+        Q = rotations
+    else:
+        # Q = P1*P2*...Pn* * I[:, :cols], apply Pn* first, only cols columns are kept
+        Q = _ThinIdentity(rows, cols, eType)
+        for i, j, c, s in reversed(rotations):
+            Q.rotate_rows(i, j, c, -s)
+        if prof:
+            prof.allocate(rows * cols)
+            t = prof.lap('givens.accumulate', t, 6 * cols * len(rotations))
+            prof.metric('givens.orthogonality_loss', _instrument.OrthogonalityLoss(Q))
+    # R is the upper cols x cols part
+    if rows > cols:
+        R = R[:cols].copy()
+    return _RoundQR(Q, R, eType, digits)
+
+
+def ApplyGivensRotations(rotations, x, transpose=False):
+    """Apply Givens Rotations
+
+    Multiply a vector by the Q stored as compact rotations from GivensReduction.
+
+    Args:
+        rotations: A list of (i, j, c, s) records returned by GivensReduction.
+        x:         A vector, it is updated in place.
+        transpose: Optional, compute Q* * x instead of Q * x.
+
+    Returns:
+        The vector x.
+    """
+
+    # Q* = Pn...P2P1, apply P1 first
+    if transpose:
+        for i, j, c, s in rotations:
+            x[i], x[j] = c * x[i] + s * x[j], c * x[j] - s * x[i]
+    # Q = P1*P2*...Pn*, apply Pn* first
+    else:
+        for i, j, c, s in reversed(rotations):
+            x[i], x[j] = c * x[i] - s * x[j], s * x[i] + c * x[j]
+    return x
+
+
+def _GivensParameters(a, b):
+    # c = a / sqrt(a^2 + b^2), s = b / sqrt(a^2 + b^2)
+    cs_root_square = (a * a + b * b) ** 0.5
+    return a / cs_root_square, b / cs_root_square
+
 
+# factorizations by the short name used in the libb command
+METHODS = {
+    'lu': LUFactorization,
+    'cs': ClassicalSchmidtDecomposition,
+    'ms': ModifiedSchmidtDecomposition,
+    'h': HouseholderReduction,
+    'g': GivensReduction,
+}
@@ -0,0 +1,131 @@
+from time import perf_counter
+from collections import OrderedDict, namedtuple
+
+PhaseStats = namedtuple('PhaseStats', ('calls', 'seconds', 'flops'))
+
+# the innermost active Profiler, None when profiling is off
+_active = None
+
+
+def Active():
+    # factorizations look the profiler up once per call and skip every hook if it is None
+    return _active
+
+
+class Profiler():
+    """Profiler
+
+    Collect per-phase timings, flop counts, working matrix allocations and
+    numerical metrics (pivot growth, orthogonality loss) of the factorizations
+    run inside a Profile block. Phases are named '<method>.<phase>', e.g.
+    'lu.pivot', 'lu.elimination', 'householder.reflector' or 'round'.
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        # phase -> [calls, seconds, flops]
+        self.phases = OrderedDict()
+        # number of working matrices and their elements
+        self.allocations = [0, 0]
+        # metric -> one value per factorization
+        self.metrics = OrderedDict()
+        self._outer = None
+
+    def __enter__(self):
+        global _active
+        self._outer = _active
+        _active = self
+        return self
+
+    def __exit__(self, *exc_info):
+        global _active
+        _active = self._outer
+        self._outer = None
+        return False
+
+    def start(self):
+        return perf_counter()
+
+    # charge the time since start to phase, returns the start of the next phase
+    def lap(self, phase, start, flops=0):
+        now = perf_counter()
+        stats = self.phases.get(phase)
+        if stats is None:
+            stats = self.phases[phase] = [0, 0., 0]
+        stats[0] += 1
+        stats[1] += now - start
+        stats[2] += flops
+        if self.callback is not None:
+            self.callback(phase, now - start, flops)
+        return now
+
+    def allocate(self, elements, count=1):
+        self.allocations[0] += count
+        self.allocations[1] += elements
+
+    def metric(self, name, value):
+        self.metrics.setdefault(name, []).append(float(value))
+
+    def report(self):
+        """Get the collected phases as PhaseStats, the allocations and the metrics."""
+        return {
+            'phases': OrderedDict((name, PhaseStats(*stats)) for name, stats in self.phases.items()),
+            'allocations': {'matrices': self.allocations[0], 'elements': self.allocations[1]},
+            'metrics': OrderedDict((name, list(values)) for name, values in self.metrics.items()),
+        }
+
+    def __str__(self):
+        total = sum(stats[1] for stats in self.phases.values()) or 1.
+        lines = ['%-32s %8s %12s %7s %14s' % ('phase', 'calls', 'seconds', '%', 'flops')]
+        for name, (calls, seconds, flops) in self.phases.items():
+            lines.append('%-32s %8d %12.6f %6.1f%% %14d' % (name, calls, seconds, 100. * seconds / total, flops))
+        lines.append('allocations: %d matrices, %d elements' % tuple(self.allocations))
+        for name, values in self.metrics.items():
+            lines.append('%s: %s' % (name, ', '.join('%.3g' % v for v in values)))
+        return '\n'.join(lines)
+
+
+def Profile(callback=None):
+    """Profile
+
+    Profile the factorizations run in a with block. Without an active profile the
+    hooks in the factorizations cost one check per elimination step.
+
+        with libb.profile() as p:
+            libb.LUFactorization(A)
+        print(p)
+
+    Args:
+        callback: Optional, called as callback(phase, seconds, flops) whenever a
+                  phase step ends, e.g. to stream the timings to a logger.
+
+    Returns:
+        A Profiler, used as a context manager.
+    """
+
+    return Profiler(callback)
+
+
+def MaxAbs(A):
+    return max((abs(float(e)) for row in A for e in row), default=0.)
+
+
+def PivotGrowth(a_max, U):
+    # max |uij| / max |aij| (i <= j), the growth factor of Gaussian Elimination, U may be packed
+    u_max = max((abs(float(e)) for i, row in enumerate(U) for e in list(row)[i:]), default=0.)
+    return u_max / a_max if a_max else 0.
+
+
+def OrthogonalityLoss(Q):
+    # max |Q*Q - I|, O(mn^2) so it is only computed while profiling
+    columns = [[float(e) for e in column] for column in zip(*Q)]
+    loss = 0.
+    for i, q_i in enumerate(columns):
+        for j in range(i, len(columns)):
+            e = sum(x * y for x, y in zip(q_i, columns[j])) - (1. if i == j else 0.)
+            loss = max(loss, abs(e))
+    return loss
+
+
+# snake_case alias
+profile = Profile
@@ -3,19 +3,80 @@ import sys
 import argparse
 
 import libb
+from libb import bench
+
+# decomposition methods: (short name, title, factor titles)
+METHODS = [
+    ('lu', 'LU Factorization', ('P:', 'L:', 'U:')),
+    ('cs', 'Classical Schmidt Decomposition', ('Q:', 'R:')),
+    ('ms', 'Modified Schmidt Decomposition', ('Q:', 'R:')),
+    ('h', 'Householder Reduction', ('Q:', 'R:')),
+    ('g', 'Givens Reduction', ('Q:', 'R:')),
+    ('ev', 'Eigen Decomposition', ('Eigenvalues:', 'Eigenvectors:')),
+]
 
 def getArguments(args=sys.argv[1:]):
     parser = argparse.ArgumentParser(description="Matrix Decomposition Utils.")
-    parser.add_argument(dest='method', help="decomposition method.", metavar= "lu|cs|ms|h|g")
-    parser.add_argument("-f", "--file", dest='file', help="open a matrix file")
-    parser.add_argument("-t", "--type", dest='etype', default='float', help="entries output type (default float)", metavar= "[float|frac]")
+    parser.add_argument(dest='method', help="decomposition method.", metavar= "lu|cs|ms|h|g|ev|bench")
+    parser.add_argument("-f", "--file", dest='file', help="open a matrix file (matrices split by empty line)")
+    parser.add_argument("-t", "--type", dest='etype', default='float', help="entries output type (default float)", metavar= "[float|frac|rat]")
+    parser.add_argument("-j", "--jobs", dest='jobs', type=int, default=None, help="worker processes for a multi-matrix file (default all cores)")
+    parser.add_argument("-o", "--output", dest='output', default=None, help="write to a file, binary formats write one file per factor named OUTPUT.<method>.<factor>.<format> (OUTPUT.A<index>.<method>.<factor>.<format> for a multi-matrix file)")
+    parser.add_argument("--format", dest='format', default='pretty', choices=('pretty',) + libb.FORMATS, help="output format (default pretty)")
+    parser.add_argument("-q", "--quiet", dest='quiet', action='store_true', help="print nothing to stdout")
     return parser.parse_args(args)
 
+# write matrix M in the chosen format, key names its file for a binary format (None for no file)
+def emit(M, title, key, args, dst):
+    if key is not None and args.format in ('npy', 'bin'):
+        with open('%s.%s.%s' % (args.output, key, args.format), 'wb') as f:
+            libb.WriteMatrix(M, f, args.format)
+    if dst is None:
+        return
+    if args.format in ('text', 'csv'):
+        dst.write(title + "\n")
+        libb.WriteMatrix(M, dst, args.format)
+        dst.write("\n")
+    else:
+        libb.PrintMatrix(M, title, dst)
+
+# factor A by the method's short name, the eigenvalues are given as a column
+def factorize(method, A, etype):
+    if method != 'ev':
+        return libb.METHODS[method](A=A, eType=etype)
+    values, V = libb.Eig(A)
+    eType = complex if any(type(e) == complex for e in values) else float
+    return libb.Matrix.from_rows([[e] for e in values], eType), V
+
+# write a line of text output, unless it is quiet
+def say(text, dst):
+    if dst is not None:
+        dst.write(text + "\n")
+
 def main():
+    # libb bench [options] runs the benchmark suite instead
+    if sys.argv[1:2] == ['bench']:
+        return bench.main(sys.argv[2:])
     args = getArguments()
+    # args.output, text goes to the output file or stdout, binary formats always write files
+    if args.format in ('npy', 'bin') and args.output is None:
+        exit('Expect an output file (-o) for the %s format!' % args.format)
+    if args.output is not None and args.format not in ('npy', 'bin'):
+        dst = open(args.output, 'w')
+    else:
+        dst = None if args.quiet else sys.stdout
+    try:
+        return run(args, dst)
+    finally:
+        if dst is not None and dst is not sys.stdout:
+            dst.close()
+
+# load the matrices and write the factors of each method to dst
+def run(args, dst):
     # args.file
     if args.file == None:
-        print("[INFO] Input matrix (split by white space):")
+        if not args.quiet:
+            print("[INFO] Input matrix (split by white space):")
         f = sys.stdin
     else:
         f = open(args.file, 'r+')
@@ -23,49 +84,62 @@ def main():
     # args.etype
     if args.etype == 'frac':
         etype = libb.Fraction
+    elif args.etype == 'rat':
+        etype = libb.Rational
     else:
         etype = float
 
-    # load matrix from sys.stdin or some opened file
-    A_matrix, row_num, col_num = libb.LoadMatrix(src=f, dst=[], dtype=int)
-
-    # make sure A is a square matrix
-    if row_num != col_num:
-        exit('Expect a "square" matrix!')
-    libb.PrintMatrix(M=A_matrix, title="Matrix A:")
-
-    # LU Factorization
-    if args.method.find("lu") != -1:
-        print("LU Factorization")
-        P, L, U = libb.LUFactorization(A=A_matrix, eType=etype)
-        libb.PrintMatrix(M=P, title="P:")
-        libb.PrintMatrix(M=L, title="L:")
-        libb.PrintMatrix(M=U, title="U:")
+    # load matrix from sys.stdin or some opened file, a file may hold more matrices split by empty line
+    if args.file == None:
+        A_matrix, row_num, col_num = libb.LoadMatrix(src=f, dst=[], dtype=int)
+        matrices = [A_matrix]
+    else:
+        matrices = [A_matrix for A_matrix, row_num, col_num in libb.LoadMatrices(src=f, dtype=int)]
 
-    # Classical Schmidt Decomposition
-    if args.method.find("cs") != -1:
-        print("Classical Schmidt Decomposition")
-        Q, R = libb.ClassicalSchmidtDecomposition(A=A_matrix, eType=etype)
-        libb.PrintMatrix(M=Q, title="Q:")
-        libb.PrintMatrix(M=R, title="R:")
+    methods = [m for m in METHODS if args.method.find(m[0]) != -1]
+    # make sure A is a square matrix for LU and eigenvalues, QR takes a tall one too
+    for A_matrix in matrices:
+        col_num = A_matrix.cols if isinstance(A_matrix, libb.CSRMatrix) else len(A_matrix[0])
+        if len(A_matrix) != col_num and any(m[0] in ('lu', 'ev') for m in methods):
+            exit('Expect a "square" matrix!')
+        if len(A_matrix) < col_num:
+            exit('Expect a "square" or "tall" matrix!')
 
-    # Modified Schmidt Decomposition
-    if args.method.find("ms") != -1:
-        print("Modified Schmidt Decomposition")
-        Q, R = libb.ModifiedSchmidtDecomposition(A=A_matrix, eType=etype)
-        libb.PrintMatrix(M=Q, title="Q:")
-        libb.PrintMatrix(M=R, title="R:")
+    # a sparse matrix gets the sparse LU and its fill-in, QR runs on the dense matrix
+    if isinstance(matrices[0], libb.CSRMatrix):
+        A_matrix = matrices[0]
+        say("Matrix A: (%d, %d) with %d nonzeros\n" % (A_matrix.rows, A_matrix.cols, A_matrix.nnz), dst)
+        for method, title, names in methods:
+            say(title, dst)
+            if method == 'lu':
+                L, U, P, Q, stats = libb.SparseLUFactorization(A_matrix, eType=etype)
+                say("nnz(A) = %d, nnz(L) = %d, nnz(U) = %d, fill-in = %d (%.2fx)\n" % stats, dst)
+                continue
+            factors = factorize(method, A_matrix.todense(), etype)
+            for M, name in zip(factors, names):
+                emit(M, name, '%s.%s' % (method, name[:-1]), args, dst)
+        return
 
-    # Householder Reduction
-    if args.method.find("h") != -1:
-        print("Householder Reduction")
-        Q, R = libb.HouseholderReduction(A=A_matrix, eType=etype)
-        libb.PrintMatrix(M=Q, title="Q:")
-        libb.PrintMatrix(M=R, title="R:")
+    # factor all matrices of the file on a process pool, eigenvalues run one by one
+    if len(matrices) > 1:
+        for method, title, names in methods:
+            say(title, dst)
+            if method == 'ev':
+                results = [factorize(method, A_matrix, etype) for A_matrix in matrices]
+            else:
+                results = libb.ParallelFactorize(method, matrices, eType=etype, workers=args.jobs)
+            for idx, (A_matrix, factors) in enumerate(zip(matrices, results)):
+                emit(A_matrix, "Matrix A%d:" % idx, None, args, dst)
+                if factors is None:
+                    say("Sigular matrix!\n", dst)
+                    continue
+                for M, name in zip(factors, names):
+                    emit(M, name, 'A%d.%s.%s' % (idx, method, name[:-1]), args, dst)
+        return
 
-    # Givens Reduction
-    if args.method.find("g") != -1:
-        print("Givens Reduction")
-        Q, R = libb.GivensReduction(A=A_matrix, eType=etype)
-        libb.PrintMatrix(M=Q, title="Q:")
-        libb.PrintMatrix(M=R, title="R:")
+    emit(matrices[0], "Matrix A:", None, args, dst)
+    for method, title, names in methods:
+        say(title, dst)
+        factors = factorize(method, matrices[0], etype)
+        for M, name in zip(factors, names):
+            emit(M, name, '%s.%s' % (method, name[:-1]), args, dst)
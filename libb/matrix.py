@@ -0,0 +1,325 @@
+from array import array
+
+
+# Vector, a strided view on the storage of a Matrix (a row or a column)
+class Vector():
+    __slots__ = ('data', 'offset', 'length', 'stride')
+
+    # construction
+    def __init__(self, data, offset, length, stride=1):
+        self.data = data
+        self.offset = offset
+        self.length = length
+        self.stride = stride
+
+    def __len__(self):
+        return self.length
+
+    def _index(self, k):
+        if k < 0:
+            k += self.length
+        if k < 0 or k >= self.length:
+            raise IndexError('vector index out of range')
+        return self.offset + k * self.stride
+
+    # overload op "[]", a slice is a view too
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            start, stop, step = k.indices(self.length)
+            return Vector(self.data, self.offset + start * self.stride, len(range(start, stop, step)), self.stride * step)
+        return self.data[self._index(k)]
+
+    def __setitem__(self, k, value):
+        if isinstance(k, slice):
+            view = self[k]
+            values = list(value)
+            if len(values) != view.length:
+                raise ValueError('cannot assign %d elements to a vector of %d' % (len(values), view.length))
+            for p, e in zip(view._range(), values):
+                view.data[p] = e
+            return
+        self.data[self._index(k)] = value
+
+    # storage index of each element
+    def _range(self):
+        return range(self.offset, self.offset + self.length * self.stride, self.stride) if self.length else range(0)
+
+    def __iter__(self):
+        data = self.data
+        return (data[p] for p in self._range())
+
+    def tolist(self):
+        data = self.data
+        return [data[p] for p in self._range()]
+
+    # overload op "=="
+    def __eq__(self, other):
+        try:
+            return len(other) == self.length and all(a == b for a, b in zip(self, other))
+        except TypeError:
+            return NotImplemented
+
+    def __ne__(self, other):
+        eq = self.__eq__(other)
+        return eq if eq is NotImplemented else not eq
+
+    def __repr__(self):
+        return 'Vector(%s)' % ', '.join(str(e) for e in self)
+
+
+# Matrix, a compact container over one flat storage (array('d'), a list or a buffer)
+class Matrix():
+    # element (i, j) is data[offset + i * rstride + j * cstride]
+    __slots__ = ('data', 'rows', 'cols', 'offset', 'rstride', 'cstride')
+
+    # construction
+    def __init__(self, rows, cols, data=None, offset=0, rstride=None, cstride=1, typecode='d'):
+        if data is None:
+            data = array(typecode, bytes(rows * cols * array(typecode).itemsize))
+        self.data = data
+        self.rows = rows
+        self.cols = cols
+        self.offset = offset
+        self.rstride = cols * cstride if rstride is None else rstride
+        self.cstride = cstride
+
+    # zero matrix, float elements are stored unboxed with typecode
+    @staticmethod
+    def zeros(rows, cols, eType=float, typecode='d'):
+        if eType == float:
+            return Matrix(rows, cols, typecode=typecode)
+        return Matrix(rows, cols, [eType(0)] * (rows * cols))
+
+    @staticmethod
+    def identity(size, eType=float, typecode='d'):
+        M = Matrix.zeros(size, size, eType, typecode)
+        one = eType(1)
+        for i in range(size):
+            M.data[i * (size + 1)] = one
+        return M
+
+    # deep copy any struct that supports index operator [] with element type
+    @staticmethod
+    def from_rows(A, eType=float, typecode='d'):
+        rows = len(A)
+        cols = len(A[0]) if rows else 0
+        if eType == float:
+            data = array(typecode)
+            for row in A:
+                data.extend(map(float, row))
+        else:
+            data = [eType(e) for row in A for e in row]
+        if len(data) != rows * cols:
+            raise ValueError('Expect a "matrix"!')
+        return Matrix(rows, cols, data)
+
+    # zero-copy matrix on a buffer (bytes, mmap, array, ndarray...) in row-major order
+    @staticmethod
+    def from_buffer(buffer, rows, cols, typecode='d', offset=0):
+        view = memoryview(buffer)
+        if view.format != typecode or view.ndim != 1:
+            view = view.cast('B').cast(typecode)
+        if offset + rows * cols > len(view):
+            raise ValueError('Buffer is too small for a (%d, %d) matrix' % (rows, cols))
+        return Matrix(rows, cols, view, offset)
+
+    @property
+    def shape(self):
+        return (self.rows, self.cols)
+
+    # transposed view, no copy
+    @property
+    def T(self):
+        return Matrix(self.cols, self.rows, self.data, self.offset, self.cstride, self.rstride)
+
+    # storage index of element (i, j)
+    def index(self, i, j):
+        return self.offset + i * self.rstride + j * self.cstride
+
+    # whether the elements are packed row by row without gap
+    def is_contiguous(self):
+        return self.cstride == 1 and self.rstride == self.cols
+
+    def row(self, i):
+        if i < 0:
+            i += self.rows
+        if i < 0 or i >= self.rows:
+            raise IndexError('matrix row index out of range')
+        return Vector(self.data, self.offset + i * self.rstride, self.cols, self.cstride)
+
+    def col(self, j):
+        if j < 0:
+            j += self.cols
+        if j < 0 or j >= self.cols:
+            raise IndexError('matrix column index out of range')
+        return Vector(self.data, self.offset + j * self.cstride, self.rows, self.rstride)
+
+    def __len__(self):
+        return self.rows
+
+    def __iter__(self):
+        return (self.row(i) for i in range(self.rows))
+
+    # overload op "[]": M[i] is a row view, M[i, j] an element, M[i0:i1, j0:j1] a matrix view
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            i, j = key
+            if isinstance(i, slice) or isinstance(j, slice):
+                return self._view(i, j)
+            return self.data[self.offset + i * self.rstride + j * self.cstride]
+        if isinstance(key, slice):
+            return self._view(key, slice(None))
+        return self.row(key)
+
+    def __setitem__(self, key, value):
+        if isinstance(key, tuple):
+            i, j = key
+            self.data[self.offset + i * self.rstride + j * self.cstride] = value
+        else:
+            self.row(key)[:] = value
+
+    def _view(self, i, j):
+        if not isinstance(i, slice):
+            i = slice(i % self.rows, i % self.rows + 1)
+        if not isinstance(j, slice):
+            j = slice(j % self.cols, j % self.cols + 1)
+        r_start, r_stop, r_step = i.indices(self.rows)
+        c_start, c_stop, c_step = j.indices(self.cols)
+        return Matrix(len(range(r_start, r_stop, r_step)), len(range(c_start, c_stop, c_step)), self.data,
+                      self.index(r_start, c_start), self.rstride * r_step, self.cstride * c_step)
+
+    # contiguous copy, optionally converted to another element type
+    def copy(self, eType=None):
+        if eType is not None:
+            return Matrix.from_rows(self, eType)
+        data, start = self.data, self.offset
+        if self.is_contiguous() and isinstance(data, (array, list)):
+            return Matrix(self.rows, self.cols, data[start:start + self.rows * self.cols])
+        values = (e for row in self for e in row)
+        if isinstance(data, list):
+            return Matrix(self.rows, self.cols, list(values))
+        return Matrix(self.rows, self.cols, array(data.typecode if isinstance(data, array) else data.format, values))
+
+    def tolist(self):
+        return [self.row(i).tolist() for i in range(self.rows)]
+
+    # In-place row operations, rows with unit column stride are updated by slices
+    def _slice(self, a, n):
+        data = self.data
+        return data[a:a + n] if isinstance(data, list) else data[a:a + n].tolist()
+
+    def _pack(self, values):
+        data = self.data
+        if isinstance(data, list):
+            return values
+        return array(data.typecode if isinstance(data, array) else data.format, values)
+
+    # exchange row i and row j
+    def swap_rows(self, i, j):
+        if i == j:
+            return
+        data, cs, n = self.data, self.cstride, self.cols
+        a, b = self.index(i, 0), self.index(j, 0)
+        if cs == 1:
+            row = self._pack(data[a:a + n])
+            data[a:a + n] = data[b:b + n]
+            data[b:b + n] = row
+        else:
+            for p, q in zip(range(a, a + n * cs, cs), range(b, b + n * cs, cs)):
+                data[p], data[q] = data[q], data[p]
+
+    # row i <- alpha * row i (from column start)
+    def scale_row(self, i, alpha, start=0):
+        data, cs, n = self.data, self.cstride, self.cols - start
+        a = self.index(i, start)
+        if cs == 1:
+            data[a:a + n] = self._pack([alpha * x for x in self._slice(a, n)])
+            return
+        for p in range(a, a + n * cs, cs):
+            data[p] = alpha * data[p]
+
+    # row dst <- row dst + alpha * row src (from column start)
+    def add_row(self, dst, src, alpha, start=0):
+        data, cs, n = self.data, self.cstride, self.cols - start
+        a, b = self.index(dst, start), self.index(src, start)
+        if cs == 1:
+            data[a:a + n] = self._pack([x + alpha * y for x, y in zip(self._slice(a, n), self._slice(b, n))])
+            return
+        for p, q in zip(range(a, a + n * cs, cs), range(b, b + n * cs, cs)):
+            data[p] = data[p] + alpha * data[q]
+
+    # row i <- c * row i + s * row j, row j <- c * row j - s * row i (from column start)
+    def rotate_rows(self, i, j, c, s, start=0):
+        data, cs, n = self.data, self.cstride, self.cols - start
+        a, b = self.index(i, start), self.index(j, start)
+        if cs == 1:
+            row_i, row_j = self._slice(a, n), self._slice(b, n)
+            data[a:a + n] = self._pack([c * x + s * y for x, y in zip(row_i, row_j)])
+            data[b:b + n] = self._pack([c * y - s * x for x, y in zip(row_i, row_j)])
+            return
+        for p, q in zip(range(a, a + n * cs, cs), range(b, b + n * cs, cs)):
+            x, y = data[p], data[q]
+            data[p] = c * x + s * y
+            data[q] = c * y - s * x
+
+    # rows i ~ i + len(u) <- (I - tau * u(u*)) * rows i ~ i + len(u), on columns start ~ end
+    def reflect_rows(self, i, u, tau, start=0, end=None):
+        if tau == type(tau)(0):
+            return
+        end = self.cols if end is None else end
+        data, rs, cs, n = self.data, self.rstride, self.cstride, end - start
+        length = len(u)
+        if cs != 1:
+            for p in range(self.index(i, start), self.index(i, end), cs):
+                w = data[p]
+                for l in range(1, length):
+                    w += u[l] * data[p + l * rs]
+                w *= tau
+                data[p] -= w
+                for l in range(1, length):
+                    data[p + l * rs] -= w * u[l]
+            return
+        # w = tau * (u*) * rows, accumulated row by row
+        a = self.index(i, start)
+        w = self._slice(a, n)
+        for l in range(1, length):
+            ul, p = u[l], a + l * rs
+            w = [x + ul * y for x, y in zip(w, self._slice(p, n))]
+        w = [x * tau for x in w]
+        data[a:a + n] = self._pack([x - y for x, y in zip(self._slice(a, n), w)])
+        for l in range(1, length):
+            ul, p = u[l], a + l * rs
+            data[p:p + n] = self._pack([x - y * ul for x, y in zip(self._slice(p, n), w)])
+
+    # overload op "=="
+    def __eq__(self, other):
+        try:
+            return len(other) == self.rows and all(a == b for a, b in zip(self, other))
+        except TypeError:
+            return NotImplemented
+
+    def __ne__(self, other):
+        eq = self.__eq__(other)
+        return eq if eq is NotImplemented else not eq
+
+    def __repr__(self):
+        return 'Matrix(%s)' % self.tolist()
+
+    # pickle a contiguous copy, buffer storages can not be pickled
+    def __reduce__(self):
+        M = self
+        if not (isinstance(M.data, (array, list)) and M.is_contiguous() and M.offset == 0 and len(M.data) == M.rows * M.cols):
+            M = self.copy()
+        return (Matrix, (M.rows, M.cols, M.data))
+
+    # zero-copy ndarray for unboxed storage, used by numpy.asarray
+    def __array__(self, dtype=None, copy=None):
+        from libb.backend import numpy
+        if isinstance(self.data, list):
+            return numpy.array(self.tolist(), dtype=dtype)
+        base = numpy.frombuffer(self.data, dtype=self.data.typecode if isinstance(self.data, array) else self.data.format)
+        itemsize = base.itemsize
+        M = numpy.lib.stride_tricks.as_strided(base[self.offset:], (self.rows, self.cols), (self.rstride * itemsize, self.cstride * itemsize))
+        if dtype is not None and M.dtype != dtype:
+            return M.astype(dtype)
+        return M.copy() if copy else M
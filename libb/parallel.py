@@ -0,0 +1,122 @@
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from libb.exception import SigularMatrixError
+from libb.factorization import METHODS
+from libb import backend as _backend
+
+# range of the int64 buffer of integer matrices
+INT64_MIN, INT64_MAX = -1 << 63, (1 << 63) - 1
+
+
+def ParallelFactorize(method, As, eType=float, digits=12, workers=None, chunksize=16, backend=None):
+    """Parallel Factorize
+
+    Spread a collection of matrices across a process pool and factor them. The
+    matrices are packed once into a shared memory block, workers read their
+    chunk from it directly instead of receiving pickled lists of lists. Elements
+    a flat int64 or float64 buffer cannot hold exactly (integers out of the int64
+    range, fractions) are sent as pickled rows instead.
+
+    Args:
+        method:    One of 'lu', 'cs', 'ms', 'h', 'g'.
+        As:        An iterable of matrices, e.g. a generator, shapes may differ.
+        eType:     Optional, the dtype of elements in matrix.
+        digits:    Optional, the digits of precision in float calculation.
+        workers:   Optional, the number of worker processes, default to the number of cores.
+        chunksize: Optional, the number of matrices factored by a worker per task.
+        backend:   Optional, 'python' or 'numpy', see SetBackend.
+
+    Returns:
+        A generator of the factors (P, L, U or Q, R) of each matrix in input order,
+        None for a singular matrix. The matrices are factored while it is iterated.
+    """
+
+    if method not in METHODS:
+        raise ValueError('Unknown method %r, expect one of %s' % (method, '|'.join(METHODS)))
+    if chunksize < 1:
+        raise ValueError('chunksize must be positive, not %d' % chunksize)
+    backend = _backend.GetBackend() if backend is None else backend
+    # the arguments are checked on the call, the factors are generated on iteration
+    return _ParallelFactorize(method, list(As), eType, digits, workers, chunksize, backend)
+
+
+def _ParallelFactorize(method, As, eType, digits, workers, chunksize, backend):
+    if len(As) == 0:
+        return
+    typecode = _Typecode(As)
+    if typecode is None:
+        tasks = [(None, None, [[list(row) for row in A] for A in As[i:i + chunksize]], method, eType, digits, backend)
+                 for i in range(0, len(As), chunksize)]
+        yield from _RunTasks(tasks, workers)
+        return
+
+    # pack all matrices into one flat buffer, integer input keeps exact as int64
+    flat = array(typecode)
+    shapes = []
+    for A in As:
+        shapes.append((len(flat), len(A), len(A[0]) if len(A) else 0))
+        for row in A:
+            flat.extend(row)
+
+    shm = shared_memory.SharedMemory(create=True, size=max(len(flat) * flat.itemsize, 1))
+    try:
+        shm.buf[:len(flat) * flat.itemsize] = memoryview(flat).cast('B')
+        del flat
+        tasks = [(shm.name, typecode, shapes[i:i + chunksize], method, eType, digits, backend)
+                 for i in range(0, len(shapes), chunksize)]
+        yield from _RunTasks(tasks, workers)
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def _Typecode(As):
+    # 'q' for int64 elements, 'd' for floats (and int64 among them), None if a buffer would lose some
+    typecode = 'q'
+    for A in As:
+        for row in A:
+            for e in row:
+                if isinstance(e, float):
+                    typecode = 'd'
+                elif not isinstance(e, int) or not INT64_MIN <= e <= INT64_MAX:
+                    return None
+    return typecode
+
+
+def _RunTasks(tasks, workers):
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        # map keeps the input order, results are streamed chunk by chunk
+        for results in executor.map(_FactorizeChunk, tasks):
+            for result in results:
+                yield result
+
+
+def _FactorizeChunk(task):
+    name, typecode, shapes, method, eType, digits, backend = task
+    factorize = METHODS[method]
+    if name is None:
+        # pickled rows
+        return [_Factorize(factorize, A, eType, digits, backend) for A in shapes]
+    # workers share the parent's resource tracker, the parent unlinks the block
+    shm = shared_memory.SharedMemory(name=name)
+    buf = shm.buf.cast(typecode)
+    results = []
+    try:
+        for offset, rows, cols in shapes:
+            A = [buf[offset + i * cols:offset + (i + 1) * cols].tolist() for i in range(rows)]
+            results.append(_Factorize(factorize, A, eType, digits, backend))
+    finally:
+        buf.release()
+        shm.close()
+    return results
+
+
+def _Factorize(factorize, A, eType, digits, backend):
+    # the factors of A, None for a singular matrix
+    try:
+        return factorize(A, eType=eType, digits=digits, backend=backend)
+    except (SigularMatrixError, ZeroDivisionError):
+        return None
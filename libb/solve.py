@@ -0,0 +1,500 @@
+import hashlib
+import fractions
+from array import array
+from collections import OrderedDict, namedtuple
+
+from libb.exception import SigularMatrixError
+from libb.factorization import PackedLUFactorization, HouseholderReduction, ApplyHouseholderReflectors, CholeskyFactorization, LDLFactorization, _BandedPackedLU
+from libb.utils import RoundMatrix, DetectStructure
+from libb.matrix import Matrix
+from libb import backend as _backend
+
+CacheInfo = namedtuple('CacheInfo', ('hits', 'misses', 'maxsize', 'currsize'))
+RefineInfo = namedtuple('RefineInfo', ('iterations', 'backward_error', 'converged'))
+
+# storage typecode of the factors by the precision name of RefineSolve
+PRECISIONS = {'single': 'f', 'double': 'd'}
+
+# packed factors of recently used matrices, least recently used first
+_cache = OrderedDict()
+_maxsize = 32
+_hits = 0
+_misses = 0
+
+
+def LUSolve(A, b, eType=float, digits=12, backend=None):
+    """LU Solve
+
+    Solve A * x = b with the packed LU factors of A. The factors are cached by the
+    content of A, solving against the same A again skips the factorization.
+
+    Args:
+        A:       A square matrix instance.
+        b:       A vector, or a matrix whose columns are the right-hand sides.
+        eType:   Optional, the dtype of elements in matrix.
+        digits:  Optional, the digits of precision in float calculation, None to skip rounding.
+        backend: Optional, 'python' or 'numpy', see SetBackend.
+
+    Returns:
+        The solution x, a list for a vector b and a Matrix otherwise.
+    """
+
+    LU, P = _Factor(A, eType, backend)
+    X, vector = _RightHandSides(b, LU.rows, P, eType)
+
+    if _backend.UseNumpy(backend, eType):
+        _backend.NumpyLUSubstitute(LU, X)
+    else:
+        _ForwardSubstitute(LU, X, eType)
+        _BackSubstitute(LU, X, eType)
+
+    if eType == float and digits is not None:
+        RoundMatrix(X, digits)
+    return X.col(0).tolist() if vector else X
+
+
+def Det(A, eType=float, backend=None):
+    """Determinant
+
+    Calculate the determinant of A from its (cached) packed LU factors.
+
+    Args:
+        A:       A square matrix instance.
+        eType:   Optional, the dtype of elements in matrix.
+        backend: Optional, 'python' or 'numpy', see SetBackend.
+
+    Returns:
+        The determinant of A, 0 for a singular matrix.
+    """
+
+    try:
+        LU, P = _Factor(A, eType, backend)
+    except SigularMatrixError:
+        return eType(0)
+    # det(A) = sign(P) * u00 * u11 * ... * un-1n-1
+    value = eType(1)
+    for i in range(LU.rows):
+        value = value * LU[i, i]
+    # each cycle of length l in P takes l - 1 transpositions
+    visited = [False] * len(P)
+    for i in range(len(P)):
+        if visited[i]:
+            continue
+        j = P[i]
+        visited[i] = True
+        while j != i:
+            visited[j] = True
+            value = -value
+            j = P[j]
+    return value
+
+
+def Inverse(A, eType=float, digits=12, backend=None):
+    """Inverse
+
+    Calculate the inverse of A by solving A * X = I on its (cached) packed LU factors.
+
+    Args:
+        A:       A square matrix instance.
+        eType:   Optional, the dtype of elements in matrix.
+        digits:  Optional, the digits of precision in float calculation, None to skip rounding.
+        backend: Optional, 'python' or 'numpy', see SetBackend.
+
+    Returns:
+        The inverse Matrix of A.
+    """
+
+    size = len(A)
+    I = [[1 if i == j else 0 for j in range(size)] for i in range(size)]
+    return LUSolve(A, I, eType, digits, backend)
+
+
+def Lstsq(A, b, eType=float, digits=12, backend=None):
+    """Least Squares
+
+    Solve min ||A * x - b|| for a tall matrix A with full column rank. A is reduced
+    by Householder reflectors, Q* is applied to b without forming Q, then R * x is
+    solved on the upper part of Q* * b. Time and memory are O(mn^2) and O(mn).
+
+    Args:
+        A:       A m x n (m >= n) matrix instance.
+        b:       A vector of length m, or a matrix whose columns are the right-hand sides.
+        eType:   Optional, the dtype of elements in matrix.
+        digits:  Optional, the digits of precision in float calculation, None to skip rounding.
+        backend: Optional, 'python' or 'numpy', see SetBackend.
+
+    Returns:
+        The solution x, a list for a vector b and a Matrix otherwise.
+    """
+
+    reflectors, R = HouseholderReduction(A, eType, digits=None, compact=True, backend=backend)
+    rows, cols = len(A), R.cols
+    if len(b) != rows:
+        raise ValueError('Expect %d rows in b not %d' % (rows, len(b)))
+    for i in range(cols):
+        if abs(R[i, i]) < eType(1e-12):
+            raise SigularMatrixError("Least squares cannot apply on a rank deficient matrix.")
+
+    # Y = (Q* * b)[:cols]
+    vector = len(b) != 0 and not hasattr(b[0], '__len__')
+    if vector:
+        y = ApplyHouseholderReflectors(reflectors, [eType(e) for e in b], transpose=True)
+        Y = Matrix.from_rows([[e] for e in y[:cols]], eType)
+    else:
+        Y = ApplyHouseholderReflectors(reflectors, Matrix.from_rows(b, eType), transpose=True)[:cols].copy()
+
+    # solve R * x = Y
+    _BackSubstitute(R, Y, eType)
+    if eType == float and digits is not None:
+        RoundMatrix(Y, digits)
+    return Y.col(0).tolist() if vector else Y
+
+
+def RefineSolve(A, b, precision='single', residual='double', tol=None, maxiter=30, backend=None):
+    """Refine Solve
+
+    Solve A * x = b by mixed precision iterative refinement. A is factored once
+    in reduced precision (half the memory of float for 'single'), then the
+    residual r = b - A * x is computed in float (or exactly) and the correction
+    A * d = r is solved on the same factors until the normwise backward error
+    ||r|| / (||A|| * ||x|| + ||b||) reaches tol. It converges to float accuracy
+    when A is not too ill-conditioned for the reduced precision (about 1e7 for single).
+
+    Args:
+        A:         A square matrix instance.
+        b:         A vector.
+        precision: Optional, the precision of the factors, 'single' or 'double'.
+        residual:  Optional, compute residuals in 'double' (float) or 'exact' rational
+                   arithmetic, the latter certifies the backward error.
+        tol:       Optional, the target backward error, default to n * 2^-53.
+        maxiter:   Optional, the maximum number of corrections.
+        backend:   Optional, 'python' or 'numpy', see SetBackend.
+
+    Returns:
+        x, info: the solution as a list and a RefineInfo(iterations, backward_error,
+        converged), iterations is the number of corrections applied.
+    """
+
+    if precision not in PRECISIONS:
+        raise ValueError('Unknown precision %r, expect one of %s' % (precision, ', '.join(PRECISIONS)))
+    if residual not in ('double', 'exact'):
+        raise ValueError("Unknown residual %r, expect 'double' or 'exact'" % (residual,))
+    LU, P = _Factor(A, float, backend, PRECISIONS[precision])
+    size = LU.rows
+    if len(b) != size:
+        raise ValueError('Expect a vector of length %d not %d' % (size, len(b)))
+    tol = size * 2. ** -53 if tol is None else tol
+    numpy = _backend.numpy if _backend.UseNumpy(backend, float) else None
+
+    # residuals are computed on A and b in float, or as exact rationals
+    if residual == 'exact':
+        A_r = [[_Exact(e) for e in row] for row in A]
+        b_r = [_Exact(e) for e in b]
+    elif numpy is not None:
+        A_r, b_r = numpy.asarray(A, dtype=float), numpy.asarray(b, dtype=float)
+    else:
+        A_r, b_r = Matrix.from_rows(A, float), [float(e) for e in b]
+    A_norm = max(sum(abs(float(e)) for e in row) for row in A_r)
+    b_norm = max(abs(float(e)) for e in b_r)
+
+    x = _Correction(LU, P, [float(e) for e in b], backend)
+    iterations, backward_error, last = 0, None, None
+    while True:
+        r = _Residual(A_r, x, b_r, numpy)
+        r_norm = max(abs(e) for e in r)
+        x_norm = max(abs(e) for e in x)
+        backward_error = r_norm / (A_norm * x_norm + b_norm) if r_norm else 0.
+        if backward_error <= tol:
+            return x, RefineInfo(iterations, backward_error, True)
+        if iterations >= maxiter:
+            break
+        # x = x + d, A * d = r on the reduced precision factors
+        d = _Correction(LU, P, r, backend)
+        d_norm = max(abs(e) for e in d)
+        x = [e + f for e, f in zip(x, d)]
+        iterations += 1
+        # stop once the corrections no longer shrink
+        if last is not None and d_norm > 0.5 * last:
+            r = _Residual(A_r, x, b_r, numpy)
+            x_norm = max(abs(e) for e in x)
+            backward_error = max(abs(e) for e in r) / (A_norm * x_norm + b_norm)
+            return x, RefineInfo(iterations, backward_error, backward_error <= tol)
+        last = d_norm
+    return x, RefineInfo(iterations, backward_error, False)
+
+
+def _Correction(LU, P, r, backend):
+    # solve A * d = r on the packed factors, d is kept in float
+    X = Matrix.from_rows([[r[P[i]]] for i in range(LU.rows)], float)
+    if _backend.UseNumpy(backend, float):
+        _backend.NumpyLUSubstitute(LU, X)
+    else:
+        _ForwardSubstitute(LU, X, float)
+        _BackSubstitute(LU, X, float)
+    return X.col(0).tolist()
+
+
+def _Residual(A, x, b, numpy):
+    # r = b - A * x in the arithmetic of A and b, returned in float
+    if numpy is not None:
+        return (b - A @ numpy.array(x)).tolist()
+    if isinstance(A, Matrix):
+        return [e - sum(map(float.__mul__, A.row(i).tolist(), x)) for i, e in enumerate(b)]
+    x = [fractions.Fraction(e) for e in x]
+    return [float(e - sum(a * y for a, y in zip(row, x))) for row, e in zip(A, b)]
+
+
+def _Exact(e):
+    # int and float convert exactly, other types through their float value
+    return fractions.Fraction(e if isinstance(e, (int, float)) else float(e))
+
+
+def TridiagonalSolve(sub, diag, sup, b, eType=float, digits=12):
+    """Tridiagonal Solve
+
+    Solve A * x = b for a tridiagonal A with the Thomas algorithm, Gaussian
+    Elimination without pivoting on the three diagonals in O(n) time and memory.
+    It is stable when A is diagonally dominant or symmetric positive definite.
+
+    Args:
+        sub:    The n - 1 elements below the diagonal, sub[i] = A[i + 1][i].
+        diag:   The n elements on the diagonal.
+        sup:    The n - 1 elements above the diagonal, sup[i] = A[i][i + 1].
+        b:      A vector of length n.
+        eType:  Optional, the dtype of elements in matrix.
+        digits: Optional, the digits of precision in float calculation, None to skip rounding.
+
+    Returns:
+        The solution x as a list.
+    """
+
+    size = len(diag)
+    if len(sub) != size - 1 or len(sup) != size - 1 or len(b) != size:
+        raise ValueError('Expect %d diagonal elements, %d off diagonal ones and a vector of length %d' % (size, size - 1, size))
+    zero = eType(0)
+    # forward sweep, c'i = ci / (di - ai * c'i-1), b'i = (bi - ai * b'i-1) / (di - ai * c'i-1)
+    c = [zero] * size
+    x = [zero] * size
+    for i in range(size):
+        d = eType(diag[i])
+        y = eType(b[i])
+        if i > 0:
+            a = eType(sub[i - 1])
+            d = d - a * c[i - 1]
+            y = y - a * x[i - 1]
+        if d == zero or abs(d) < eType(1e-12):
+            raise SigularMatrixError("Tridiagonal Solve meets a zero pivot.")
+        if i < size - 1:
+            c[i] = eType(sup[i]) / d
+        x[i] = y / d
+    # back substitution, xi = b'i - c'i * xi+1
+    for i in reversed(range(size - 1)):
+        x[i] = x[i] - c[i] * x[i + 1]
+    if eType == float and digits is not None:
+        x = RoundMatrix([x], digits)[0]
+    return x
+
+
+def StructuredSolve(A, b, eType=float, digits=12, structure=None, backend=None):
+    """Structured Solve
+
+    Solve A * x = b with the cheapest method for the structure of A: substitution
+    for a triangular A, TridiagonalSolve for a diagonally dominant tridiagonal A,
+    banded LU for a banded A, Cholesky (LDL* for exact types) for a symmetric
+    positive definite A and LUSolve otherwise.
+
+    Args:
+        A:         A square matrix instance.
+        b:         A vector, or a matrix whose columns are the right-hand sides.
+        eType:     Optional, the dtype of elements in matrix.
+        digits:    Optional, the digits of precision in float calculation, None to skip rounding.
+        structure: Optional, the Structure of A, DetectStructure(A) is used if not given.
+        backend:   Optional, 'python' or 'numpy', see SetBackend, used by LUSolve only.
+
+    Returns:
+        The solution x, a list for a vector b and a Matrix otherwise.
+    """
+
+    if structure is None:
+        structure = DetectStructure(A)
+    size = len(A)
+    kind = structure.kind
+
+    if kind == 'tridiagonal' and _DiagonallyDominant(A, size):
+        vector = len(b) != 0 and not hasattr(b[0], '__len__')
+        sub = [A[i + 1][i] for i in range(size - 1)]
+        diag = [A[i][i] for i in range(size)]
+        sup = [A[i][i + 1] for i in range(size - 1)]
+        if vector:
+            return TridiagonalSolve(sub, diag, sup, b, eType, digits)
+        X = Matrix.from_rows(b, eType)
+        for j in range(X.cols):
+            X.col(j)[:] = TridiagonalSolve(sub, diag, sup, X.col(j).tolist(), eType, digits=None)
+    elif kind in ('diagonal', 'upper', 'lower'):
+        T = Matrix.from_rows(A, eType)
+        for i in range(size):
+            if T[i, i] == eType(0) or abs(T[i, i]) < eType(1e-12):
+                raise SigularMatrixError("Structured Solve cannot apply on a sigular matrix.")
+        X, vector = _RightHandSides(b, size, None, eType)
+        if kind == 'lower':
+            _ForwardSubstitute(T, X, eType, unit=False)
+        else:
+            _BackSubstitute(T, X, eType, band=structure.upper)
+    elif kind in ('tridiagonal', 'banded'):
+        LU, P = _BandedPackedLU(A, size, structure.lower, structure.upper, eType)
+        X, vector = _RightHandSides(b, size, P, eType)
+        # the row exchanges carry the multipliers of earlier steps along, L is not banded
+        _ForwardSubstitute(LU, X, eType)
+        _BackSubstitute(LU, X, eType, band=structure.lower + structure.upper)
+    elif structure.symmetric:
+        try:
+            if eType == float:
+                L = CholeskyFactorization(A, eType, digits=None)
+            else:
+                L, D = LDLFactorization(A, eType, digits=None)
+                if any(D[i, i] < eType(0) for i in range(size)):
+                    return LUSolve(A, b, eType, digits, backend)
+        except SigularMatrixError:
+            return LUSolve(A, b, eType, digits, backend)
+        # solve L * y = b, then L* * x = y (with D * z = y between for LDL*)
+        X, vector = _RightHandSides(b, size, None, eType)
+        _ForwardSubstitute(L, X, eType, unit=eType != float)
+        if eType != float:
+            for i in range(size):
+                X.scale_row(i, eType(1) / D[i, i])
+        _BackSubstitute(L.T, X, eType)
+    else:
+        return LUSolve(A, b, eType, digits, backend)
+
+    if eType == float and digits is not None:
+        RoundMatrix(X, digits)
+    return X.col(0).tolist() if vector else X
+
+
+def _DiagonallyDominant(A, size):
+    # |aii| >= |ai,i-1| + |ai,i+1| on every row of a tridiagonal A
+    for i in range(size):
+        off = (abs(A[i][i - 1]) if i > 0 else 0) + (abs(A[i][i + 1]) if i < size - 1 else 0)
+        if abs(A[i][i]) < off:
+            return False
+    return True
+
+
+def LUCacheInfo():
+    """Get the hits, misses, maxsize and currsize of the LU factors cache."""
+    return CacheInfo(_hits, _misses, _maxsize, len(_cache))
+
+
+def SetLUCacheSize(maxsize):
+    """Set LU Cache Size
+
+    Bound the number of matrices whose factors are cached, 0 disables the cache.
+
+    Args:
+        maxsize: The maximum number of cached factorizations.
+    """
+
+    global _maxsize
+    if maxsize < 0:
+        raise ValueError('maxsize must not be negative, not %d' % maxsize)
+    _maxsize = maxsize
+    while len(_cache) > _maxsize:
+        _cache.popitem(last=False)
+
+
+def ClearLUCache():
+    """Drop the cached factors and reset the hit and miss counters."""
+    global _hits, _misses
+    _cache.clear()
+    _hits = _misses = 0
+
+
+def _Factor(A, eType, backend, typecode='d'):
+    global _hits, _misses
+    backend = 'numpy' if _backend.UseNumpy(backend, eType) else 'python'
+    key = (eType, backend, typecode, _Fingerprint(A))
+    factors = _cache.get(key)
+    if factors is not None:
+        _hits += 1
+        _cache.move_to_end(key)
+        return factors
+    _misses += 1
+    factors = PackedLUFactorization(A, eType, digits=None, backend=backend, typecode=typecode)
+    if _maxsize > 0:
+        _cache[key] = factors
+        if len(_cache) > _maxsize:
+            _cache.popitem(last=False)
+    return factors
+
+
+def _Fingerprint(A):
+    # digest of the shape and the elements of A
+    rows = len(A)
+    cols = len(A[0]) if rows else 0
+    h = hashlib.blake2b(b'%d,%d;' % (rows, cols), digest_size=16)
+    data = A.data if isinstance(A, Matrix) else None
+    if data is not None and not isinstance(data, list) and A.is_contiguous():
+        # hash the unboxed storage directly
+        view = memoryview(data)[A.offset:A.offset + rows * cols]
+        h.update(view.format.encode())
+        h.update(view.cast('B'))
+        return h.digest()
+    values = [e for row in A for e in row]
+    if all(type(e) == float for e in values):
+        h.update(b'd')
+        h.update(array('d', values).tobytes())
+    else:
+        h.update(','.join(map(str, values)).encode())
+    return h.digest()
+
+
+def _RightHandSides(b, size, P, eType):
+    # one right-hand side per column of X, rows are permuted as PA if P is given
+    vector = len(b) != 0 and not hasattr(b[0], '__len__')
+    if len(b) != size:
+        if vector:
+            raise ValueError('Expect a vector of length %d not %d' % (size, len(b)))
+        raise ValueError('Expect a matrix with %d rows not %d' % (size, len(b)))
+    order = range(size) if P is None else P
+    if vector:
+        return Matrix.from_rows([[b[p]] for p in order], eType), True
+    return Matrix.from_rows([b[p] for p in order], eType), False
+
+
+def _ForwardSubstitute(L, X, eType, unit=True, band=None):
+    # solve L * Y = X in place on every column of X, L is (unit) lower triangular
+    # with band elements below the diagonal
+    size = L.rows
+    zero = eType(0)
+    for i in range(size):
+        for k in range(0 if band is None else max(i - band, 0), i):
+            l_ik = L[i, k]
+            if l_ik != zero:
+                X.add_row(i, k, -l_ik)
+        if not unit:
+            X.scale_row(i, eType(1) / L[i, i])
+
+
+def _BackSubstitute(U, X, eType, band=None):
+    # solve U * Y = X in place on every column of X, U is upper triangular
+    # with band elements above the diagonal
+    size = U.rows
+    zero = eType(0)
+    for i in reversed(range(size)):
+        for k in range(i + 1, size if band is None else min(i + band + 1, size)):
+            u_ik = U[i, k]
+            if u_ik != zero:
+                X.add_row(i, k, -u_ik)
+        u_ii = U[i, i]
+        for j in range(X.cols):
+            X[i, j] = X[i, j] / u_ii
+
+
+# snake_case aliases
+lu_solve = LUSolve
+det = Det
+inverse = Inverse
+lstsq = Lstsq
+refine_solve = RefineSolve
+tridiagonal_solve = TridiagonalSolve
+structured_solve = StructuredSolve
@@ -0,0 +1,462 @@
+import heapq
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+
+from libb.exception import SigularMatrixError, NotSquareMatrixError
+from libb.matrix import Matrix
+
+FillStats = namedtuple('FillStats', ('nnz_a', 'nnz_l', 'nnz_u', 'fill_in', 'fill_ratio'))
+
+
+# compressed sparse storage, entries of major line k are indices/data[indptr[k]:indptr[k + 1]]
+class _Compressed():
+    __slots__ = ('rows', 'cols', 'indptr', 'indices', 'data')
+
+    # construction
+    def __init__(self, rows, cols, indptr, indices, data):
+        self.rows = rows
+        self.cols = cols
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+
+    @property
+    def shape(self):
+        return (self.rows, self.cols)
+
+    @property
+    def nnz(self):
+        return len(self.indices)
+
+    def __len__(self):
+        return self.rows
+
+    # overload op "[]", A[i, j] is an element, missing ones are 0, CSRMatrix and
+    # CSCMatrix map (i, j) to their (major, minor) indices by _major
+    def __getitem__(self, key):
+        major, minor = self._major(*key)
+        start, end = self.indptr[major], self.indptr[major + 1]
+        p = bisect_left(self.indices, minor, start, end)
+        if p < end and self.indices[p] == minor:
+            return self.data[p]
+        return type(self.data[0])(0) if len(self.data) else 0.
+
+    def __repr__(self):
+        return '%s(shape=%s, nnz=%d)' % (type(self).__name__, self.shape, self.nnz)
+
+    @staticmethod
+    def _compress(majors, count, minors, values, eType):
+        # bucket (major, minor, value) triples by major, sort the minors and sum duplicates
+        buckets = [[] for k in range(count)]
+        for k, l, v in zip(majors, minors, values):
+            buckets[k].append((l, v))
+        indptr = array('q', [0])
+        indices = array('q')
+        data = array('d') if eType == float else []
+        for bucket in buckets:
+            bucket.sort(key=lambda e: e[0])
+            last = -1
+            for l, v in bucket:
+                v = v if type(v) == eType else eType(v)
+                if l == last:
+                    data[-1] = data[-1] + v
+                else:
+                    indices.append(l)
+                    data.append(v)
+                    last = l
+            indptr.append(len(indices))
+        return indptr, indices, data
+
+    @staticmethod
+    def _transpose(count, indptr, indices, data, minor_count):
+        # counting sort of the entries by minor index, minors of the result stay sorted
+        ptr = array('q', bytes(8 * (minor_count + 1)))
+        for l in indices:
+            ptr[l + 1] += 1
+        for l in range(minor_count):
+            ptr[l + 1] += ptr[l]
+        t_indices = array('q', bytes(8 * len(indices)))
+        t_data = array('d', bytes(8 * len(data))) if isinstance(data, array) else [None] * len(data)
+        head = ptr[:-1]
+        for k in range(count):
+            for p in range(indptr[k], indptr[k + 1]):
+                l = indices[p]
+                q = head[l]
+                t_indices[q] = k
+                t_data[q] = data[p]
+                head[l] = q + 1
+        return ptr, t_indices, t_data
+
+
+class CSRMatrix(_Compressed):
+    """Compressed sparse row matrix, row i holds columns indices[indptr[i]:indptr[i + 1]]."""
+    __slots__ = ()
+
+    @staticmethod
+    def from_coo(rows, cols, I, J, V, eType=float):
+        # build from coordinate triples, duplicates are summed
+        return CSRMatrix(rows, cols, *_Compressed._compress(I, rows, J, V, eType))
+
+    @staticmethod
+    def from_dense(A, eType=float):
+        I, J, V = _Coordinates(A)
+        return CSRMatrix.from_coo(len(A), len(A[0]) if len(A) else 0, I, J, V, eType)
+
+    def _major(self, i, j):
+        return i, j
+
+    def tocsr(self):
+        return self
+
+    def tocsc(self):
+        return CSCMatrix(self.rows, self.cols, *_Compressed._transpose(self.rows, self.indptr, self.indices, self.data, self.cols))
+
+    def todense(self):
+        eType = float if isinstance(self.data, array) else type(self.data[0]) if len(self.data) else float
+        M = Matrix.zeros(self.rows, self.cols, eType)
+        for i in range(self.rows):
+            for p in range(self.indptr[i], self.indptr[i + 1]):
+                M[i, self.indices[p]] = self.data[p]
+        return M
+
+    # y = A * x
+    def matvec(self, x):
+        indptr, indices, data = self.indptr, self.indices, self.data
+        y = []
+        for i in range(self.rows):
+            s = 0
+            for p in range(indptr[i], indptr[i + 1]):
+                s = s + data[p] * x[indices[p]]
+            y.append(s)
+        return y
+
+
+class CSCMatrix(_Compressed):
+    """Compressed sparse column matrix, column j holds rows indices[indptr[j]:indptr[j + 1]]."""
+    __slots__ = ()
+
+    @staticmethod
+    def from_coo(rows, cols, I, J, V, eType=float):
+        # build from coordinate triples, duplicates are summed
+        return CSCMatrix(rows, cols, *_Compressed._compress(J, cols, I, V, eType))
+
+    @staticmethod
+    def from_dense(A, eType=float):
+        I, J, V = _Coordinates(A)
+        return CSCMatrix.from_coo(len(A), len(A[0]) if len(A) else 0, I, J, V, eType)
+
+    def _major(self, i, j):
+        return j, i
+
+    def tocsc(self):
+        return self
+
+    def tocsr(self):
+        return CSRMatrix(self.rows, self.cols, *_Compressed._transpose(self.cols, self.indptr, self.indices, self.data, self.rows))
+
+    def todense(self):
+        return self.tocsr().todense()
+
+    # y = A * x
+    def matvec(self, x):
+        indptr, indices, data = self.indptr, self.indices, self.data
+        y = [0] * self.rows
+        for j in range(self.cols):
+            for p in range(indptr[j], indptr[j + 1]):
+                y[indices[p]] = y[indices[p]] + data[p] * x[j]
+        return y
+
+
+def _Coordinates(A):
+    # nonzero (i, j, value) of a dense matrix
+    I, J, V = [], [], []
+    for i, row in enumerate(A):
+        for j, e in enumerate(row):
+            if e != 0:
+                I.append(i)
+                J.append(j)
+                V.append(e)
+    return I, J, V
+
+
+def LoadMatrixMarket(src, header=None, dtype=int):
+    """Load Matrix Market
+
+    Read a Matrix Market coordinate file into a CSRMatrix. General, symmetric and
+    skew-symmetric matrices with integer, real or pattern fields are supported.
+
+    Args:
+        src:    An opened file.
+        header: Optional, the banner line if it is consumed already.
+        dtype:  Optional, the dtype of elements, a real field is read as float.
+
+    Returns:
+        The CSRMatrix, its row's num and its col's num.
+    """
+
+    header = (src.readline() if header is None else header).lower().split()
+    if len(header) < 5 or header[0] != '%%matrixmarket' or header[1] != 'matrix' or header[2] != 'coordinate':
+        raise ValueError('Expect a Matrix Market coordinate file')
+    field, symmetry = header[3], header[4]
+    if field not in ('integer', 'real', 'pattern') or symmetry not in ('general', 'symmetric', 'skew-symmetric'):
+        raise ValueError('Unsupported Matrix Market format %s %s' % (field, symmetry))
+    eType = float if field == 'real' and dtype == int else dtype
+
+    size = None
+    I, J, V = array('q'), array('q'), []
+    for line in src:
+        # skip comments and blank lines
+        if line.startswith('%') or not line.strip():
+            continue
+        line = line.split()
+        if size is None:
+            size = tuple(map(int, line))
+            continue
+        i, j = int(line[0]) - 1, int(line[1]) - 1
+        v = eType(1) if field == 'pattern' else eType(line[2])
+        I.append(i)
+        J.append(j)
+        V.append(v)
+        # the other triangle of a symmetric matrix is implied
+        if symmetry != 'general' and i != j:
+            I.append(j)
+            J.append(i)
+            V.append(-v if symmetry == 'skew-symmetric' else v)
+    if size is None:
+        raise ValueError('Missing the size line of the Matrix Market file')
+    row_num, col_num, nnz = size
+    return CSRMatrix.from_coo(row_num, col_num, I, J, V, eType), row_num, col_num
+
+
+def MinimumDegreeOrdering(A):
+    """Minimum Degree Ordering
+
+    Order the columns of A to reduce fill-in of its LU factors. Columns are
+    eliminated in minimum degree order on the graph of A* * A (two columns are
+    adjacent if they share a row), rows much denser than average are ignored
+    as COLAMD does.
+
+    Args:
+        A: A CSRMatrix or CSCMatrix.
+
+    Returns:
+        The column order, a list of column indices.
+    """
+
+    A = A.tocsr()
+    n = A.cols
+    indptr, indices = A.indptr, A.indices
+    dense = max(16, int(10 * n ** 0.5))
+    adj = [set() for j in range(n)]
+    for i in range(A.rows):
+        columns = indices[indptr[i]:indptr[i + 1]]
+        if len(columns) > dense:
+            continue
+        for j in columns:
+            adj[j].update(columns)
+    for j in range(n):
+        adj[j].discard(j)
+
+    # eliminate the column of minimum degree, its neighbours become a clique
+    heap = [(len(adj[j]), j) for j in range(n)]
+    heapq.heapify(heap)
+    order = []
+    while heap:
+        degree, v = heapq.heappop(heap)
+        if adj[v] is None or degree != len(adj[v]):
+            continue
+        order.append(v)
+        neighbours, adj[v] = adj[v], None
+        for u in neighbours:
+            adj_u = adj[u]
+            adj_u.discard(v)
+            adj_u |= neighbours
+            adj_u.discard(u)
+            heapq.heappush(heap, (len(adj_u), u))
+    return order
+
+
+def SparseLUFactorization(A, eType=float, threshold=0.1, ordering='mindeg'):
+    """Sparse LU Factorization
+
+    Left-looking (Gilbert-Peierls) LU Factorization of a sparse square matrix.
+    Columns are taken in a fill-reducing order, the pattern of each column of the
+    factors is found by a depth first search through L, and the pivot is chosen
+    by threshold partial pivoting: among the rows whose magnitude is at least
+    threshold times the largest one, the diagonal is preferred, then the row
+    with the fewest nonzeros in A.
+
+    Args:
+        A:         A CSRMatrix, CSCMatrix or a dense square matrix.
+        eType:     Optional, the dtype of elements in matrix.
+        threshold: Optional, the pivoting threshold in (0, 1], 1 is partial pivoting.
+        ordering:  Optional, 'mindeg' (MinimumDegreeOrdering), 'natural' or a column order.
+
+    Returns:
+        L, U, P, Q, stats: L (unit lower, its diagonal is not stored) and U (upper)
+        are CSCMatrix with (L + I) * U = PAQ, row i of PAQ is the element
+        A[P[i]][Q[j]] in column j, stats is a FillStats with the nonzero counts and
+        the fill-in.
+    """
+
+    if isinstance(A, CSRMatrix):
+        C = A.tocsc()
+    elif isinstance(A, CSCMatrix):
+        C = A
+    else:
+        C = CSCMatrix.from_dense(A, eType)
+    n = C.rows
+    if C.cols != n:
+        raise NotSquareMatrixError('Except a square matrix with shape (%d,%d) not (%d, %d)' % (n, n, n, C.cols))
+    if not 0 < threshold <= 1:
+        raise ValueError('threshold must be in (0, 1], not %r' % (threshold,))
+
+    if ordering == 'mindeg':
+        order = MinimumDegreeOrdering(C)
+    elif ordering == 'natural':
+        order = list(range(n))
+    else:
+        order = list(ordering)
+        if sorted(order) != list(range(n)):
+            raise ValueError('ordering must be a permutation of the columns')
+
+    c_ptr, c_idx, c_val = C.indptr, C.indices, C.data
+    # nonzeros of each row of A, sparse rows are preferred as pivots
+    row_count = [0] * n
+    for i in c_idx:
+        row_count[i] += 1
+
+    zero = eType(0)
+    eps = eType(1e-12)
+    # pinv[r] is the step where row r is the pivot, prow[k] is the pivot row of step k
+    pinv, prow = [-1] * n, [0] * n
+    # L keeps the original row indices until the end, U the step indices
+    Lp, Li, Lx = [0], [], []
+    Up, Ui, Ux = [0], [], []
+    x = [zero] * n
+    mark = [-1] * n
+    for k, col in enumerate(order):
+        # depth first search from every row of A[:, col], post holds the steps in post order
+        post, pattern = [], []
+        for p in range(c_ptr[col], c_ptr[col + 1]):
+            i = c_idx[p]
+            if mark[i] == k:
+                continue
+            mark[i] = k
+            stack = [(i, None)]
+            while stack:
+                r, ptr = stack[-1]
+                j = pinv[r]
+                if j < 0:
+                    stack.pop()
+                    pattern.append(r)
+                    continue
+                ptr = Lp[j] if ptr is None else ptr
+                end = Lp[j + 1]
+                while ptr < end and mark[Li[ptr]] == k:
+                    ptr += 1
+                if ptr < end:
+                    child = Li[ptr]
+                    mark[child] = k
+                    stack[-1] = (r, ptr + 1)
+                    stack.append((child, None))
+                else:
+                    stack.pop()
+                    post.append(j)
+
+        # x = L \ A[:, col], in topological order of the steps
+        for p in range(c_ptr[col], c_ptr[col + 1]):
+            x[c_idx[p]] = eType(c_val[p])
+        for j in reversed(post):
+            r = prow[j]
+            x_j = x[r]
+            x[r] = zero
+            Ui.append(j)
+            Ux.append(x_j)
+            if x_j != zero:
+                for q in range(Lp[j], Lp[j + 1]):
+                    x[Li[q]] -= Lx[q] * x_j
+
+        # threshold partial pivoting among the rows not pivoted yet
+        big = zero
+        for r in pattern:
+            if abs(x[r]) > big:
+                big = abs(x[r])
+        if big == zero or big < eps:
+            raise SigularMatrixError("LU Factorization cannot apply on a sigular matrix.")
+        limit = big * eType(threshold)
+        if mark[col] == k and pinv[col] < 0 and abs(x[col]) >= limit:
+            best = col
+        else:
+            best = None
+            for r in pattern:
+                if abs(x[r]) >= limit and (best is None or row_count[r] < row_count[best] or
+                                           (row_count[r] == row_count[best] and abs(x[r]) > abs(x[best]))):
+                    best = r
+        pivot = x[best]
+        pinv[best] = k
+        prow[k] = best
+        Ui.append(k)
+        Ux.append(pivot)
+        Up.append(len(Ui))
+        # L[:, k] = x / pivot below the pivot
+        for r in pattern:
+            if r != best and x[r] != zero:
+                Li.append(r)
+                Lx.append(x[r] / pivot)
+            x[r] = zero
+        Lp.append(len(Li))
+
+    L = _SortedCSC(n, Lp, [pinv[r] for r in Li], Lx, eType)
+    U = _SortedCSC(n, Up, Ui, Ux, eType)
+    nnz_a = C.nnz
+    stats = FillStats(nnz_a, L.nnz, U.nnz, L.nnz + U.nnz - nnz_a, (L.nnz + U.nnz) / nnz_a if nnz_a else 0.)
+    return L, U, prow, order, stats
+
+
+def SparseLUSolve(L, U, P, Q, b):
+    """Sparse LU Solve
+
+    Solve A * x = b with the factors from SparseLUFactorization.
+
+    Args:
+        L, U, P, Q: The factors of A returned by SparseLUFactorization.
+        b:          A vector.
+
+    Returns:
+        The solution x as a list.
+    """
+
+    n = L.rows
+    y = [b[P[i]] for i in range(n)]
+    # L * z = Pb, L is unit lower triangular
+    for j in range(n):
+        y_j = y[j]
+        if y_j != 0:
+            for p in range(L.indptr[j], L.indptr[j + 1]):
+                y[L.indices[p]] -= L.data[p] * y_j
+    # U * w = z, the diagonal is the last entry of each column
+    for j in reversed(range(n)):
+        end = U.indptr[j + 1] - 1
+        y[j] = y[j] / U.data[end]
+        y_j = y[j]
+        for p in range(U.indptr[j], end):
+            y[U.indices[p]] -= U.data[p] * y_j
+    # x = Q * w
+    x = [None] * n
+    for k in range(n):
+        x[Q[k]] = y[k]
+    return x
+
+
+def _SortedCSC(n, ptr, idx, val, eType):
+    # CSCMatrix from columns whose row indices are not sorted
+    indptr = array('q', ptr)
+    indices = array('q')
+    data = array('d') if eType == float else []
+    for j in range(n):
+        column = sorted(zip(idx[ptr[j]:ptr[j + 1]], val[ptr[j]:ptr[j + 1]]), key=lambda e: e[0])
+        indices.extend(i for i, v in column)
+        data.extend(v for i, v in column)
+    return CSCMatrix(n, n, indptr, indices, data)
@@ -0,0 +1,191 @@
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+from libb.exception import SigularMatrixError, NotSquareMatrixError
+from libb.utils import MapMatrix
+from libb import backend as _backend
+from libb import instrument as _instrument
+
+# default budget in bytes of the resident panel, block row and tiles
+MEMORY = 1 << 30
+# largest default block size, the panel factorization is O(nb^2) per step
+MAX_BLOCK = 1024
+
+
+def TiledLUFactorization(path, shape=None, typecode='d', offset=0, memory=MEMORY, block=None, backend=None):
+    """Tiled LU Factorization
+
+    Factor the square matrix of a raw or .npy file in place and out of core by
+    the right-looking blocked LU. Each step loads the column panel of the next
+    block columns, factors it with partial pivoting within the panel, swaps the
+    pivot rows in the rest of the file, solves the block row of U and updates
+    the trailing matrix tile by tile. The tiles are read and written in file
+    order on an I/O thread, the next tile is read while the current one is
+    updated. Only the panel, the block row of U and three tiles are resident.
+
+        libb.WriteMatrix(A_matrix, open('A.npy', 'wb'), 'npy')
+        LU, P = libb.TiledLUFactorization('A.npy', memory=8 << 30)
+
+    Args:
+        path:     The matrix file, see MapMatrix, it is overwritten by the factors.
+        shape:    Optional, the shape of a raw file.
+        typecode: Optional, 'd' or 'f', the element type of a raw file.
+        offset:   Optional, the number of bytes before the matrix in a raw file.
+        memory:   Optional, the budget in bytes of the resident blocks, it sets the block size.
+        block:    Optional, the block size, default to the largest one within memory
+                  (at most MAX_BLOCK).
+        backend:  Optional, 'python' or 'numpy', see SetBackend.
+
+    Returns:
+        A Matrix and a list: LU, P the packed factors of A as PackedLUFactorization,
+        LU is mapped on the file.
+    """
+
+    LU, size, c_size = MapMatrix(path, shape, typecode, offset, writable=True)
+    if c_size != size:
+        raise NotSquareMatrixError('Except a square matrix with shape (%d,%d) not (%d, %d)' % (size, size, size, c_size))
+    data = LU.data
+    if data.format not in ('d', 'f'):
+        raise ValueError('Expect a float matrix file, not typecode %r' % data.format)
+    if block is None:
+        block = _BlockSize(size, data.itemsize, memory)
+    block = max(1, min(block, size))
+    numpy = _backend.numpy if _backend.UseNumpy(backend, float) else None
+    A = numpy.asarray(data).reshape(size, size) if numpy is not None else data
+    read, write = _TileIO(A, size, data.format, numpy)
+    prof = _instrument.Active()
+    if prof:
+        t = prof.start()
+        prof.allocate(2 * size * block + 3 * block * block, 5)
+
+    P = list(range(size))
+    for k0 in range(0, size, block):
+        k1 = min(k0 + block, size)
+        # factor the panel A[k0:, k0:k1] with partial pivoting, write it back
+        panel = read(k0, size, k0, k1)
+        pivots = _FactorPanel(panel, numpy)
+        write(k0, k0, panel)
+        if prof:
+            t = prof.lap('tiled_lu.panel', t, (size - k0) * (k1 - k0) ** 2)
+
+        # the same interchanges on the columns left and right of the panel
+        for c, p in enumerate(pivots):
+            if p != c:
+                P[k0 + c], P[k0 + p] = P[k0 + p], P[k0 + c]
+                for c0, c1 in ((0, k0), (k1, size)):
+                    if c0 < c1:
+                        row_c, row_p = read(k0 + c, k0 + c + 1, c0, c1), read(k0 + p, k0 + p + 1, c0, c1)
+                        write(k0 + c, c0, row_p)
+                        write(k0 + p, c0, row_c)
+        if prof:
+            t = prof.lap('tiled_lu.swap', t)
+        if k1 == size:
+            break
+
+        # U12 = L11^-1 * A12, the block row is one sequential band of the file
+        U = read(k0, k1, k1, size)
+        _UnitLowerSolve(panel, U, numpy)
+        write(k0, k1, U)
+        if prof:
+            t = prof.lap('tiled_lu.strip', t, (k1 - k0) ** 2 * (size - k1))
+
+        # A22 = A22 - L21 * U12 tile by tile, reading the next tile and writing the last on the I/O thread
+        tiles = [(i0, j0) for i0 in range(k1, size, block) for j0 in range(k1, size, block)]
+        with ThreadPoolExecutor(max_workers=1) as io:
+            pending = io.submit(read, k1, min(k1 + block, size), k1, min(k1 + block, size))
+            written = None
+            for idx, (i0, j0) in enumerate(tiles):
+                C = pending.result()
+                if idx + 1 < len(tiles):
+                    i, j = tiles[idx + 1]
+                    pending = io.submit(read, i, min(i + block, size), j, min(j + block, size))
+                _UpdateTile(C, panel, U, i0 - k0, j0 - k1, numpy)
+                # at most three tiles are resident, the last write has finished during the update
+                if written is not None:
+                    written.result()
+                written = io.submit(write, i0, j0, C)
+            written.result()
+        if prof:
+            t = prof.lap('tiled_lu.update', t, 2 * (size - k1) ** 2 * (k1 - k0))
+
+    # write the dirty pages back to the file
+    if hasattr(data.obj, 'flush'):
+        data.obj.flush()
+    return LU, P
+
+
+def _BlockSize(size, itemsize, memory):
+    # the panel and the block row take 2 * size * b elements, three tiles 3 * b^2
+    elements = memory // itemsize
+    b = int((-2 * size + (4 * size * size + 12 * elements) ** 0.5) / 6)
+    return max(1, min(b, size, MAX_BLOCK))
+
+
+def _TileIO(A, size, typecode, numpy):
+    # read(r0, r1, c0, c1) copies A[r0:r1, c0:c1] into a tile, write(r0, c0, tile) copies it back,
+    # a tile is a ndarray or a list of rows
+    if numpy is not None:
+        def read(r0, r1, c0, c1):
+            return A[r0:r1, c0:c1].copy()
+
+        def write(r0, c0, tile):
+            A[r0:r0 + tile.shape[0], c0:c0 + tile.shape[1]] = tile
+        return read, write
+
+    def read(r0, r1, c0, c1):
+        return [A[i * size + c0:i * size + c1].tolist() for i in range(r0, r1)]
+
+    def write(r0, c0, tile):
+        for i, row in enumerate(tile):
+            a = (r0 + i) * size + c0
+            A[a:a + len(row)] = array(typecode, row)
+    return read, write
+
+
+def _FactorPanel(panel, numpy):
+    # LU with partial pivoting of a tall panel in place, returns the pivot row of each column
+    if numpy is not None:
+        return _backend.NumpyFactorPanel(panel)
+    pivots = []
+    rows, cols = len(panel), len(panel[0])
+    for c in range(min(rows, cols)):
+        p = max(range(c, rows), key=lambda r: abs(panel[r][c]))
+        if abs(panel[p][c]) < 1e-12:
+            raise SigularMatrixError("LU Factorization cannot apply on a sigular matrix.")
+        panel[c], panel[p] = panel[p], panel[c]
+        pivots.append(p)
+        pivot = panel[c]
+        for r in range(c + 1, rows):
+            row = panel[r]
+            m = row[c] / pivot[c]
+            row[c] = m
+            if m:
+                row[c + 1:] = [x - m * y for x, y in zip(row[c + 1:], pivot[c + 1:])]
+    return pivots
+
+
+def _UnitLowerSolve(panel, U, numpy):
+    # U = L11^-1 * U, L11 is the unit lower triangle on top of the panel
+    if numpy is not None:
+        _backend.NumpyUnitLowerSolve(panel, U)
+        return
+    for r in range(1, len(U)):
+        row, l_row = U[r], panel[r]
+        for l in range(r):
+            if l_row[l]:
+                m, u = l_row[l], U[l]
+                row = [x - m * y for x, y in zip(row, u)]
+        U[r] = row
+
+
+def _UpdateTile(C, panel, U, i, j, numpy):
+    # C = C - L21[i:, :] * U12[:, j:], the tile C starts at row i of the panel and column j of U
+    if numpy is not None:
+        C -= panel[i:i + C.shape[0]] @ U[:, j:j + C.shape[1]]
+        return
+    width = len(C[0])
+    segments = [u[j:j + width] for u in U]
+    for p, row in enumerate(C):
+        for m, u in zip(panel[i + p], segments):
+            if m:
+                row[:] = [x - m * y for x, y in zip(row, u)]
@@ -0,0 +1,167 @@
+import os
+from collections import deque, namedtuple
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from libb.factorization import HouseholderReduction, ApplyHouseholderReflectors
+from libb.matrix import Matrix
+from libb.utils import RoundMatrix
+
+# the local QR of one tree node: its Householder reflectors, the row counts of the
+# blocks (or child R factors) stacked as its input, and the number of rows of its R
+TSQRFactor = namedtuple('TSQRFactor', ('reflectors', 'sizes', 'rank'))
+
+
+def TSQR(A, eType=float, digits=12, block=None, arity=2, workers=None, keepQ=True, backend=None):
+    """Tall Skinny QR
+
+    Communication-avoiding QR of a tall matrix. The rows are split into blocks,
+    each block is factored by HouseholderReduction in a worker process, then the
+    small R factors are stacked arity at a time and factored again, level by level,
+    until one R is left. Only the R factors travel between the levels, Q is kept
+    implicitly as the tree of the local reflectors, see ApplyTSQR.
+
+    Row blocks may be streamed, e.g. from LoadMatrices on a file of blocks split by
+    empty lines, at most 2 * workers blocks are held by this process at a time.
+
+        Q, R = libb.TSQR(libb.LoadMatrices(open('tall.txt'), dtype=float), workers=8)
+
+    Args:
+        A:       A tall matrix instance, or an iterable of row blocks (matrices with
+                 the same number of columns, or the (matrix, rows, cols) records of
+                 LoadMatrices).
+        eType:   Optional, the dtype of elements in matrix.
+        digits:  Optional, the digits to round R to, None to skip rounding.
+        block:   Optional, the rows of each block when A is one matrix, default to
+                 split it evenly among the workers.
+        arity:   Optional, the number of R factors combined by each node of the tree.
+        workers: Optional, the number of worker processes, default to the number of
+                 cores, 1 factors in this process.
+        keepQ:   Optional, keep the reflectors of the blocks, they take as much memory
+                 as A. Without them Q is None, R is enough for least squares normal
+                 equations and singular values.
+        backend: Optional, 'python' or 'numpy', see SetBackend.
+
+    Returns:
+        Q, R: Q is a list of tree levels from the blocks to the root, each a list of
+        TSQRFactor, R is a Matrix with A = Q * R.
+    """
+
+    if arity < 2:
+        raise ValueError('arity must be at least 2, not %d' % arity)
+    workers = workers or os.cpu_count()
+    blocks = _RowBlocks(A, block, workers)
+    with (ProcessPoolExecutor(max_workers=workers) if workers > 1 else _InProcess()) as executor:
+        # factor the blocks as they come in, keep at most 2 * workers of them in flight
+        pending, leaves, Rs = deque(), [], []
+        for B in blocks:
+            pending.append(executor.submit(_LocalQR, B, eType, backend, keepQ))
+            while len(pending) >= 2 * workers:
+                factor, R = pending.popleft().result()
+                leaves.append(factor)
+                Rs.append(R)
+        while pending:
+            factor, R = pending.popleft().result()
+            leaves.append(factor)
+            Rs.append(R)
+        if not Rs:
+            raise ValueError('Expect at least one row block')
+
+        # combine arity R factors at a time up to the root
+        tree = [leaves]
+        while len(Rs) > 1:
+            groups = [Rs[i:i + arity] for i in range(0, len(Rs), arity)]
+            futures = [executor.submit(_LocalQR, [row for R in group for row in R], eType, backend, keepQ,
+                                       tuple(len(R) for R in group)) for group in groups]
+            results = [future.result() for future in futures]
+            tree.append([factor for factor, R in results])
+            Rs = [R for factor, R in results]
+
+    R = Matrix.from_rows(Rs[0], eType)
+    if eType == float:
+        R = RoundMatrix(R, digits)
+    return (tree if keepQ else None), R
+
+
+def ApplyTSQR(Q, x, transpose=False):
+    """Apply TSQR
+
+    Multiply a vector (or a matrix) by the implicit Q returned by TSQR. Q is thin,
+    m x n for an m x n A with m >= n.
+
+    Args:
+        Q:         The tree of TSQRFactor returned by TSQR.
+        x:         A vector or a matrix, of n rows for Q * x and m rows for Q* * x.
+        transpose: Optional, compute Q* * x instead of Q * x.
+
+    Returns:
+        A vector (list) or a matrix (list of rows).
+    """
+
+    if Q is None:
+        raise ValueError('TSQR was run with keepQ=False, Q is not kept')
+    vector = len(x) == 0 or not hasattr(x[0], '__len__')
+    X = [[e] for e in x] if vector else [list(row) for row in x]
+    zero = type(X[0][0])(0) if X else 0.
+    if transpose:
+        # Q* = Q_root* ... Q_leaves*, each node keeps the first rank rows of Qi* * x
+        for level in Q:
+            rows, offset = [], 0
+            for factor in level:
+                Y = X[offset:offset + sum(factor.sizes)]
+                offset += sum(factor.sizes)
+                ApplyHouseholderReflectors(factor.reflectors, Y, True)
+                rows.extend(Y[:factor.rank])
+            X = rows
+    else:
+        # Q = Q_leaves ... Q_root, each node pads its rank rows of x with zeros to its input rows
+        for level in reversed(Q):
+            rows, offset = [], 0
+            for factor in level:
+                Y = X[offset:offset + factor.rank] + [[zero] * len(X[0]) for _ in range(sum(factor.sizes) - factor.rank)]
+                offset += factor.rank
+                ApplyHouseholderReflectors(factor.reflectors, Y)
+                rows.extend(Y)
+            X = rows
+    return [row[0] for row in X] if vector else X
+
+
+def _LocalQR(A, eType, backend, keep, sizes=None):
+    # Householder QR of one block (or stacked R factors), a short one is kept as its own R,
+    # the reflectors are only sent back if they are kept
+    rows = len(A)
+    sizes = (rows,) if sizes is None else sizes
+    cols = len(A[0]) if rows else 0
+    if rows < cols:
+        return TSQRFactor([], sizes, rows), [list(row) for row in A]
+    reflectors, R = HouseholderReduction(A, eType, digits=None, compact=True, backend=backend)
+    return TSQRFactor(reflectors if keep else [], sizes, cols), [list(row) for row in R]
+
+
+def _RowBlocks(A, block, workers):
+    # one matrix is split into blocks of rows, an iterable of blocks is passed through
+    if hasattr(A, '__getitem__') and len(A) and not hasattr(A[0][0], '__len__'):
+        rows = len(A)
+        block = block or max(len(A[0]), -(-rows // workers))
+        for i in range(0, rows, block):
+            # a slice of a Matrix is a view on all of its storage, copy it before it is sent
+            yield A[i:i + block].copy() if isinstance(A, Matrix) else A[i:i + block]
+        return
+    for B in A:
+        # records of LoadMatrices
+        if isinstance(B, tuple):
+            B = B[0]
+        yield B
+
+
+class _InProcess():
+    # stands for the process pool when there is a single worker
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
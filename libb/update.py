@@ -0,0 +1,280 @@
+from libb.exception import SigularMatrixError
+from libb.factorization import _GivensParameters
+from libb.matrix import Matrix
+
+
+def QRInsertRow(Q, R, k, a, eType=float):
+    """QR Insert Row
+
+    Update the QR factorization of A to the one of A with row a inserted before
+    row k. The new row is annihilated against R by n Givens rotations, each one
+    touches two rows of R and two columns of Q, so the update is O(mn).
+
+    Args:
+        Q:     The Q of A, m x m with R m x n (full) or m x n with R n x n (thin).
+               The rotations from GivensReduction(compact=True) are accepted too
+               when a is appended, i.e. k is the number of rows of A, any other k
+               raises ValueError.
+        R:     The R of A.
+        k:     The index of a in the updated matrix.
+        a:     A vector, the row to insert.
+        eType: Optional, the dtype of elements in matrix.
+
+    Returns:
+        Two Matrix: Q, R of the updated matrix, Q is a longer list of rotations if
+        rotations are given.
+    """
+
+    n = len(R[0])
+    if len(a) != n:
+        raise ValueError('Expect a row of length %d not %d' % (n, len(a)))
+    zero = eType(0)
+
+    # compact Q, P1*...Pk* acts as identity on the appended row k
+    if _IsRotations(Q):
+        p = len(R)
+        # k must be the number of rows of A, at least the rows of R and every row
+        # the rotations touch, a smaller k would rotate rows of A into each other
+        known = max([p] + [j + 1 for i, j, c, s in Q])
+        if k < known:
+            raise ValueError('rotations only take a row appended to A (k = %d at least), not at %d' % (known, k))
+        Rn = _Copy(R, p + 1, n, eType)
+        for j in range(n):
+            Rn[p, j] = _Convert(a[j], eType)
+        rotations = list(Q)
+        for i in range(min(n, p)):
+            if Rn[p, i] == zero:
+                continue
+            c, s = _GivensParameters(Rn[i, i], Rn[p, i])
+            Rn.rotate_rows(i, p, c, s, i)
+            Rn[p, i] = zero
+            rotations.append((i, k, c, s))
+        return rotations, Rn[:p].copy()
+
+    m, p = len(Q), len(Q[0])
+    if k < 0 or k > m:
+        raise IndexError('row index %d out of range [0, %d]' % (k, m))
+    # Q = | Q  0 | with the last row moved to k, R = | R |
+    #     | 0  1 |                                   | a |
+    Qn = Matrix.zeros(m + 1, p + 1, eType)
+    for i in range(m + 1):
+        if i == k:
+            Qn[i, p] = eType(1)
+            continue
+        row = Q[i if i < k else i - 1]
+        for j in range(p):
+            Qn[i, j] = _Convert(row[j], eType)
+    Rn = _Copy(R, p + 1, n, eType)
+    for j in range(n):
+        Rn[p, j] = _Convert(a[j], eType)
+
+    # annihilate row p of R against the diagonal, R = P * R, Q = Q * P*
+    Qt = Qn.T
+    for i in range(min(n, p)):
+        if Rn[p, i] == zero:
+            continue
+        c, s = _GivensParameters(Rn[i, i], Rn[p, i])
+        Rn.rotate_rows(i, p, c, s, i)
+        Rn[p, i] = zero
+        Qt.rotate_rows(i, p, c, s)
+
+    # row p of R is zero now, a thin Q does not need its last column
+    if p < m:
+        return Qn[:, :p].copy(), Rn[:p].copy()
+    return Qn, Rn
+
+
+def QRDeleteRow(Q, R, k, eType=float):
+    """QR Delete Row
+
+    Update the QR factorization of A to the one of A without row k. Row k of Q is
+    rotated to e1 from the bottom up, which leaves R upper Hessenberg, then the
+    first column of Q, the first row of R and row k of Q are dropped. A thin Q is
+    completed with one orthonormal column first. The update is O(m^2) for a full
+    Q and O(mn) for a thin one.
+
+    Args:
+        Q:     The Q of A, m x m with R m x n (full) or m x n with R n x n (thin).
+        R:     The R of A.
+        k:     The index of the row to delete.
+        eType: Optional, the dtype of elements in matrix.
+
+    Returns:
+        Two Matrix: Q, R of the updated matrix.
+    """
+
+    if _IsRotations(Q):
+        raise ValueError('QRDeleteRow needs an explicit Q, not a list of rotations')
+    m, p, n = len(Q), len(Q[0]), len(R[0])
+    if k < 0 or k >= m:
+        raise IndexError('row index %d out of range [0, %d)' % (k, m))
+    zero = eType(0)
+
+    if p < m:
+        # w = ek - Q * Q* * ek orthogonalized twice, Q = | Q  w / ||w|| |
+        Qn = _Copy(Q, m, p + 1, eType)
+        w = [eType(1) if i == k else zero for i in range(m)]
+        for _ in range(2):
+            r = [sum((Qn[i, j] * w[i] for i in range(m)), zero) for j in range(p)]
+            w = [w[i] - sum((Qn[i, j] * r[j] for j in range(p)), zero) for i in range(m)]
+        w_norm = sum((e * e for e in w), zero) ** 0.5
+        if abs(w_norm) < eType(1e-12):
+            raise SigularMatrixError("QR Delete Row cannot complete Q, ek is in the range of Q.")
+        for i in range(m):
+            Qn[i, p] = w[i] / w_norm
+        Rn = _Copy(R, p + 1, n, eType)
+        p += 1
+    else:
+        Qn = _Copy(Q, m, p, eType)
+        Rn = _Copy(R, p, n, eType)
+
+    # rotate row k of Q to alpha * e1 from the bottom up, R = P * R becomes upper Hessenberg
+    Qt = Qn.T
+    for j in range(p - 1, 0, -1):
+        if Qn[k, j] == zero:
+            continue
+        c, s = _GivensParameters(Qn[k, j - 1], Qn[k, j])
+        Qt.rotate_rows(j - 1, j, c, s)
+        Qn[k, j] = zero
+        Rn.rotate_rows(j - 1, j, c, s, j - 1)
+
+    # column 0 of Q is alpha * ek, drop it with row 0 of R and row k of Q
+    Qd = Matrix.zeros(m - 1, p - 1, eType)
+    for i in range(m - 1):
+        Qd[i] = Qn[i if i < k else i + 1][1:]
+    return Qd, Rn[1:].copy()
+
+
+def QRInsertColumn(Q, R, k, a, eType=float):
+    """QR Insert Column
+
+    Update the QR factorization of A to the one of A with column a inserted before
+    column k. Q* * a becomes column k of R and is reduced to upper triangular form
+    by Givens rotations from the bottom up. A thin Q gets the normalized residual
+    of a as a new column. The update is O(m^2) for a full Q and O(mn) for a thin one.
+
+    Args:
+        Q:     The Q of A, m x m with R m x n (full) or m x n with R n x n (thin).
+        R:     The R of A.
+        k:     The index of a in the updated matrix.
+        a:     A vector of length m, the column to insert.
+        eType: Optional, the dtype of elements in matrix.
+
+    Returns:
+        Two Matrix: Q, R of the updated matrix.
+    """
+
+    if _IsRotations(Q):
+        raise ValueError('QRInsertColumn needs an explicit Q, not a list of rotations')
+    m, p, n = len(Q), len(Q[0]), len(R[0])
+    if len(a) != m:
+        raise ValueError('Expect a column of length %d not %d' % (m, len(a)))
+    if k < 0 or k > n:
+        raise IndexError('column index %d out of range [0, %d]' % (k, n))
+    zero = eType(0)
+    a = [_Convert(e, eType) for e in a]
+
+    # w = Q* * a
+    Qn = _Copy(Q, m, p + 1 if p < m else p, eType)
+    w = [sum((Qn[i, j] * a[i] for i in range(m)), zero) for j in range(p)]
+    if p < m:
+        # z = a - Q * w orthogonalized twice, Q = | Q  z / ||z|| |
+        z = [a[i] - sum((Qn[i, j] * w[j] for j in range(p)), zero) for i in range(m)]
+        r = [sum((Qn[i, j] * z[i] for i in range(m)), zero) for j in range(p)]
+        z = [z[i] - sum((Qn[i, j] * r[j] for j in range(p)), zero) for i in range(m)]
+        w = [w[j] + r[j] for j in range(p)]
+        z_norm = sum((e * e for e in z), zero) ** 0.5
+        if abs(z_norm) < eType(1e-12):
+            raise SigularMatrixError("QR Insert Column cannot apply on a column in the range of Q.")
+        for i in range(m):
+            Qn[i, p] = z[i] / z_norm
+        w.append(z_norm)
+        p += 1
+
+    # R = | R[:, :k]  w  R[:, k:] |
+    Rn = Matrix.zeros(p, n + 1, eType)
+    for i in range(min(p, len(R))):
+        row = R[i]
+        for j in range(n):
+            Rn[i, j if j < k else j + 1] = _Convert(row[j], eType)
+    for i in range(p):
+        Rn[i, k] = w[i]
+
+    # annihilate column k below the diagonal from the bottom up
+    Qt = Qn.T
+    for j in range(p - 1, k, -1):
+        if Rn[j, k] == zero:
+            continue
+        c, s = _GivensParameters(Rn[j - 1, k], Rn[j, k])
+        Rn.rotate_rows(j - 1, j, c, s, k)
+        Rn[j, k] = zero
+        Qt.rotate_rows(j - 1, j, c, s)
+    return Qn, Rn
+
+
+def QRDeleteColumn(Q, R, k, eType=float):
+    """QR Delete Column
+
+    Update the QR factorization of A to the one of A without column k. Removing
+    column k of R leaves it upper Hessenberg from column k on, the subdiagonal is
+    annihilated by Givens rotations on adjacent rows. The update is O(mn).
+
+    Args:
+        Q:     The Q of A, m x m with R m x n (full) or m x n with R n x n (thin).
+        R:     The R of A.
+        k:     The index of the column to delete.
+        eType: Optional, the dtype of elements in matrix.
+
+    Returns:
+        Two Matrix: Q, R of the updated matrix.
+    """
+
+    if _IsRotations(Q):
+        raise ValueError('QRDeleteColumn needs an explicit Q, not a list of rotations')
+    m, p, n = len(Q), len(Q[0]), len(R[0])
+    if k < 0 or k >= n:
+        raise IndexError('column index %d out of range [0, %d)' % (k, n))
+    zero = eType(0)
+
+    Qn = _Copy(Q, m, p, eType)
+    # R = | R[:, :k]  R[:, k + 1:] |
+    Rn = Matrix.zeros(p, n - 1, eType)
+    for i in range(p):
+        row = R[i]
+        for j in range(n):
+            if j != k:
+                Rn[i, j if j < k else j - 1] = _Convert(row[j], eType)
+
+    # annihilate the subdiagonal R[j + 1][j] (k <= j)
+    Qt = Qn.T
+    for j in range(k, min(n - 1, p - 1)):
+        if Rn[j + 1, j] == zero:
+            continue
+        c, s = _GivensParameters(Rn[j, j], Rn[j + 1, j])
+        Rn.rotate_rows(j, j + 1, c, s, j)
+        Rn[j + 1, j] = zero
+        Qt.rotate_rows(j, j + 1, c, s)
+
+    # row n - 1 of R is zero now, a thin Q does not need its last column
+    if p < m:
+        return Qn[:, :p - 1].copy(), Rn[:p - 1].copy()
+    return Qn, Rn
+
+
+def _IsRotations(Q):
+    # compact Q from GivensReduction, a list of (i, j, c, s)
+    return isinstance(Q, list) and (len(Q) == 0 or isinstance(Q[0], tuple))
+
+
+def _Convert(e, eType):
+    return e if type(e) == eType else eType(e)
+
+
+def _Copy(M, rows, cols, eType):
+    # copy M into the top left corner of a rows x cols zero Matrix
+    C = Matrix.zeros(rows, cols, eType)
+    for i in range(min(rows, len(M))):
+        row = M[i]
+        for j in range(min(cols, len(row))):
+            C[i, j] = _Convert(row[j], eType)
+    return C
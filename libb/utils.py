@@ -1,11 +1,22 @@
 import sys
+import ast
+import mmap
+from array import array
+from collections import namedtuple
 
-# load matrix from a file
-def LoadMatrix(src=sys.stdin, dst=[], dtype=int):
+from libb.exception import NotSquareMatrixError
+from libb.matrix import Matrix
+from libb.sparse import LoadMatrixMarket
+
+# load matrix from a file, a Matrix Market coordinate file gives a CSRMatrix
+def LoadMatrix(src=sys.stdin, dst=None, dtype=int):
+    dst = [] if dst is None else dst
     col_num, row_num = 0, 0
     for idx, line in enumerate(src):
+        if idx == 0 and line.startswith('%%MatrixMarket'):
+            return LoadMatrixMarket(src, header=line, dtype=dtype)
         # readline from src and split by ' '
-        line = line.rstrip('\n').split()
+        line = line.split()
         # end of input
         if len(line) == 0:
             break
@@ -14,31 +25,156 @@ def LoadMatrix(src=sys.stdin, dst=[], dtype=int):
             exit('Expect a "matrix"!')
         col_num = len(line)
         # append to dst
-        dst.append([dtype(e) for e in line])
+        dst.append(list(map(dtype, line)))
         # count for row's num
         row_num += 1
     return dst, row_num, col_num
 
-# print matrix M
-def PrintMatrix(M, title=""):
-    print(title)
-    if type(M[0][0]) == float:
-        for i in range(len(M)):
-            print("|", end='')
-            for j in range(len(M[i])):
-                print("%10.6f" % M[i][j], end=', ')
-            print("\b\b  |")
-        print()
-    else:
-        for i in range(len(M)):
-            print("|", end='')
-            for j in range(len(M[i])):
-                print("%7.6s" % M[i][j], end=', ')
-            print("\b\b  |")
-        print()
+# lazily load matrices split by empty lines, reading src in chunks of about chunk bytes
+def LoadMatrices(src=sys.stdin, dtype=int, chunk=1 << 20):
+    # float matrices are kept unboxed in a Matrix
+    def build(rows, row_num, col_num):
+        if dtype == float:
+            return Matrix(row_num, col_num, rows), row_num, col_num
+        return rows, row_num, col_num
+
+    # a Matrix Market coordinate file holds one sparse matrix
+    first = src.readline()
+    if first.startswith('%%MatrixMarket'):
+        yield LoadMatrixMarket(src, header=first, dtype=dtype)
+        return
+
+    rows, row_num, col_num = (array('d') if dtype == float else []), 0, 0
+    while True:
+        lines = src.readlines(chunk)
+        if first:
+            lines, first = [first] + lines, None
+        if len(lines) == 0:
+            break
+        for line in lines:
+            line = line.split()
+            # end of a matrix
+            if len(line) == 0:
+                if row_num != 0:
+                    yield build(rows, row_num, col_num)
+                    rows, row_num = (array('d') if dtype == float else []), 0
+                continue
+            # col's num is not unique
+            elif row_num != 0 and len(line) != col_num:
+                exit('Expect a "matrix"!')
+            col_num = len(line)
+            if dtype == float:
+                rows.extend(map(float, line))
+            else:
+                rows.append(list(map(dtype, line)))
+            row_num += 1
+    if row_num != 0:
+        yield build(rows, row_num, col_num)
+
+# element typecodes of .npy descr
+_NPY_TYPECODES = {'f8': 'd', 'f4': 'f', 'i8': 'q', 'i4': 'i', 'u1': 'B'}
+
+# memory-map a raw (row-major) or .npy matrix file as a zero-copy Matrix
+def MapMatrix(path, shape=None, typecode='d', offset=0, writable=False):
+    # a writable map writes every change of the Matrix through to the file
+    with open(path, 'r+b' if writable else 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+    # parse .npy header, shape and typecode come from it
+    if mm[:6] == b'\x93NUMPY':
+        header_len_size = 2 if mm[6] == 1 else 4
+        header_len = int.from_bytes(mm[8:8 + header_len_size], 'little')
+        offset = 8 + header_len_size + header_len
+        header = ast.literal_eval(mm[8 + header_len_size:offset].decode('latin1'))
+        descr = header['descr']
+        if descr[0] not in '<|=' or descr[1:] not in _NPY_TYPECODES:
+            raise ValueError('Unsupported .npy dtype %s' % descr)
+        if header['fortran_order'] or len(header['shape']) != 2:
+            raise ValueError('Expect a C-ordered 2-D .npy matrix')
+        typecode, shape = _NPY_TYPECODES[descr[1:]], header['shape']
+    elif shape is None:
+        raise ValueError('shape is required for a raw matrix file')
+    row_num, col_num = shape
+    itemsize = array(typecode).itemsize
+    if offset + row_num * col_num * itemsize > len(mm):
+        raise ValueError('File is too small for a (%d, %d) matrix' % (row_num, col_num))
+    return Matrix.from_buffer(memoryview(mm)[offset:offset + row_num * col_num * itemsize], row_num, col_num, typecode), row_num, col_num
+
+# print matrix M, one write per row
+def PrintMatrix(M, title="", f=None):
+    f = sys.stdout if f is None else f
+    f.write(title + "\n")
+    if type(M[0][0]) == complex:
+        for row in M:
+            f.write("|" + ", ".join(["%10.6f%+10.6fj" % (e.real, e.imag) for e in row]) + "  |\n")
+        f.write("\n")
+        return
+    fmt = "%10.6f" if type(M[0][0]) == float else "%7.6s"
+    for row in M:
+        f.write("|" + ", ".join([fmt % e for e in row]) + "  |\n")
+    f.write("\n")
+
+# formats of WriteMatrix, text ones are written with a delimiter
+FORMATS = ('text', 'csv', 'npy', 'bin')
+_DELIMITERS = {'text': ' ', 'csv': ','}
+
+def WriteMatrix(M, f, format='text'):
+    """Write Matrix
+
+    Write M to the file object f in a machine readable format. Text formats write
+    one whole row at a time, floats are written with repr so they read back
+    exactly. Binary formats write the whole row-major buffer at once, float for
+    elements of exact types; a .npy file can be read back by MapMatrix.
+
+    Args:
+        M:      A matrix instance.
+        f:      A file object, opened in binary mode for 'npy' and 'bin'.
+        format: Optional, 'text' (whitespace separated), 'csv', 'npy' or 'bin' (raw).
+    """
+
+    if format in _DELIMITERS:
+        delimiter = _DELIMITERS[format]
+        f.writelines(delimiter.join([repr(e) if type(e) == float else str(e) for e in row]) + "\n" for row in M)
+        return
+    if format not in FORMATS:
+        raise ValueError('Unknown format %r, expect one of %s' % (format, ', '.join(FORMATS)))
+    typecode, data = _RowMajor(M)
+    if format == 'npy':
+        descr = '<' + {t: code for code, t in _NPY_TYPECODES.items()}[typecode]
+        header = "{'descr': '%s', 'fortran_order': False, 'shape': (%d, %d), }" % (descr, len(M), len(M[0]) if len(M) else 0)
+        # magic, version 1.0, header length, header padded with spaces to a multiple of 64 and ended by a newline
+        header += ' ' * (63 - (10 + len(header)) % 64) + '\n'
+        f.write(b'\x93NUMPY\x01\x00' + len(header).to_bytes(2, 'little') + header.encode('latin1'))
+    f.write(data)
+
+def _RowMajor(M):
+    # typecode and little-endian row-major storage of M, zero-copy for a contiguous unboxed Matrix
+    typecode = 'd'
+    if isinstance(M, Matrix) and not isinstance(M.data, list):
+        typecode = M.data.typecode if isinstance(M.data, array) else M.data.format
+        if typecode not in _NPY_TYPECODES.values():
+            typecode = 'd'
+        elif M.is_contiguous() and sys.byteorder == 'little':
+            return typecode, memoryview(M.data)[M.offset:M.offset + M.rows * M.cols]
+    data = array(typecode, [e if typecode != 'd' else float(e) for row in M for e in row])
+    if sys.byteorder != 'little':
+        data.byteswap()
+    return typecode, data
 
 def RoundMatrix(M, digits=32):
+    # digits None keeps M as it is, same as RoundArray
+    if digits is None:
+        return M
     precision = 10 ** (-digits)
+    # round the whole storage of a Matrix in one pass
+    if isinstance(M, Matrix) and M.offset == 0 and M.is_contiguous() and len(M.data) == M.rows * M.cols:
+        data = M.data
+        for k in range(len(data)):
+            e = round(data[k], digits)
+            if abs(e) < precision:
+                data[k] = 0.
+            else:
+                data[k] = e
+        return M
     for i in range(len(M)):
         for j in range(len(M[i])):
             e = round(M[i][j], digits)
@@ -46,4 +182,55 @@ def RoundMatrix(M, digits=32):
                 M[i][j] = 0.
             else:
                 M[i][j] = e
-    return M
\ No newline at end of file
+    return M
+
+# structure of a square matrix, lower and upper are its bandwidths
+Structure = namedtuple('Structure', ('kind', 'lower', 'upper', 'symmetric'))
+
+def DetectStructure(A, tol=0):
+    """Detect Structure
+
+    Find the lower and upper bandwidth of A and whether it is symmetric in one
+    O(n^2) pass, cheap next to an O(n^3) factorization. The kind is the first
+    match of 'diagonal', 'upper', 'lower' (triangular), 'tridiagonal', 'banded'
+    (4 * (lower + upper) <= n), 'symmetric' and 'general'.
+
+    Args:
+        A:   A square matrix instance.
+        tol: Optional, elements with abs(e) <= tol are taken as zeros.
+
+    Returns:
+        A Structure(kind, lower, upper, symmetric).
+    """
+
+    size = len(A)
+    c_size = len(A[0]) if size else 0
+    if c_size != size:
+        raise NotSquareMatrixError('Except a square matrix with shape (%d,%d) not (%d, %d)' % (size, size, size, c_size))
+    rows = [A[i].tolist() if isinstance(A, Matrix) else list(A[i]) for i in range(size)]
+    # bandwidths from the first and the last nonzero of each row
+    lower = upper = 0
+    for i, row in enumerate(rows):
+        nonzeros = [j for j, e in enumerate(row) if abs(e) > tol]
+        if nonzeros:
+            lower = max(lower, i - nonzeros[0])
+            upper = max(upper, nonzeros[-1] - i)
+    # a symmetric matrix has lower == upper, compare inside the band only
+    symmetric = lower == upper and all(abs(rows[i][j] - rows[j][i]) <= tol
+                                       for i in range(size) for j in range(i + 1, min(i + upper + 1, size)))
+
+    if lower == 0 and upper == 0:
+        kind = 'diagonal'
+    elif lower == 0:
+        kind = 'upper'
+    elif upper == 0:
+        kind = 'lower'
+    elif lower == 1 and upper == 1:
+        kind = 'tridiagonal'
+    elif 4 * (lower + upper) <= size:
+        kind = 'banded'
+    elif symmetric:
+        kind = 'symmetric'
+    else:
+        kind = 'general'
+    return Structure(kind, lower, upper, symmetric)
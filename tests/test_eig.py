@@ -0,0 +1,72 @@
+import random
+import unittest
+
+import libb
+
+# numpy is optional
+BACKENDS = ('python', 'numpy') if libb.backend.numpy is not None else ('python',)
+
+
+def _Rand(rand, size, symmetric=False):
+    A = [[rand.uniform(-1., 1.) for j in range(size)] for i in range(size)]
+    if symmetric:
+        A = [[A[i][j] + A[j][i] for j in range(size)] for i in range(size)]
+    return A
+
+
+class EigTest(unittest.TestCase):
+
+    def assertEigenpairs(self, A, w, V):
+        # A * v = w * v for every column v of V, and v has unit length
+        size = len(A)
+        for k in range(size):
+            v = [V[i][k] for i in range(size)]
+            self.assertAlmostEqual(sum(abs(e) ** 2 for e in v), 1., places=10)
+            for i in range(size):
+                self.assertAlmostEqual(abs(sum(A[i][j] * v[j] for j in range(size)) - w[k] * v[i]), 0., places=9)
+
+    def test_hessenberg(self):
+        A = _Rand(random.Random(1), 6)
+        for backend in BACKENDS:
+            H, Q = libb.HessenbergReduction(A, digits=None, backend=backend)
+            for i in range(6):
+                for j in range(6):
+                    if i > j + 1:
+                        self.assertAlmostEqual(H[i][j], 0., places=12)
+                    # A = Q * H * Q*
+                    e = sum(Q[i][k] * H[k][l] * Q[j][l] for k in range(6) for l in range(6))
+                    self.assertAlmostEqual(e, A[i][j], places=10)
+
+    def test_symmetric(self):
+        self.assertEqual(libb.EigVals([[2., 1.], [1., 2.]]), [1., 3.])
+        A = _Rand(random.Random(2), 7, symmetric=True)
+        for backend in BACKENDS:
+            w, V = libb.Eig(A, digits=None, backend=backend)
+            self.assertEqual(w, sorted(w))
+            self.assertEigenpairs(A, w, V)
+
+    def test_general(self):
+        A = _Rand(random.Random(3), 6)
+        for backend in BACKENDS:
+            w, V = libb.Eig(A, digits=None, backend=backend)
+            self.assertEigenpairs(A, w, V)
+            # the eigenvalues of a real matrix sum to its trace and come in conjugate pairs
+            self.assertAlmostEqual(abs(sum(w) - sum(A[i][i] for i in range(6))), 0., places=10)
+            for e in w:
+                self.assertTrue(any(abs(f - complex(e).conjugate()) < 1e-9 for f in w))
+
+    def test_complex(self):
+        w = libb.EigVals([[0., -1.], [1., 0.]])
+        self.assertEqual(sorted(w, key=lambda e: e.imag), [-1j, 1j])
+
+    def test_defective(self):
+        # a Jordan block has a single eigenvector for its triple eigenvalue
+        A = [[2., 1., 0.], [0., 2., 1.], [0., 0., 2.]]
+        w, V = libb.Eig(A, digits=None)
+        for e in w:
+            self.assertAlmostEqual(abs(e - 2.), 0., places=10)
+        self.assertEigenpairs(A, w, V)
+
+
+if __name__ == '__main__':
+    unittest.main()
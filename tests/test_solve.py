@@ -0,0 +1,75 @@
+import random
+import unittest
+
+import libb
+
+
+def _Banded(rand, size, lower, upper):
+    # random band, the diagonal is not dominant so the elimination has to exchange rows
+    return [[rand.uniform(-1., 1.) if -lower <= j - i <= upper else 0. for j in range(size)] for i in range(size)]
+
+
+class StructuredSolveTest(unittest.TestCase):
+
+    def check(self, lower, upper, kind):
+        rand = random.Random('%d-%d' % (lower, upper))
+        for _ in range(20):
+            A = _Banded(rand, 16, lower, upper)
+            b = [rand.uniform(-1., 1.) for _ in range(16)]
+            self.assertEqual(libb.DetectStructure(A).kind, kind)
+            x = libb.StructuredSolve(A, b, digits=None)
+            for x_i, y_i in zip(x, libb.LUSolve(A, b, digits=None)):
+                self.assertAlmostEqual(x_i, y_i, places=8)
+
+    def test_banded_with_pivoting(self):
+        self.check(2, 1, 'banded')
+
+    def test_tridiagonal_not_dominant(self):
+        self.check(1, 1, 'tridiagonal')
+
+
+class LUCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        libb.ClearLUCache()
+        libb.SetLUCacheSize(32)
+
+    def tearDown(self):
+        libb.ClearLUCache()
+
+    def test_hits_and_misses(self):
+        A = [[4., 3.], [6., 3.]]
+        self.assertEqual(libb.LUSolve(A, [10., 12.]), [1., 2.])
+        self.assertEqual(libb.LUSolve(A, [7., 9.]), [1., 1.])
+        self.assertEqual(libb.Det(A), -6.)
+        info = libb.LUCacheInfo()
+        self.assertEqual((info.hits, info.misses, info.currsize), (2, 1, 1))
+        # a changed element is a new matrix
+        libb.LUSolve([[4., 3.], [6., 4.]], [10., 12.])
+        self.assertEqual(libb.LUCacheInfo().misses, 2)
+
+    def test_typecode_in_key(self):
+        A = [[4., 3.], [6., 3.]]
+        libb.LUSolve(A, [10., 12.])
+        # the single precision factors of RefineSolve are kept apart from the double ones
+        x, info = libb.RefineSolve(A, [10., 12.])
+        self.assertTrue(info.converged)
+        self.assertAlmostEqual(x[0], 1., places=12)
+        self.assertAlmostEqual(x[1], 2., places=12)
+        # the same values stored as float32 hash differently
+        libb.LUSolve(libb.Matrix.from_rows(A, float, 'f'), [10., 12.])
+        self.assertEqual(libb.LUCacheInfo().misses, 3)
+        self.assertEqual(libb.LUCacheInfo().currsize, 3)
+
+    def test_eviction(self):
+        libb.SetLUCacheSize(2)
+        for k in range(3):
+            libb.LUSolve([[1., float(k)], [0., 1.]], [1., 1.])
+        self.assertEqual(libb.LUCacheInfo().currsize, 2)
+        # the least recently used matrix was dropped
+        libb.LUSolve([[1., 0.], [0., 1.]], [1., 1.])
+        self.assertEqual(libb.LUCacheInfo().misses, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
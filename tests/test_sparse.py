@@ -0,0 +1,66 @@
+import io
+import random
+import unittest
+
+import libb
+
+
+def _Arrow(size):
+    # dense first row and column, the natural order fills both factors completely
+    return [[float(size) if i == j else (1. if i == 0 or j == 0 else 0.) for j in range(size)] for i in range(size)]
+
+
+def _Sparse(rand, size):
+    return [[rand.uniform(1., 2.) if i == j else (rand.uniform(-1., 1.) if rand.random() < 0.15 else 0.)
+             for j in range(size)] for i in range(size)]
+
+
+class SparseTest(unittest.TestCase):
+
+    def test_storage(self):
+        A = libb.CSRMatrix.from_coo(2, 3, [0, 1, 0], [2, 0, 2], [1., 4., 2.])
+        # duplicates are summed, missing elements are zero
+        self.assertEqual(A.nnz, 2)
+        self.assertEqual([list(r) for r in A.todense()], [[0., 0., 3.], [4., 0., 0.]])
+        self.assertEqual(A.tocsc()[1, 0], 4.)
+        self.assertEqual(A.tocsc()[1, 2], 0.)
+        self.assertEqual(A.matvec([1., 2., 3.]), [9., 4.])
+
+    def test_matrix_market(self):
+        src = io.StringIO('%%MatrixMarket matrix coordinate real symmetric\n% comment\n3 3 3\n1 1 2.0\n2 1 -1\n3 3 4\n')
+        A, rows, cols = libb.LoadMatrixMarket(src)
+        self.assertEqual((rows, cols), (3, 3))
+        self.assertEqual([list(r) for r in A.todense()], [[2., -1., 0.], [-1., 0., 0.], [0., 0., 4.]])
+
+    def test_lu(self):
+        rand = random.Random(5)
+        for ordering in ('natural', 'mindeg'):
+            A = _Sparse(rand, 30)
+            L, U, P, Q, stats = libb.SparseLUFactorization(libb.CSRMatrix.from_dense(A), ordering=ordering)
+            # L * U = PAQ, the unit diagonal of L is not stored
+            Ld, Ud = [list(r) for r in L.todense()], [list(r) for r in U.todense()]
+            for i in range(30):
+                self.assertEqual(Ld[i][i], 0.)
+                Ld[i][i] = 1.
+            for i in range(30):
+                for j in range(30):
+                    self.assertAlmostEqual(sum(Ld[i][k] * Ud[k][j] for k in range(30)), A[P[i]][Q[j]], places=10)
+            b = [rand.uniform(-1., 1.) for _ in range(30)]
+            x = libb.SparseLUSolve(L, U, P, Q, b)
+            for i in range(30):
+                self.assertAlmostEqual(sum(A[i][j] * x[j] for j in range(30)), b[i], places=10)
+
+    def test_ordering_fill(self):
+        A = libb.CSRMatrix.from_dense(_Arrow(200))
+        order = libb.MinimumDegreeOrdering(A)
+        self.assertEqual(sorted(order), list(range(200)))
+        # the hub column goes last, the elimination creates no fill
+        self.assertIn(0, order[-2:])
+        stats = libb.SparseLUFactorization(A)[4]
+        self.assertEqual((stats.nnz_a, stats.fill_in), (598, 0))
+        natural = libb.SparseLUFactorization(A, ordering='natural')[4]
+        self.assertEqual(natural.nnz_l, 200 * 199 // 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
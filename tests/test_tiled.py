@@ -0,0 +1,58 @@
+import os
+import random
+import tempfile
+import unittest
+
+import libb
+from libb.tiled import TiledLUFactorization
+
+# numpy is optional
+BACKENDS = ('python', 'numpy') if libb.backend.numpy is not None else ('python',)
+
+
+def _Rand(rand, size):
+    return [[rand.uniform(-1., 1.) for j in range(size)] for i in range(size)]
+
+
+class TiledLUTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def factor(self, A, format, block, backend):
+        # write A, factor the file in place and read the factors back from it
+        path = os.path.join(self.directory.name, 'A.' + format)
+        with open(path, 'wb') as f:
+            libb.WriteMatrix(libb.Matrix.from_rows(A), f, format)
+        shape = None if format == 'npy' else (len(A), len(A))
+        LU, P = TiledLUFactorization(path, shape=shape, block=block, backend=backend)
+        B, rows, cols = libb.MapMatrix(path, shape)
+        self.assertEqual([list(row) for row in B], [list(row) for row in LU])
+        return [list(row) for row in LU], P
+
+    def test_factors(self):
+        rand = random.Random(7)
+        for size, block in ((7, 3), (20, 6), (16, 16), (9, 1)):
+            A = _Rand(rand, size)
+            packed, pivots = libb.PackedLUFactorization(A, digits=None)
+            for backend in BACKENDS:
+                for format in ('npy', 'bin'):
+                    LU, P = self.factor(A, format, block, backend)
+                    # the same pivots as the in-memory LU and PA = LU
+                    self.assertEqual(P, pivots)
+                    for i in range(size):
+                        for j in range(size):
+                            e = sum(LU[i][k] * LU[k][j] for k in range(min(i, j + 1))) + (LU[i][j] if i <= j else 0.)
+                            self.assertAlmostEqual(e, A[P[i]][j], places=10)
+
+    def test_singular(self):
+        for backend in BACKENDS:
+            with self.assertRaises(libb.SigularMatrixError):
+                self.factor([[1., 2., 3.], [2., 4., 6.], [1., 1., 1.]], 'npy', 2, backend)
+
+
+if __name__ == '__main__':
+    unittest.main()
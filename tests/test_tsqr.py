@@ -0,0 +1,73 @@
+import io
+import random
+import unittest
+
+import libb
+
+# numpy is optional
+BACKENDS = ('python', 'numpy') if libb.backend.numpy is not None else ('python',)
+
+
+def _Rand(rand, rows, cols):
+    return [[rand.uniform(-1., 1.) for j in range(cols)] for i in range(rows)]
+
+
+class TSQRTest(unittest.TestCase):
+
+    def assertTSQR(self, A, Q, R):
+        rows, cols = len(A), len(A[0])
+        # Q * R = A column by column, Q* * A = R
+        QR = libb.ApplyTSQR(Q, [list(row) for row in R])
+        QtA = libb.ApplyTSQR(Q, A, transpose=True)
+        for i in range(rows):
+            for j in range(cols):
+                self.assertAlmostEqual(QR[i][j], A[i][j], places=10)
+        for i in range(cols):
+            for j in range(cols):
+                self.assertAlmostEqual(QtA[i][j], R[i][j], places=10)
+                if i > j:
+                    self.assertEqual(R[i][j], 0.)
+        # R agrees with the Householder R up to the signs of its rows
+        H = libb.HouseholderReduction(A, digits=None)[1]
+        for i in range(cols):
+            for j in range(cols):
+                self.assertAlmostEqual(abs(R[i][j]), abs(H[i][j]), places=10)
+
+    def test_blocks(self):
+        A = _Rand(random.Random(1), 200, 5)
+        for backend in BACKENDS:
+            for block, arity in ((None, 2), (16, 2), (7, 3), (3, 2)):
+                Q, R = libb.TSQR(A, digits=None, block=block, arity=arity, workers=1, backend=backend)
+                self.assertTSQR(A, Q, R)
+
+    def test_processes(self):
+        A = _Rand(random.Random(2), 120, 4)
+        Q, R = libb.TSQR(A, digits=None, block=25, workers=2)
+        self.assertEqual([len(level) for level in Q], [5, 3, 2, 1])
+        self.assertTSQR(A, Q, R)
+
+    def test_stream(self):
+        A = _Rand(random.Random(3), 90, 4)
+        text = '\n\n'.join('\n'.join(' '.join(repr(e) for e in row) for row in A[i:i + 13]) for i in range(0, 90, 13))
+        Q, R = libb.TSQR(libb.LoadMatrices(io.StringIO(text), dtype=float), digits=None, workers=1)
+        self.assertTSQR(A, Q, R)
+        # without the reflectors only R is returned
+        Q, R_only = libb.TSQR(libb.LoadMatrices(io.StringIO(text), dtype=float), digits=None, workers=1, keepQ=False)
+        self.assertIsNone(Q)
+        for row, row_only in zip(R, R_only):
+            for e, f in zip(row, row_only):
+                self.assertAlmostEqual(e, f, places=12)
+        with self.assertRaises(ValueError):
+            libb.ApplyTSQR(Q, [1., 2., 3., 4.])
+
+    def test_vector(self):
+        A = _Rand(random.Random(4), 40, 3)
+        Q, R = libb.TSQR(A, digits=None, block=10, workers=1)
+        x = libb.ApplyTSQR(Q, [1., 0., 0.])
+        # Q * e1 is the first column of A over R[0][0]
+        for i in range(40):
+            self.assertAlmostEqual(x[i] * R[0][0], A[i][0], places=10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import random
+import unittest
+
+import libb
+
+
+def _Rand(rand, rows, cols):
+    return [[rand.uniform(-1., 1.) for j in range(cols)] for i in range(rows)]
+
+
+class QRUpdateTest(unittest.TestCase):
+
+    def assertQR(self, Q, R, A):
+        # Q * R = A, Q has orthonormal columns and R is upper triangular
+        rows, cols, inner = len(A), len(A[0]), len(R)
+        for i in range(rows):
+            for j in range(cols):
+                self.assertAlmostEqual(sum(Q[i][k] * R[k][j] for k in range(inner)), A[i][j], places=10)
+        for j in range(inner):
+            for l in range(inner):
+                self.assertAlmostEqual(sum(Q[i][j] * Q[i][l] for i in range(rows)), 1. if j == l else 0., places=10)
+            for i in range(j + 1, inner):
+                if i < cols and j < cols:
+                    self.assertAlmostEqual(R[i][j], 0., places=12)
+
+    def check(self, A, full):
+        rand = random.Random(len(A))
+        rows, cols = len(A), len(A[0])
+        Q, R = libb.HouseholderReduction(A, digits=None)
+        self.assertEqual(len(Q[0]), rows if full else cols)
+
+        # row updates
+        a = [rand.uniform(-1., 1.) for j in range(cols)]
+        Qi, Ri = libb.QRInsertRow(Q, R, 1, a)
+        B = A[:1] + [a] + A[1:]
+        self.assertQR(Qi, Ri, B)
+        Qd, Rd = libb.QRDeleteRow(Qi, Ri, 1)
+        self.assertQR(Qd, Rd, A)
+
+        # column updates
+        a = [rand.uniform(-1., 1.) for i in range(rows)]
+        if not full:
+            Qi, Ri = libb.QRInsertColumn(Q, R, 1, a)
+            self.assertQR(Qi, Ri, [row[:1] + [e] + row[1:] for row, e in zip(A, a)])
+        Qd, Rd = libb.QRDeleteColumn(Q, R, 0)
+        self.assertQR(Qd, Rd, [row[1:] for row in A])
+
+    def test_full(self):
+        self.check(_Rand(random.Random(1), 5, 5), True)
+
+    def test_thin(self):
+        self.check(_Rand(random.Random(2), 7, 4), False)
+
+    def test_compact_append(self):
+        rand = random.Random(3)
+        A = _Rand(rand, 6, 3)
+        rotations, R = libb.GivensReduction(A, digits=None, compact=True)
+        a = [rand.uniform(-1., 1.) for j in range(3)]
+        rotations, R = libb.QRInsertRow(rotations, R, 6, a)
+        # Q * | R | = A with a appended, column by column
+        #     | 0 |
+        B = A + [a]
+        for j in range(3):
+            x = [R[i][j] if i < 3 else 0. for i in range(7)]
+            for i, e in enumerate(libb.ApplyGivensRotations(rotations, x)):
+                self.assertAlmostEqual(e, B[i][j], places=10)
+        # the rotations only take an appended row
+        with self.assertRaises(ValueError):
+            libb.QRInsertRow(rotations, R, 0, a)
+
+
+if __name__ == '__main__':
+    unittest.main()